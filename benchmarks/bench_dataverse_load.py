@@ -0,0 +1,218 @@
+"""
+Load benchmark of the Dataverse client code against the local mock server
+(benchmarks/mock_dataverse.py): no org, no sign-in.
+
+Scenarios:
+- call_dataverse   one GET per ticket, DATAVERSE_CONCURRENCY in flight;
+- paginate         the whole accounts set, page by page;
+- service          RelatedDocumentsService ids + locations ($expand, then two-step);
+- merge            tasks.merge_accounts.process_merge_for_all_groups, one request
+                   per subordinate, then one $batch changeset per group.
+
+For each: wall time, HTTP requests, requests/s, p50/p95 latency per request
+(as seen by the client), retries and 429s.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dataverse_load --profile vpn --tickets 500 --concurrency 8
+    python -m benchmarks.bench_dataverse_load --profile tight   # exercises 429 + Retry-After
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.mock_dataverse import ENTITIES, PROFILES, configure_client, start_mock_dataverse
+
+ENTITY_BY_SET = {"accounts": "account", "incidents": "case", "icps_ecases": "ecase",
+                 "icps_inspections": "inspection", "icps_investigations": "investigation"}
+
+def _alias_script_packages() -> None:
+    """The tasks scripts import 'core.services...' / 'tasks...' (run from dataverse_apis/):
+    alias the already-imported package modules so they share one client."""
+    import dataverse_apis.core.services.dataverse_client  # noqa: F401
+    import dataverse_apis.core.services.dataverse_query  # noqa: F401
+    import dataverse_apis.core.services.page_writers  # noqa: F401
+    import dataverse_apis.tasks
+    for name, module in list(sys.modules.items()):
+        if name.startswith(("dataverse_apis.core", "dataverse_apis.tasks")):
+            sys.modules.setdefault(name[len("dataverse_apis."):], module)
+
+class _Latency:
+    """Times every request of the pooled Session (retries and 429s included)."""
+
+    def __init__(self) -> None:
+        from dataverse_apis.core.services.http_session import get_session
+        self.lock = threading.Lock()
+        self.samples: list[float] = []
+        session = get_session()
+        original = session.request
+
+        def request(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.samples.append((time.perf_counter() - t0) * 1000)
+
+        session.request = request
+
+    def reset(self) -> None:
+        with self.lock:
+            self.samples = []
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+def _run(name: str, fn, server, latency: _Latency) -> dict:
+    from dataverse_apis.core.logging.run_report import start_run_report
+    from dataverse_apis.core.services.request_coalescing import memo_scope
+    report = start_run_report()
+    server.mock.reset_stats()
+    latency.reset()
+    t0 = time.perf_counter()
+    with memo_scope():
+        fn()
+    wall = time.perf_counter() - t0
+    samples = list(latency.samples)
+    return {
+        "scenario": name,
+        "wall_s": wall,
+        "requests": len(samples),
+        "operations": server.mock.operations,
+        "rps": len(samples) / wall if wall else 0.0,
+        "p50_ms": _percentile(samples, 0.50),
+        "p95_ms": _percentile(samples, 0.95),
+        "retries": report.counters.get("dv_retries", 0),
+        "throttled": server.mock.throttled,
+    }
+
+# ---------- scenarios ----------
+def _tickets(n: int) -> list[tuple[str, str]]:
+    """(entity set, key) round-robin over the mapped entities, plus ~5% unknown keys."""
+    sets = list(ENTITIES)
+    out = []
+    for i in range(n):
+        entity_set = sets[i % len(sets)]
+        fmt = ENTITIES[entity_set][3]
+        out.append((entity_set, fmt.format(i // len(sets)) if i % 20 else f"MISSING-{i}"))
+    return out
+
+def scenario_call_dataverse(tickets, concurrency: int):
+    from dataverse_apis.core.services.concurrency import map_ordered
+    from dataverse_apis.core.services.dataverse_client import call_dataverse
+
+    endpoints = []
+    for entity_set, key in tickets:
+        _, id_field, key_field, _ = ENTITIES[entity_set]
+        endpoints.append(f"{entity_set}?$select={id_field}&$filter={key_field} eq '{key}'")
+    return lambda: map_ordered(call_dataverse, endpoints, concurrency)
+
+def scenario_paginate(page_size: int):
+    from dataverse_apis.core.services.dataverse_client import call_dataverse
+    from dataverse_apis.core.services.dataverse_query import paginate
+
+    def run():
+        rows = sum(len(p) for p in paginate(call_dataverse, "accounts", select=["accountid", "accountnumber"],
+                                            page_size=page_size))
+        assert rows > 0
+    return run
+
+def scenario_service(tickets, concurrency: int, expand: bool):
+    from logic.related_documents_service import RelatedDocumentsService, to_targets
+
+    def run():
+        targets = to_targets([{"entity": ENTITY_BY_SET[s], "ticket_number": k} for s, k in tickets])
+        service = RelatedDocumentsService(concurrency=concurrency, expand_locations=expand)
+        service.resolve_object_ids(targets)
+        service.resolve_relative_urls(targets)
+        resolved = sum(1 for t in targets if t.object_id)
+        assert resolved, "no target resolved"
+    return run
+
+def scenario_merge(groups: int, records: int, concurrency: int, use_batch: bool, offset: int = 0):
+    import pandas as pd
+
+    _alias_script_packages()
+    import tasks.merge_accounts as merge_accounts
+
+    fmt = ENTITIES["accounts"][3]
+    rows = []
+    for g in range(offset, offset + groups):
+        for role, i in ((1, 3 * g), (0, 3 * g + 1), (0, 3 * g + 2)):
+            if i >= records:
+                break
+            key = fmt.format(i)
+            rows.append({"BUS ID": key, "Merge_Group_ID": g, "Merge_Role": role,
+                         "accountid": str(uuid.uuid5(uuid.NAMESPACE_URL, f"accounts/{key}"))})
+    df = pd.DataFrame(rows)
+    merge_accounts.OUTPUT_FILE = os.path.join(tempfile.mkdtemp(prefix="bench_merge_"), "merged.xlsx")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            merge_accounts.process_merge_for_all_groups(df.copy(), workers=concurrency, use_batch=use_batch)
+    return run
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=PROFILES, default="vpn", help="Mock latency/throttling profile.")
+    parser.add_argument("--records", type=int, default=2000, help="Records per entity in the mock.")
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4, help="DATAVERSE_CONCURRENCY for the client.")
+    parser.add_argument("--client-rps", type=float, default=0,
+                        help="DATAVERSE_MAX_RPS for the client (0 = no client-side limit).")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--merge-groups", type=int, default=50)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["call_dataverse", "paginate", "service", "merge"])
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    server, base_uri = start_mock_dataverse(records=args.records, **profile)
+    configure_client(base_uri, concurrency=args.concurrency, client_rps=args.client_rps)
+    latency = _Latency()
+    tickets = _tickets(args.tickets)
+
+    scenarios = []
+    if "call_dataverse" not in args.skip:
+        scenarios.append(("call_dataverse", scenario_call_dataverse(tickets, args.concurrency)))
+    if "paginate" not in args.skip:
+        scenarios.append(("paginate", scenario_paginate(args.page_size)))
+    if "service" not in args.skip:
+        scenarios.append(("service ($expand)", scenario_service(tickets, args.concurrency, True)))
+        scenarios.append(("service (two-step)", scenario_service(tickets, args.concurrency, False)))
+    if "merge" not in args.skip:
+        # the mock keeps merged accounts inactive: the $batch run takes the next groups
+        scenarios.append(("merge", scenario_merge(args.merge_groups, args.records, args.concurrency, False)))
+        scenarios.append(("merge ($batch)", scenario_merge(args.merge_groups, args.records, args.concurrency, True,
+                                                           offset=args.merge_groups)))
+
+    results = []
+    for name, fn in scenarios:
+        try:
+            results.append(_run(name, fn, server, latency))
+        except Exception as e:
+            print(f"  {name}: failed — {e}")
+    server.shutdown()
+
+    print(f"profile={args.profile} {profile}  tickets={args.tickets}  concurrency={args.concurrency}  "
+          f"client_rps={args.client_rps or 'off'}\n")
+    print(f"  {'scenario':<20} {'wall s':>7} {'requests':>8} {'ops':>6} {'req/s':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'retries':>7} {'429s':>5}")
+    for r in results:
+        print(f"  {r['scenario']:<20} {r['wall_s']:7.2f} {r['requests']:8d} {r['operations']:6d} {r['rps']:7.1f} "
+              f"{r['p50_ms']:7.1f} {r['p95_ms']:7.1f} {r['retries']:7d} {r['throttled']:5d}")
+
+if __name__ == "__main__":
+    main()
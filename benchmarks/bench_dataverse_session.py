@@ -0,0 +1,118 @@
+"""
+Per-call latency of Dataverse-style requests: one connection per call (previous
+module-level requests.get/post) vs the pooled keep-alive Session used by
+call_dataverse (dataverse_apis.core.services.http_session).
+
+A local HTTP/1.1 stand-in server answers OData-like JSON (gzip when asked) and
+sleeps --connect-ms on every NEW connection to simulate the TCP + TLS handshake
+to *.crm.dynamics.com over the VPN (100–300 ms in practice).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dataverse_session --calls 200 --connect-ms 150
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import requests
+
+from dataverse_apis.core.services.http_session import build_session, ODATA_HEADERS
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.bytes_sent = 0
+
+def _make_handler(stats: _Stats, connect_s: float, records: int):
+    payload = json.dumps({
+        "@odata.context": "https://org.crm.dynamics.com/api/data/v9.2/$metadata#incidents",
+        "value": [{"incidentid": f"00000000-0000-0000-0000-{i:012d}", "ticketnumber": f"CAS-{i:06d}-X1Y2Z3",
+                   "title": "Sample case title " * 3} for i in range(records)],
+    }).encode("utf-8")
+    payload_gz = gzip.compress(payload)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+            time.sleep(connect_s)  # simulated TCP + TLS handshake
+
+        def do_GET(self):
+            body, encoding = payload, None
+            if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                body, encoding = payload_gz, "gzip"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; odata.metadata=minimal")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with stats.lock:
+                stats.bytes_sent += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def _run_case(name: str, call, url: str, calls: int, stats: _Stats) -> dict:
+    stats.connections, stats.bytes_sent = 0, 0
+    latencies = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        resp = call(f"{url}/incidents?$filter=ticketnumber eq 'CAS-{i:06d}'")
+        resp.raise_for_status()
+        resp.json()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    return {
+        "case": name,
+        "avg_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "connections": stats.connections,
+        "kb_on_wire": stats.bytes_sent / 1024,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--connect-ms", type=float, default=150.0, help="Simulated handshake per new connection.")
+    parser.add_argument("--records", type=int, default=50, help="Records per response.")
+    args = parser.parse_args()
+
+    stats = _Stats()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(stats, args.connect_ms / 1000, args.records))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/data/v9.2"
+
+    # before: module-level requests.get -> a new connection per call
+    before = _run_case("per-call connection", lambda u: requests.get(u, headers=ODATA_HEADERS), url, args.calls, stats)
+
+    session = build_session()
+    after = _run_case("pooled session", session.get, url, args.calls, stats)
+    session.close()
+    server.shutdown()
+
+    print(f"{args.calls} calls, simulated handshake {args.connect_ms:.0f} ms, {args.records} records/response\n")
+    for r in (before, after):
+        print(f"  {r['case']:<20} avg {r['avg_ms']:7.1f} ms  p50 {r['p50_ms']:7.1f} ms  p95 {r['p95_ms']:7.1f} ms  "
+              f"connections {r['connections']:4d}  {r['kb_on_wire']:8.0f} KB on the wire")
+    print(f"\n  speed-up (avg): ×{before['avg_ms'] / after['avg_ms']:.1f}")
+
+if __name__ == "__main__":
+    main()
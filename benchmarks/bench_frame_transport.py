@@ -0,0 +1,113 @@
+"""
+Benchmark: handing parsed sheets / transposed records to a worker process.
+
+- pickle:    the DataFrame / records are the task argument (pickled through the pool pipe)
+- shm:       FrameTransport publishes an Arrow IPC stream in shared memory; only
+             the FrameHandle crosses the pipe and the worker maps the segment
+- file:      same through a memory-mapped file (storage="file")
+
+Each case is timed end to end (publish + send + worker load + release) and the
+worker reports how long its own load took.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_frame_transport --rows 200000 --cols 20 --repeat 3
+"""
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from logic.columnar import arrow_available
+from logic.frame_transport import FrameTransport, load_frame, load_records
+from logic.transposer import transpose_row_by_row
+
+def _make_frame(rows: int, cols: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    data = {}
+    for c in range(cols):
+        if c % 3 == 0:
+            data[f"Amount {c}"] = rng.random(rows) * 1000
+        elif c % 3 == 1:
+            data[f"Code {c}"] = rng.integers(0, 1_000_000, rows)
+        else:
+            data[f"Name {c}"] = [f"CAS-{i:06d}-{c}" for i in range(rows)]
+    return pd.DataFrame(data)
+
+# ————— worker side —————
+def _recv_pickled(obj) -> tuple[int, float]:
+    return len(obj), 0.0
+
+def _recv_frame(handle) -> tuple[int, float]:
+    t0 = time.perf_counter()
+    df = load_frame(handle)
+    return len(df), time.perf_counter() - t0
+
+def _recv_records(handle) -> tuple[int, float]:
+    t0 = time.perf_counter()
+    records = load_records(handle)
+    return len(records), time.perf_counter() - t0
+
+def _warm_up() -> int:
+    return os.getpid()
+
+# ————— driver —————
+def _time_pickled(pool, payload, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        pool.submit(_recv_pickled, payload).result()
+        best = min(best, time.perf_counter() - t0)
+    return {"total_s": best, "worker_load_s": 0.0}
+
+def _time_transport(pool, payload, repeat: int, storage: str, spill_dir: str, kind: str) -> dict:
+    recv = _recv_frame if kind == "frame" else _recv_records
+    best, best_load, size, codec = float("inf"), 0.0, 0, ""
+    with FrameTransport(storage, spill_dir=spill_dir) as transport:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            handle = transport.put_frame(payload) if kind == "frame" else transport.put_records(payload)
+            _, load_s = pool.submit(recv, handle).result()
+            transport.release(handle)
+            elapsed = time.perf_counter() - t0
+            if elapsed < best:
+                best, best_load, size, codec = elapsed, load_s, handle.size, handle.codec
+    return {"total_s": best, "worker_load_s": best_load, "bytes": size, "codec": codec}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = _make_frame(args.rows, args.cols)
+    records = transpose_row_by_row(df)
+    print(f"Frame: {args.rows} rows × {args.cols} cols, {df.memory_usage(deep=True).sum() / 2**20:.1f} MB in memory; "
+          f"records: {len(records)} | pyarrow: {'yes' if arrow_available() else 'no (pickle codec)'}")
+
+    with tempfile.TemporaryDirectory(prefix="bench_transport_") as spill_dir, \
+            ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+        pool.submit(_warm_up).result()  # exclude worker start-up
+        for kind, payload in (("frame", df), ("records", records)):
+            print(f"\n{kind}:")
+            results = {"pickle": _time_pickled(pool, payload, args.repeat)}
+            for storage in ("shm", "file"):
+                results[storage] = _time_transport(pool, payload, args.repeat, storage, spill_dir, kind)
+            base = results["pickle"]["total_s"]
+            for name, r in results.items():
+                extra = f", {r['bytes'] / 2**20:.1f} MB {r['codec']}" if "bytes" in r else ""
+                print(f"  {name:<7} {r['total_s'] * 1000:9.1f} ms total "
+                      f"(worker load {r['worker_load_s'] * 1000:7.1f} ms{extra})  ×{base / r['total_s']:.2f} vs pickle")
+
+if __name__ == "__main__":
+    main()
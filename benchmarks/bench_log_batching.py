@@ -0,0 +1,97 @@
+"""
+Stress test for log/progress delivery to the UI thread.
+
+Simulates a worker emitting N log lines + progress values (like thousands of DV
+queries/downloads) and measures the time the UI thread spends handling them:
+- direct:  one queued signal + QTextEdit.append per line (previous behaviour)
+- batched: SignalBatcher flushing every 100 ms (current WorkerThread behaviour)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_log_batching --lines 20000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QThread, Signal, QEventLoop
+from PySide6.QtWidgets import QApplication, QTextEdit, QProgressBar
+from logic.signal_batcher import SignalBatcher
+
+class _Producer(QThread):
+    log_updated = Signal(str)
+    progress_updated = Signal(int)
+
+    def __init__(self, lines: int, batched: bool, interval: float):
+        super().__init__()
+        self.lines = lines
+        self.batched = batched
+        self.interval = interval
+
+    def run(self):
+        if self.batched:
+            with SignalBatcher(self.log_updated.emit, self.progress_updated.emit, self.interval) as b:
+                for i in range(self.lines):
+                    b.log(f"🔎 DV query: incidents?$filter=ticketnumber eq 'CAS-{i:06d}'")
+                    b.progress(int(i * 100 / self.lines))
+        else:
+            for i in range(self.lines):
+                self.log_updated.emit(f"🔎 DV query: incidents?$filter=ticketnumber eq 'CAS-{i:06d}'")
+                self.progress_updated.emit(int(i * 100 / self.lines))
+
+def _run_case(app: QApplication, lines: int, batched: bool, interval: float) -> dict:
+    txt, bar = QTextEdit(), QProgressBar()
+    ui_time = [0.0]
+    calls = [0]
+
+    def on_log(msg: str):
+        t0 = time.perf_counter()
+        txt.append(msg)
+        ui_time[0] += time.perf_counter() - t0
+        calls[0] += 1
+
+    def on_progress(pct: int):
+        t0 = time.perf_counter()
+        bar.setValue(pct)
+        ui_time[0] += time.perf_counter() - t0
+
+    producer = _Producer(lines, batched, interval)
+    producer.log_updated.connect(on_log)
+    producer.progress_updated.connect(on_progress)
+
+    loop = QEventLoop()
+    producer.finished.connect(loop.quit)
+    wall0 = time.perf_counter()
+    producer.start()
+    loop.exec()
+    app.processEvents()  # drain queued signals still pending
+    wall = time.perf_counter() - wall0
+
+    return {
+        "mode": "batched" if batched else "direct",
+        "ui_thread_s": ui_time[0],
+        "ui_calls": calls[0],
+        "wall_s": wall,
+        "lines_in_widget": txt.document().blockCount(),
+    }
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--interval", type=float, default=0.1)
+    args = ap.parse_args(argv)
+
+    app = QApplication.instance() or QApplication([])
+    for batched in (False, True):
+        r = _run_case(app, args.lines, batched, args.interval)
+        print(f"{r['mode']:>8}: UI-thread {r['ui_thread_s']:.3f}s in {r['ui_calls']} appends "
+              f"| wall {r['wall_s']:.3f}s | lines shown {r['lines_in_widget']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,629 @@
+"""
+Local stand-in for the Dataverse Web API, for offline benchmarks and checks.
+
+Implements the parts of the API this repo uses:
+- GET <entity set>?$select&$filter&$expand with 'eq' / 'or' filters and
+  Microsoft.Dynamics.CRM.In(...), and-ed together, paging ('Prefer: odata.maxpagesize' ->
+  absolute '@odata.nextLink' with $skiptoken);
+- sharepointdocumentlocations (filtered by _regardingobjectid_value) and the
+  <entity>_SharePointDocumentLocations navigation for $expand;
+- GET/PATCH/DELETE <entity set>(<id>), POST Merge (accounts), GET WhoAmI;
+- change tracking: 'Prefer: odata.track-changes' adds '@odata.deltaLink' to
+  the last page; requesting it returns the rows changed since, and
+  '$deletedEntity' entries for deleted ones;
+- POST $batch (multipart/mixed, changesets applied all-or-nothing,
+  'Prefer: odata.continue-on-error');
+- service protection: more than `limit` requests (batch operations count one
+  each) in `window_s` seconds answer 429 with 'Retry-After';
+- fail(status, times, match): the next requests whose URL contains `match`
+  answer `status` (outages in tests).
+
+Latency per request is `latency_ms` + random(0, `jitter_ms`) (+ `batch_op_ms`
+per $batch operation). Authorization headers are accepted but not checked.
+
+    server, base_url = start_mock_dataverse(records=2000, latency_ms=30)
+    configure_client(base_url)  # or configure_client(base_url, monkeypatch=mp) in tests
+    ...
+    server.shutdown()
+
+Standalone (from the repo root):
+    python -m benchmarks.mock_dataverse --port 8765 --profile tight
+"""
+from __future__ import annotations
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+API_PREFIX = "/api/data/v9.2"
+MAX_PAGE_SIZE = 5000
+MOCK_TOKEN = "mock-token"
+
+# entity set -> (logical name, primary id, key column, key format)
+ENTITIES: Dict[str, Tuple[str, str, str, str]] = {
+    "accounts": ("account", "accountid", "accountnumber", "BUS-{:06d}"),
+    "incidents": ("incident", "incidentid", "ticketnumber", "CAS-{:06d}-A1B2C3"),
+    "icps_ecases": ("icps_ecase", "icps_ecaseid", "icps_name", "E-{:06d}"),
+    "icps_inspections": ("icps_inspection", "icps_inspectionid", "icps_name", "INS-{:06d}"),
+    "icps_investigations": ("icps_investigation", "icps_investigationid", "icps_name", "INV-{:06d}"),
+}
+LOCATIONS = "sharepointdocumentlocations"
+
+# latency (ms), jitter (ms), requests allowed per window (0 = unlimited), window (s), Retry-After cap (s)
+PROFILES: Dict[str, Dict[str, float]] = {
+    "none": {"latency_ms": 0, "jitter_ms": 0, "limit": 0, "window_s": 1},
+    "lan": {"latency_ms": 5, "jitter_ms": 2, "limit": 0, "window_s": 1},
+    "vpn": {"latency_ms": 60, "jitter_ms": 30, "limit": 0, "window_s": 1},
+    "dataverse": {"latency_ms": 60, "jitter_ms": 30, "limit": 6000, "window_s": 300},
+    "tight": {"latency_ms": 30, "jitter_ms": 10, "limit": 40, "window_s": 1},
+}
+
+class ODataError(Exception):
+    def __init__(self, status: int, message: str, code: str = "0x80040203") -> None:
+        super().__init__(message)
+        self.status, self.code = status, code
+
+def _error_body(status: int, message: str, code: str = "0x80040203") -> bytes:
+    return json.dumps({"error": {"code": code, "message": message}}).encode("utf-8")
+
+# ---------- OData query parsing (just what the client sends) ----------
+_IN_RE = re.compile(r"Microsoft\.Dynamics\.CRM\.In\(PropertyName='(\w+)',PropertyValues=\[(.*)\]\)$", re.S)
+_EQ_RE = re.compile(r"^(\w+) eq (?:'((?:[^']|'')*)'|([0-9A-Fa-f-]{36}|-?\d+))$")
+_QUOTED_RE = re.compile(r"'((?:[^']|'')*)'")
+_EXPAND_RE = re.compile(r"^(\w+)(?:\(\$select=([\w,]+)(?:;\$filter=(.*))?\))?$", re.S)
+
+def parse_filter(flt: str) -> Tuple[str, List[str]]:
+    """'f eq 'a' or f eq 'b'' / In(...) -> (field, [values]) (one field only, like the client)."""
+    flt = flt.strip()
+    m = _IN_RE.match(flt)
+    if m:
+        return m.group(1), [v.replace("''", "'") for v in _QUOTED_RE.findall(m.group(2))]
+    field, values = None, []
+    for clause in re.split(r"\s+or\s+", flt):
+        m = _EQ_RE.match(clause.strip().strip("()"))
+        if not m or (field and m.group(1) != field):
+            raise ODataError(400, f"Unsupported $filter: {flt[:200]}")
+        field = m.group(1)
+        values.append((m.group(2) or "").replace("''", "'") if m.group(2) is not None else m.group(3))
+    return field, values
+
+def _split_and(flt: str) -> List[str]:
+    """Top-level 'and' operands, outer parentheses removed."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(flt):
+        depth += (ch == "(") - (ch == ")")
+        if depth == 0 and flt[i:i + 5].lower() == " and ":
+            parts.append(flt[start:i])
+            start = i + 5
+    parts.append(flt[start:])
+    out = []
+    for p in parts:
+        p = p.strip()
+        while p.startswith("(") and p.endswith(")") and _split_and(p[1:-1]) == [p[1:-1].strip()] \
+                and p[1:-1].count("(") == p[1:-1].count(")"):
+            p = p[1:-1].strip()
+        out.append(p)
+    return out
+
+def parse_conditions(flt: str) -> List[Tuple[str, List[str]]]:
+    """'<cond> and <cond> ...' -> [(field, [values])], each condition as in parse_filter."""
+    return [parse_filter(p) for p in _split_and(flt.strip())]
+
+def _matches(row: Dict[str, Any], conditions) -> bool:
+    return all(str(row.get(f, "")).casefold() in {v.casefold() for v in values} for f, values in conditions)
+
+def _prefer(headers, name: str) -> str | None:
+    for item in (headers.get("Prefer") or "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key.strip().lower() == name:
+            return value.strip() or "true"
+    return None
+
+class MockDataverse:
+    """In-memory data + request dispatch; thread-safe. Stats are reset with reset_stats()."""
+
+    def __init__(self, records: int = 1000, *, latency_ms: float = 0, jitter_ms: float = 0,
+                 limit: int = 0, window_s: float = 1.0, batch_op_ms: float = 2.0,
+                 page_size: int = MAX_PAGE_SIZE, seed: int = 7) -> None:
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.limit, self.window_s = int(limit), window_s
+        self.batch_op_ms = batch_op_ms
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.base_url = ""
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._window: deque[float] = deque()
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_id: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.locations: List[Dict[str, Any]] = []
+        self.version = 0                                      # change tracking
+        self._changes: List[Tuple[int, str, str, bool]] = []  # (version, entity set, id, deleted)
+        self._faults: List[list] = []                         # [status, times left, URL substring]
+        self._build(records)
+        self.reset_stats()
+
+    def _build(self, n: int) -> None:
+        for entity_set, (logical, id_field, key_field, fmt) in ENTITIES.items():
+            rows = []
+            for i in range(n):
+                key = fmt.format(i)
+                rid = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{entity_set}/{key}"))
+                row = {id_field: rid, key_field: key, "statecode": 0, "statuscode": 1,
+                       "createdon": "2024-01-01T00:00:00Z", "modifiedon": "2024-06-01T00:00:00Z"}
+                if entity_set == "accounts":
+                    row["name"] = f"Business {i}"
+                rows.append(row)
+                if i % 10:  # every 10th record has no document location
+                    self.locations.append({
+                        "sharepointdocumentlocationid": str(uuid.uuid5(uuid.NAMESPACE_URL, f"loc/{rid}")),
+                        "_regardingobjectid_value": rid,
+                        "relativeurl": f"{key}_{rid.replace('-', '').upper()}",
+                        "statecode": 1 if i % 7 == 0 else 0,  # a few inactive locations
+                    })
+            self.tables[entity_set] = rows
+            self.by_id[entity_set] = {r[id_field]: r for r in rows}
+        self.tables[LOCATIONS] = self.locations
+        self.by_id[LOCATIONS] = {r["sharepointdocumentlocationid"]: r for r in self.locations}
+        self._locations_by_regarding: Dict[str, List[Dict[str, Any]]] = {}
+        for loc in self.locations:
+            self._locations_by_regarding.setdefault(loc["_regardingobjectid_value"], []).append(loc)
+
+    # ————— changes (API and benchmarks) —————
+    def _changed(self, entity_set: str, rid: str, deleted: bool = False) -> None:
+        """Call with self._lock held."""
+        self.version += 1
+        self._changes.append((self.version, entity_set, rid, deleted))
+
+    def update(self, entity_set: str, rid: str, **changes: Any) -> None:
+        with self._lock:
+            self.by_id[entity_set][rid].update(changes)
+            self._changed(entity_set, rid)
+
+    def add(self, entity_set: str, key: str, **values: Any) -> str:
+        _, id_field, key_field, _ = ENTITIES[entity_set]
+        rid = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{entity_set}/{key}"))
+        row = {id_field: rid, key_field: key, "statecode": 0, "statuscode": 1, **values}
+        with self._lock:
+            self.tables[entity_set].append(row)
+            self.by_id[entity_set][rid] = row
+            self._changed(entity_set, rid)
+        return rid
+
+    def delete(self, entity_set: str, rid: str) -> None:
+        with self._lock:
+            row = self.by_id[entity_set].pop(rid)
+            self.tables[entity_set].remove(row)
+            self._changed(entity_set, rid, deleted=True)
+
+    # ————— injected failures —————
+    def fail(self, status: int, times: int = 1, match: str = "") -> None:
+        """The next `times` requests whose URL contains `match` answer `status`."""
+        with self._lock:
+            self._faults.append([status, times, match])
+
+    def _fault(self, target: str) -> int | None:
+        with self._lock:
+            for fault in self._faults:
+                if fault[1] > 0 and fault[2] in target:
+                    fault[1] -= 1
+                    return fault[0]
+        return None
+
+    # ————— stats —————
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests = 0           # HTTP requests received
+            self.operations = 0         # requests + $batch operations
+            self.throttled = 0
+            self.merges = 0
+            self.service_ms: List[float] = []
+
+    # ————— service protection —————
+    def _admit(self, cost: int) -> float | None:
+        """None if admitted, else seconds for 'Retry-After'."""
+        if self.limit <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0] <= now - self.window_s:
+                self._window.popleft()
+            if len(self._window) + cost > self.limit:
+                self.throttled += 1
+                oldest = self._window[0] if self._window else now
+                return max(1.0, math.ceil(oldest + self.window_s - now))
+            self._window.extend([now] * cost)
+        return None
+
+    def _sleep(self, ops: int = 0) -> None:
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = (self.latency_ms + extra + self.batch_op_ms * ops) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    # ————— dispatch —————
+    def handle(self, method: str, target: str, headers, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """One HTTP request -> (status, headers, body)."""
+        t0 = time.perf_counter()
+        path = urlsplit(target).path
+        is_batch = method == "POST" and path.rstrip("/").endswith("/$batch")
+        parts = _parse_batch(headers.get("Content-Type", ""), body) if is_batch else None
+        cost = sum(len(p[1]) for p in parts) if parts else 1
+        with self._lock:
+            self.requests += 1
+            self.operations += cost
+        fault = self._fault(target)
+        if fault is not None:
+            return fault, {"Content-Type": "application/json"}, _error_body(fault, "Injected failure.")
+        retry_after = self._admit(cost)
+        if retry_after is not None:
+            self._sleep()
+            return 429, {"Retry-After": str(int(retry_after)), "Content-Type": "application/json"}, _error_body(
+                429, "Number of requests exceeded the limit of requests per window.", "0x80072322")
+        self._sleep(cost if parts else 0)
+        try:
+            if parts is not None:
+                result = self._batch(parts, headers)
+            else:
+                result = self._execute(method, target, headers, body)
+        finally:
+            with self._lock:
+                self.service_ms.append((time.perf_counter() - t0) * 1000)
+        return result
+
+    def _execute(self, method: str, target: str, headers, body: bytes, undo: list | None = None):
+        try:
+            status, data = self._route(method, target, headers, body, undo)
+        except ODataError as e:
+            return e.status, {"Content-Type": "application/json"}, _error_body(e.status, str(e), e.code)
+        if data is None:
+            return status, {}, b""
+        return status, {"Content-Type": "application/json; odata.metadata=minimal"}, json.dumps(data).encode("utf-8")
+
+    def _route(self, method: str, target: str, headers, body: bytes, undo):
+        split = urlsplit(target)
+        path = split.path
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        path = path.strip("/")
+        if path == "WhoAmI" and method == "GET":
+            return 200, {"UserId": "00000000-0000-0000-0000-000000000001"}
+        if path == "Merge" and method == "POST":
+            return self._merge(json.loads(body or b"{}"), undo)
+        m = re.match(r"^(\w+)\(([0-9a-fA-F-]{36})\)$", path)
+        if m:
+            return self._single(method, m.group(1), m.group(2), body, undo)
+        if method == "GET" and path in self.tables:
+            return 200, self._query(path, split.query, headers)
+        raise ODataError(404, f"Resource not found for the segment '{path}'.", "0x80060888")
+
+    def _single(self, method, entity_set, rid, body, undo):
+        rows = self.by_id.get(entity_set)
+        if rows is None:
+            raise ODataError(404, f"Resource not found for the segment '{entity_set}'.", "0x80060888")
+        row = rows.get(rid.lower())
+        if row is None:
+            raise ODataError(404, f"{entity_set} With Id = {rid} Does Not Exist", "0x80040217")
+        if method == "GET":
+            return 200, dict(row)
+        if method == "PATCH":
+            changes = json.loads(body or b"{}")
+            with self._lock:
+                if undo is not None:
+                    undo.append((row, copy.deepcopy(row)))
+                row.update(changes)
+                self._changed(entity_set, row_id(entity_set, row))
+            return 204, None
+        if method == "DELETE":
+            self.delete(entity_set, rid.lower())
+            return 204, None
+        raise ODataError(405, f"Method {method} not supported on {entity_set}({rid})")
+
+    def _merge(self, payload: Dict[str, Any], undo):
+        target = (payload.get("Target") or {}).get("accountid")
+        sub = (payload.get("Subordinate") or {}).get("accountid")
+        accounts = self.by_id["accounts"]
+        if not target or not sub or target == sub:
+            raise ODataError(400, "Merge needs two different accounts.")
+        t_row, s_row = accounts.get(str(target).lower()), accounts.get(str(sub).lower())
+        if t_row is None or s_row is None:
+            raise ODataError(404, f"account With Id = {sub if t_row else target} Does Not Exist", "0x80040217")
+        with self._lock:
+            if s_row.get("statecode") != 0:
+                raise ODataError(400, "The subordinate account is inactive (already merged).", "0x8004021c")
+            if undo is not None:
+                undo.append((s_row, copy.deepcopy(s_row)))
+            s_row.update(statecode=1, statuscode=2, merged=True, _masterid_value=t_row["accountid"])
+            self._changed("accounts", s_row["accountid"])
+            self.merges += 1
+        return 204, None
+
+    def _query(self, entity_set: str, query: str, headers) -> Dict[str, Any]:
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        rows = self.tables[entity_set]
+        tracking = _prefer(headers, "odata.track-changes") is not None or "$deltatoken" in params
+        if tracking and ("$filter" in params or "$orderby" in params):
+            raise ODataError(400, "Change tracking does not support $filter or $orderby.", "0x80048d19")
+        if "$deltatoken" in params:
+            rows = self._delta_rows(entity_set, params["$deltatoken"])
+        if "$filter" in params:
+            conditions = parse_conditions(params["$filter"])
+            field, values = conditions[-1]  # the key condition comes last, like the client sends it
+            wanted = {v.casefold() for v in values}
+            if field == "_regardingobjectid_value" and entity_set == LOCATIONS:
+                rows = [loc for v in wanted for loc in self._locations_by_regarding.get(v, [])]
+            else:
+                rows = [r for r in rows if str(r.get(field, "")).casefold() in wanted]
+            rows = [r for r in rows if _matches(r, conditions[:-1])]
+        select = [c for c in params.get("$select", "").split(",") if c]
+        expand = self._expand(entity_set, params.get("$expand"))
+
+        size = self.page_size
+        asked = _prefer(headers, "odata.maxpagesize")
+        if asked and asked.isdigit():
+            size = max(1, min(size, int(asked)))
+        skip = int(params.get("$skiptoken") or 0)
+        page = rows[skip:skip + size]
+
+        out: Dict[str, Any] = {"@odata.context": f"{self.base_url}/$metadata#{entity_set}"}
+        values = []
+        for r in page:
+            if "reason" in r:  # deleted entity (delta responses)
+                values.append(r)
+                continue
+            rec = {"@odata.etag": 'W/"1"'}
+            rec.update({c: r.get(c) for c in select} if select else r)
+            if expand:
+                nav, cols, conditions = expand
+                id_field = ENTITIES[entity_set][1]
+                locs = [loc for loc in self._locations_by_regarding.get(r[id_field], []) if _matches(loc, conditions)]
+                rec[nav] = [{c: loc.get(c) for c in cols} if cols else dict(loc) for loc in locs]
+            values.append(rec)
+        out["value"] = values
+        base_query = re.sub(r"&?\$skiptoken=\d+", "", query)
+        if skip + size < len(rows):
+            out["@odata.nextLink"] = f"{self.base_url}/{entity_set}?{base_query}&$skiptoken={skip + size}"
+        elif tracking:
+            base_query = re.sub(r"&?\$deltatoken=\d+", "", base_query).lstrip("&")
+            out["@odata.deltaLink"] = f"{self.base_url}/{entity_set}?{base_query}&$deltatoken={self.version}"
+        return out
+
+    def _delta_rows(self, entity_set: str, token: str) -> List[Dict[str, Any]]:
+        if not token.isdigit() or int(token) > self.version:
+            raise ODataError(400, "Invalid or expired delta token.", "0x80044352")
+        since = int(token)
+        with self._lock:
+            latest: Dict[str, bool] = {}
+            for version, es, rid, deleted in self._changes:
+                if version > since and es == entity_set:
+                    latest.pop(rid, None)
+                    latest[rid] = deleted  # last change wins, in change order
+            rows = []
+            for rid, deleted in latest.items():
+                if deleted:
+                    rows.append({"@odata.context": f"{self.base_url}/$metadata#{entity_set}/$deletedEntity",
+                                 "id": rid, "reason": "deleted"})
+                elif rid in self.by_id[entity_set]:
+                    rows.append(self.by_id[entity_set][rid])
+        return rows
+
+    def _expand(self, entity_set: str, clause: str | None):
+        if not clause:
+            return None
+        m = _EXPAND_RE.match(clause.strip())
+        logical = ENTITIES.get(entity_set, ("",))[0]
+        if not m or not logical or m.group(1).lower() not in (f"{logical}_sharepointdocumentlocation",
+                                                              f"{logical}_sharepointdocumentlocations"):
+            raise ODataError(400, f"Could not find a property named '{clause.split('(')[0]}' on type "
+                                  f"'Microsoft.Dynamics.CRM.{logical or entity_set}'.", "0x80060888")
+        return (m.group(1), [c for c in (m.group(2) or "").split(",") if c],
+                parse_conditions(m.group(3)) if m.group(3) else [])
+
+    # ————— $batch —————
+    def _batch(self, parts, headers):
+        continue_on_error = _prefer(headers, "odata.continue-on-error") is not None
+        boundary = f"batchresponse_{uuid.uuid4()}"
+        out: List[str] = []
+        for kind, requests_ in parts:
+            if kind == "single":
+                cid, req = requests_[0]
+                status, h, body = self._execute(*req)
+                out.append(_http_response_part(status, h, body, None))
+                failed = status >= 400
+            else:
+                undo: list = []
+                responses, failed = [], False
+                for cid, req in requests_:
+                    status, h, body = self._execute(*req, undo=undo)
+                    if status >= 400:
+                        failed = True
+                        with self._lock:
+                            for row, old in reversed(undo):  # all or nothing
+                                row.clear()
+                                row.update(old)
+                        out.append(_http_response_part(status, h, body, None))
+                        break
+                    responses.append(_http_response_part(status, h, body, cid))
+                if not failed:
+                    cs = f"changesetresponse_{uuid.uuid4()}"
+                    out.append(f"Content-Type: multipart/mixed; boundary={cs}\r\n\r\n"
+                               + "\r\n".join(f"--{cs}\r\n{r}" for r in responses) + f"\r\n--{cs}--")
+            if failed and not continue_on_error:
+                break
+        body = "\r\n".join(f"--{boundary}\r\n{p}" for p in out) + f"\r\n--{boundary}--\r\n"
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, body.encode("utf-8")
+
+def row_id(entity_set: str, row: Dict[str, Any]) -> str:
+    return row[ENTITIES[entity_set][1]] if entity_set in ENTITIES else row.get("sharepointdocumentlocationid")
+
+def _http_response_part(status: int, headers: Dict[str, str], body: bytes, content_id) -> str:
+    lines = ["Content-Type: application/http", "Content-Transfer-Encoding: binary"]
+    if content_id is not None:
+        lines.append(f"Content-ID: {content_id}")
+    lines += ["", f"HTTP/1.1 {status} {_REASONS.get(status, 'Status')}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return "\r\n".join(lines) + "\r\n\r\n" + body.decode("utf-8")
+
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class _Headers(dict):
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+def _split_mime(text: str, boundary: str) -> List[str]:
+    parts = []
+    for chunk in text.split(f"--{boundary}"):
+        if chunk.startswith("--"):
+            break
+        chunk = chunk.strip("\r\n")
+        if chunk:
+            parts.append(chunk)
+    return parts
+
+def _head_body(text: str) -> Tuple[_Headers, str]:
+    text = text.replace("\r\n", "\n")
+    head, _, rest = text.partition("\n\n")
+    headers = _Headers()
+    for line in head.split("\n"):
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return headers, rest
+
+def _parse_request(text: str):
+    """application/http part -> (Content-ID, (method, target, headers, body))."""
+    mime, rest = _head_body(text)
+    request_line, _, rest = rest.partition("\n")
+    method, target = request_line.split(" ")[:2]
+    headers, body = _head_body(rest) if "\n\n" in rest else (_head_body(rest + "\n\n")[0], "")
+    return mime.get("content-id"), (method.upper(), target, headers, body.strip().encode("utf-8"))
+
+def _parse_batch(content_type: str, body: bytes):
+    """[("single" | "changeset", [(content_id, request), ...]), ...]"""
+    m = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not m:
+        raise ODataError(400, "Missing batch boundary")
+    parts = []
+    for part in _split_mime(body.decode("utf-8"), m.group(1)):
+        mime, inner = _head_body(part)
+        inner_type = mime.get("content-type", "")
+        if inner_type.startswith("multipart/mixed"):
+            cm = re.search(r'boundary="?([^";]+)"?', inner_type)
+            parts.append(("changeset", [_parse_request(p) for p in _split_mime(inner, cm.group(1))]))
+        else:
+            parts.append(("single", [_parse_request(part)]))
+    return parts
+
+# ---------- HTTP server ----------
+def _make_handler(mock: MockDataverse):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Dataverse
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            try:
+                status, headers, payload = mock.handle(self.command, self.path, self.headers, body)
+            except ODataError as e:
+                status, headers, payload = e.status, {"Content-Type": "application/json"}, _error_body(e.status, str(e))
+            except Exception as e:  # a bug in the mock must not hang the client
+                status, headers, payload = 500, {"Content-Type": "application/json"}, _error_body(500, repr(e))
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_mock_dataverse(host: str = "127.0.0.1", port: int = 0, **kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts a MockDataverse(**kwargs) server in a daemon thread.
+    Returns (server, base URL for DATAVERSE_BASE_URI); server.mock is the MockDataverse.
+    """
+    mock = MockDataverse(**kwargs)
+    server = ThreadingHTTPServer((host, port), _make_handler(mock))
+    server.daemon_threads = True
+    base_uri = f"http://{host}:{server.server_address[1]}"
+    mock.base_url = base_uri + API_PREFIX
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, name="MockDataverse", daemon=True).start()
+    return server, base_uri
+
+def client_environment(base_uri: str, *, concurrency: int = 4, client_rps: float = 0) -> Dict[str, str]:
+    """Environment variables pointing the dataverse_apis client at a mock at `base_uri`."""
+    return {
+        "DATAVERSE_BASE_URI": base_uri,
+        "API_VERSION": API_PREFIX.rsplit("v", 1)[1],
+        "TENANT_ID": "00000000-0000-0000-0000-000000000000",
+        "CLIENT_ID": "11111111-1111-1111-1111-111111111111",
+        "DATAVERSE_CONCURRENCY": str(concurrency),
+        "DATAVERSE_POOL_SIZE": str(max(10, concurrency)),
+        "DATAVERSE_MAX_RPS": str(client_rps),
+        "LOCATION_QUERY": "sharepointdocumentlocations?$select=relativeurl&$filter=_regardingobjectid_value eq",
+    }
+
+def configure_client(base_uri: str, *, concurrency: int = 4, client_rps: float = 0, monkeypatch=None) -> None:
+    """
+    Points the dataverse_apis client at a mock at `base_uri` (environment variables
+    win over .env), skips MSAL, and drops the client singletons (auth settings,
+    rate limiter, GET coalescer, Session) so they are rebuilt from these settings.
+
+    With a pytest `monkeypatch` every change is undone at its teardown; without
+    one (benchmarks) the changes last for the process.
+    """
+    from dataverse_apis.core.auth import msal_auth
+    from dataverse_apis.core.services import dataverse_client, http_session, request_coalescing, throttling
+
+    setenv = monkeypatch.setenv if monkeypatch is not None else os.environ.__setitem__
+    patch = monkeypatch.setattr if monkeypatch is not None else setattr
+    for key, value in client_environment(base_uri, concurrency=concurrency, client_rps=client_rps).items():
+        setenv(key, value)
+    patch(dataverse_client, "get_access_token_with_msal_default", lambda: MOCK_TOKEN)
+    for module, name in ((msal_auth, "_settings"), (throttling, "_limiter"),
+                         (request_coalescing, "_coalescer"), (http_session, "_session")):
+        patch(module, name, None)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--records", type=int, default=1000, help="Records per entity.")
+    parser.add_argument("--profile", choices=PROFILES, default="lan")
+    parser.add_argument("--latency-ms", type=float, help="Overrides the profile.")
+    parser.add_argument("--limit", type=int, help="Requests per window before 429 (0 = unlimited).")
+    parser.add_argument("--window", type=float, help="Throttling window in seconds.")
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    if args.latency_ms is not None:
+        profile["latency_ms"] = args.latency_ms
+    if args.limit is not None:
+        profile["limit"] = args.limit
+    if args.window is not None:
+        profile["window_s"] = args.window
+    server, base_uri = start_mock_dataverse(port=args.port, records=args.records, **profile)
+    print(f"Mock Dataverse on {base_uri}  (DATAVERSE_BASE_URI={base_uri}, API_VERSION=9.2)  profile={profile}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
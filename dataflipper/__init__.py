@@ -0,0 +1 @@
+"""Headless entry point: python -m dataflipper (see dataflipper.cli)."""
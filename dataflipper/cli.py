@@ -0,0 +1,268 @@
+"""
+Headless command-line runner for the Data Flipper pipelines (no Qt).
+
+    python -m dataflipper run FOLDER [FOLDER ...]
+        [--export-mode separate|combined|per_excel]
+        [--process-type transpose_only|transpose_and_docs|docs_only]
+        [--output-root output] [--jobs N] [--resume] [--bypass-cache] [--memory-budget-mb MB]
+        [--summary PATH] [--json] [--quiet]
+
+    python -m dataflipper watch FOLDER
+        [--export-mode ...] [--process-type ...] [--output-root output]
+        [--debounce SECONDS] [--poll SECONDS] [--state PATH] [--bypass-cache]
+
+Each folder runs through logic.pipeline.ProcessingPipeline in its own process
+(up to --jobs at a time) and gets its own output folder with a summary.json.
+An aggregate summary is written to --summary (default <output-root>/batch_summary.json).
+
+`watch` keeps running and processes only the workbooks that are new or changed
+since they were last processed (see logic.folder_watcher); stop it with Ctrl+C.
+
+Exit codes:
+    0  every folder processed without errors
+    1  at least one folder finished with errors
+    2  invalid arguments (e.g. folder not found)
+    3  at least one folder crashed (pipeline or worker process died)
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from logic.folder_watcher import FolderWatcher, WatchState, DEFAULT_DEBOUNCE_S, DEFAULT_POLL_S
+from logic.pipeline import ProcessingPipeline, EXPORT_MODES, PROCESS_TYPES, RUN_REPORT_NAME
+from dataverse_apis.core.logging.logging_conf import get_logger, setup_logging
+from dataverse_apis.core.logging.profiler import run_profiled
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_CRASH = 3
+
+SUMMARY_NAME = "summary.json"
+BATCH_SUMMARY_NAME = "batch_summary.json"
+WATCH_STATE_NAME = "watch_state.json"
+
+log = get_logger("dataflipper.cli")
+
+def _output_dirs(folders: List[str], output_root: str) -> List[str]:
+    """One folder -> output_root itself; several -> output_root/<folder name> (deduplicated)."""
+    if len(folders) == 1:
+        return [output_root]
+    used: Dict[str, int] = {}
+    out = []
+    for folder in folders:
+        name = Path(folder).resolve().name or "root"
+        n = used.get(name.lower(), 0) + 1
+        used[name.lower()] = n
+        out.append(os.path.join(output_root, name if n == 1 else f"{name}_{n}"))
+    return out
+
+def run_folder(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one folder (in a worker process) and returns its summary dict."""
+    setup_logging(app_name="dataflipper_cli")
+    name = Path(job["folder"]).name
+    quiet = job.get("quiet", False)
+
+    def _log(msg: str) -> None:
+        if not quiet:
+            log.info(f"[{name}] {msg}")
+
+    started = datetime.now()
+    t0 = time.perf_counter()
+    summary: Dict[str, Any] = {
+        "folder": os.path.abspath(job["folder"]),
+        "output_dir": os.path.abspath(job["output_dir"]),
+        "export_mode": job["export_mode"],
+        "process_type": job["process_type"],
+        "started": started.isoformat(timespec="seconds"),
+    }
+    try:
+        pipeline = ProcessingPipeline(
+            job["folder"],
+            job["export_mode"],
+            job["process_type"],
+            output_dir=job["output_dir"],
+            resume=job.get("resume", False),
+            bypass_cache=job.get("bypass_cache", False),
+            memory_budget_mb=job.get("memory_budget_mb"),
+            log=_log,
+        )
+        ok = run_profiled(pipeline.run, name=f"cli_{name}")
+        summary.update(ok=ok, errors=pipeline.errors, exit_code=EXIT_OK if ok else EXIT_ERRORS,
+                       run_report=os.path.abspath(os.path.join(job["output_dir"], RUN_REPORT_NAME)))
+    except Exception as e:  # the pipeline catches its own errors; this is a safety net
+        log.exception(f"[{name}] crashed")
+        summary.update(ok=False, errors=[f"❌ Crash: {e}"], exit_code=EXIT_CRASH)
+
+    summary["finished"] = datetime.now().isoformat(timespec="seconds")
+    summary["duration_s"] = round(time.perf_counter() - t0, 3)
+    _write_json(os.path.join(job["output_dir"], SUMMARY_NAME), summary)
+    return summary
+
+def _write_json(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, indent=2)
+
+def _crash_summary(job: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+    return {
+        "folder": os.path.abspath(job["folder"]),
+        "output_dir": os.path.abspath(job["output_dir"]),
+        "export_mode": job["export_mode"],
+        "process_type": job["process_type"],
+        "ok": False,
+        "errors": [f"❌ Worker process failed: {exc}"],
+        "exit_code": EXIT_CRASH,
+    }
+
+def run_batch(jobs: List[Dict[str, Any]], max_workers: int) -> List[Dict[str, Any]]:
+    """Runs every job, in parallel processes when max_workers > 1. Keeps input order."""
+    if max_workers <= 1 or len(jobs) == 1:
+        return [run_folder(job) for job in jobs]
+
+    results: List[Dict[str, Any] | None] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_folder, job): i for i, job in enumerate(jobs)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:  # e.g. BrokenProcessPool
+                results[i] = _crash_summary(jobs[i], e)
+    return [r for r in results if r is not None]
+
+def batch_exit_code(summaries: List[Dict[str, Any]]) -> int:
+    codes = [s.get("exit_code", EXIT_CRASH) for s in summaries]
+    if EXIT_CRASH in codes:
+        return EXIT_CRASH
+    if EXIT_ERRORS in codes:
+        return EXIT_ERRORS
+    return EXIT_OK
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m dataflipper",
+                                     description="Data Flipper headless batch runner.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Process one or more folders of Excel files.")
+    run.add_argument("folders", nargs="+", help="Folder(s) containing the Excel files.")
+    run.add_argument("--export-mode", choices=EXPORT_MODES, default="separate")
+    run.add_argument("--process-type", choices=PROCESS_TYPES, default="transpose_only")
+    run.add_argument("--output-root", default="output",
+                     help="Output folder (one sub-folder per input folder when several are given).")
+    run.add_argument("--jobs", "-j", type=int, default=1, help="Folders processed in parallel (processes).")
+    run.add_argument("--resume", action="store_true", help="Skip units completed by the last run.")
+    run.add_argument("--bypass-cache", action="store_true",
+                     help="Query Dataverse for every ticket/location instead of the lookup cache.")
+    run.add_argument("--memory-budget-mb", type=int,
+                     help="RAM for combined-mode data before spilling to disk (default MEMORY_BUDGET_MB or 512).")
+    run.add_argument("--summary", help=f"Aggregate JSON summary path (default <output-root>/{BATCH_SUMMARY_NAME}).")
+    run.add_argument("--json", action="store_true", help="Print the aggregate summary as JSON on stdout.")
+    run.add_argument("--quiet", "-q", action="store_true", help="Only log the per-folder results.")
+
+    watch = sub.add_parser("watch", help="Watch a folder and process new/changed Excel files.")
+    watch.add_argument("folder", help="Folder to watch.")
+    watch.add_argument("--export-mode", choices=EXPORT_MODES, default="separate")
+    watch.add_argument("--process-type", choices=PROCESS_TYPES, default="transpose_and_docs")
+    watch.add_argument("--output-root", default="output")
+    watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE_S,
+                       help="Seconds a file must stay unchanged before it is processed.")
+    watch.add_argument("--poll", type=float, default=DEFAULT_POLL_S, help="Seconds between checks.")
+    watch.add_argument("--state", help=f"Processed-files state (default <output-root>/{WATCH_STATE_NAME}).")
+    watch.add_argument("--bypass-cache", action="store_true",
+                       help="Query Dataverse for every ticket/location instead of the lookup cache.")
+    watch.add_argument("--memory-budget-mb", type=int,
+                       help="RAM for combined-mode data before spilling to disk (default MEMORY_BUDGET_MB or 512).")
+    return parser
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    missing = [f for f in args.folders if not os.path.isdir(f)]
+    if missing:
+        for f in missing:
+            print(f"❌ Folder not found: {f}", file=sys.stderr)
+        return EXIT_USAGE
+
+    out_dirs = _output_dirs(args.folders, args.output_root)
+    jobs = [{
+        "folder": folder,
+        "output_dir": out_dir,
+        "export_mode": args.export_mode,
+        "process_type": args.process_type,
+        "resume": args.resume,
+        "bypass_cache": args.bypass_cache,
+        "memory_budget_mb": args.memory_budget_mb,
+        "quiet": args.quiet,
+    } for folder, out_dir in zip(args.folders, out_dirs)]
+
+    t0 = time.perf_counter()
+    summaries = run_batch(jobs, max(1, args.jobs))
+    code = batch_exit_code(summaries)
+
+    batch = {
+        "exit_code": code,
+        "folders": len(summaries),
+        "ok": sum(1 for s in summaries if s.get("ok")),
+        "failed": sum(1 for s in summaries if not s.get("ok")),
+        "duration_s": round(time.perf_counter() - t0, 3),
+        "results": summaries,
+    }
+    _write_json(args.summary or os.path.join(args.output_root, BATCH_SUMMARY_NAME), batch)
+
+    if args.json:
+        print(json.dumps(batch, ensure_ascii=False, indent=2))
+    else:
+        for s in summaries:
+            status = "✅" if s.get("ok") else "❌"
+            print(f"{status} {s['folder']} → {s['output_dir']} ({len(s.get('errors', []))} error(s))")
+    return code
+
+def _cmd_watch(args: argparse.Namespace) -> int:
+    if not os.path.isdir(args.folder):
+        print(f"❌ Folder not found: {args.folder}", file=sys.stderr)
+        return EXIT_USAGE
+
+    def _log(msg: str) -> None:
+        log.info(msg)
+
+    def _on_batch(filenames: List[str]) -> bool:
+        output_dir = args.output_root
+        if args.export_mode == "combined":  # a combined file per batch instead of overwriting the last one
+            output_dir = os.path.join(args.output_root, datetime.now().strftime("batch_%Y%m%d_%H%M%S"))
+        pipeline = ProcessingPipeline(
+            args.folder,
+            args.export_mode,
+            args.process_type,
+            output_dir=output_dir,
+            bypass_cache=args.bypass_cache,
+            memory_budget_mb=args.memory_budget_mb,
+            filenames=filenames,
+            log=_log,
+        )
+        ok = run_profiled(pipeline.run, name="watch")
+        _log(f"{'✅' if ok else '❌'} Batch finished ({len(pipeline.errors)} error(s)) → {output_dir}")
+        return ok
+
+    state = WatchState(args.state or os.path.join(args.output_root, WATCH_STATE_NAME))
+    watcher = FolderWatcher(args.folder, state, _on_batch,
+                            debounce_s=max(0.0, args.debounce), poll_s=max(0.2, args.poll), log=_log)
+    try:
+        watcher.run_forever()
+    except KeyboardInterrupt:
+        _log("🛑 Watch stopped.")
+    return EXIT_OK
+
+def main(argv: List[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    setup_logging(app_name="dataflipper_cli")
+    if args.command == "run":
+        return _cmd_run(args)
+    if args.command == "watch":
+        return _cmd_watch(args)
+    return EXIT_USAGE
@@ -1,41 +1,31 @@
-import os
+from __future__ import annotations
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 # import sys
 # from pathlib import Path
 # from dotenv import load_dotenv, set_key
 from ..services.env_loader import get_env_variable_value
-from msal import PublicClientApplication, TokenCache # msal Microsoft Authentication Library
 from ..logging.logging_conf import get_logger
 
 log = get_logger(__name__)
 
-# ---------- Read environment variables ----------
-# ICPS URL
-api_url = get_env_variable_value("DATAVERSE_BASE_URI")
-api_version = get_env_variable_value("API_VERSION")
-webapi_url = f"{api_url}/api/data/v{api_version}"
-# OPS Azure Tenant ID
-tenant_id = get_env_variable_value("TENANT_ID")
-# Microsoft public app [Microsoft Power Platform]
-client_id = get_env_variable_value("CLIENT_ID")
-# optional for prefilling
-username = get_env_variable_value("USERNAME")
-
-# if not username:
-#     email = get_current_user_email(default_domain="ontario.ca")
-#     if email:
-#         os.environ["USERNAME"] = email
-#         try:
-#             set_key(ENV_FILE, "USERNAME", email)
-#         except Exception:
-#             pass
-
-# authority = f"https://login.microsoftonline.com/{tenant_id}"
-# scopes = [
-#     f"{api_url}/user_impersonation" # Dataverse
-# ]
-
-# Allow explicit AUTHORITY or build from TENANT_ID
-authority = os.getenv("AUTHORITY") or (f"https://login.microsoftonline.com/{tenant_id}" if tenant_id else None)
+# ---------- Settings (read lazily, on the first token request) ----------
+# Nothing here runs at import time: transpose-only runs and app startup never
+# read auth settings, import msal or contact login.microsoftonline.com.
+
+@dataclass(frozen=True)
+class AuthSettings:
+    api_url: str
+    api_version: str | None
+    webapi_url: str
+    tenant_id: str | None
+    client_id: str
+    username: str | None
+    authority: str
+    scopes: list
 
 # Validate early to avoid https://login.microsoftonline.com/None
 def _fail(msg: str) -> None:
@@ -50,91 +40,231 @@ def _fail(msg: str) -> None:
         "# Optional: AUTHORITY=https://login.microsoftonline.com/<tenant-guid>\n"
     )
 
-if not authority or "None" in str(authority):
-    _fail(f"Invalid/missing AUTHORITY (TENANT_ID={tenant_id!r}, AUTHORITY={authority!r})")
-if not client_id:
-    _fail("Missing CLIENT_ID")
-if not api_url:
-    _fail("Missing DATAVERSE_BASE_URI")
+_init_lock = threading.Lock()
+_settings: AuthSettings | None = None
+_app = None
+
+def get_auth_settings() -> AuthSettings:
+    """Reads and validates the auth settings from .env/environment (once)."""
+    global _settings
+    if _settings is not None:
+        return _settings
+    with _init_lock:
+        if _settings is None:
+            # ICPS URL
+            api_url = get_env_variable_value("DATAVERSE_BASE_URI")
+            api_version = get_env_variable_value("API_VERSION")
+            # OPS Azure Tenant ID
+            tenant_id = get_env_variable_value("TENANT_ID")
+            # Microsoft public app [Microsoft Power Platform]
+            client_id = get_env_variable_value("CLIENT_ID")
+            # optional for prefilling
+            username = get_env_variable_value("USERNAME")
+
+            # Allow explicit AUTHORITY or build from TENANT_ID
+            authority = get_env_variable_value("AUTHORITY") or (f"https://login.microsoftonline.com/{tenant_id}" if tenant_id else None)
 
-webapi_url = f"{api_url}/api/data/v{api_version}"
-scopes = [f"{api_url}/user_impersonation"]
+            if not authority or "None" in str(authority):
+                _fail(f"Invalid/missing AUTHORITY (TENANT_ID={tenant_id!r}, AUTHORITY={authority!r})")
+            if not client_id:
+                _fail("Missing CLIENT_ID")
+            if not api_url:
+                _fail("Missing DATAVERSE_BASE_URI")
+
+            _settings = AuthSettings(
+                api_url=api_url,
+                api_version=api_version,
+                webapi_url=f"{api_url}/api/data/v{api_version}",
+                tenant_id=tenant_id,
+                client_id=client_id,
+                username=username,
+                authority=authority,
+                scopes=[f"{api_url}/user_impersonation"],
+            )
+    return _settings
 
 # ---------- MSAL app & token cache ----------
-token_cache = TokenCache()
-app = PublicClientApplication(
-    client_id,
-    authority=authority,
-    token_cache=token_cache
-)
+def get_msal_app():
+    """The PublicClientApplication (built on first use; MSAL may run authority discovery here)."""
+    global _app
+    if _app is not None:
+        return _app
+    settings = get_auth_settings()
+    with _init_lock:
+        if _app is None:
+            from msal import PublicClientApplication  # msal Microsoft Authentication Library
+            from .token_cache import PersistentTokenCache, default_cache_path
+
+            # persisted (DPAPI-encrypted) so a restart reuses the refresh token instead of a browser login
+            token_cache = PersistentTokenCache(default_cache_path())
+            atexit.register(token_cache.save)
+            _app = PublicClientApplication(
+                settings.client_id,
+                authority=settings.authority,
+                token_cache=token_cache
+            )
+    return _app
 
-# Global variable to save the current token
-_cached_token = None
+EXPIRY_MARGIN_S = 120   # a token this close to expiry is never handed out
+REFRESH_AHEAD_S = 600   # inside this window a silent refresh runs in the background
+RETRY_REFRESH_S = 60    # wait between failed background refreshes
 
 def dump_msal_config():
+    settings = get_auth_settings()
     log.info("Configuration MSAL Auth:")
-    log.info(f"API URL: {api_url}  Version: {api_version}")
-    log.info(f"username: {username}")
+    log.info(f"API URL: {settings.api_url}  Version: {settings.api_version}")
+    log.info(f"username: {settings.username}")
     # log.info(f"client id: {client_id}")
     # log.info(f"Authority: {authority}  Tenant id: {tenant_id}  scopes: {scopes} ")
     # log.info(f"WebAPI URL: {webapi_url}")
 
-def get_access_token_with_username():    
-    dump_msal_config() # just for debugging purposes
-    global _cached_token
-    
-    # If there is already a valid token in the global cache, we return it.
-    if _cached_token and "access_token" in _cached_token:
-        return _cached_token["access_token"]
-    
-    accounts = app.get_accounts(username=username)
-    if accounts:
-        result = app.acquire_token_silent(scopes, account=accounts[0])
+class TokenProvider:
+    """
+    Thread-safe access token holder for one account selection.
+
+    - get_token() returns the in-memory token while it is valid for more than
+      EXPIRY_MARGIN_S; inside REFRESH_AHEAD_S it starts one background silent
+      refresh and keeps returning the current token meanwhile.
+    - Expired/missing token: silent acquisition (refresh token from the persistent
+      cache), falling back to a single interactive login shared by all threads;
+      the browser flow runs outside the lock, waiting threads block on its Future.
+    - invalidate() drops the token (e.g. after a 401) so the next call refreshes.
+    """
+
+    def __init__(self, msal_app, scopes: list[str],
+                 login_hint: str | None = None) -> None:
+        self.app = msal_app
+        self.scopes = scopes
+        self.login_hint = login_hint
+        self._lock = threading.Lock()
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._force_refresh = False           # set by invalidate(): don't reuse MSAL's cached token
+        self._flag_lock = threading.Lock()
+        self._refreshing = False
+        self._next_background_try = 0.0
+        self._login: Future | None = None     # interactive login in progress
+
+    def _remaining(self) -> float:
+        return self._expires_at - time.time()
+
+    def get_token(self) -> str:
+        token, remaining = self._token, self._remaining()
+        if token and remaining > EXPIRY_MARGIN_S:
+            if remaining < REFRESH_AHEAD_S:
+                self._refresh_in_background()
+            return token
+        with self._lock:
+            if self._token and self._remaining() > EXPIRY_MARGIN_S:  # refreshed by another thread
+                return self._token
+            login, leader = self._login, False
+            if login is None:
+                force = self._force_refresh or self._token is not None  # near expiry: get a fresh one
+                result = self._acquire_silent(force_refresh=force)
+                if result:
+                    return self._store(result)
+                login, leader = Future(), True
+                self._login = login
+        if leader:
+            self._interactive_login(login)
+        return login.result()  # the login's token, or its error
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+            self._force_refresh = True
+
+    # ————— acquisition —————
+    def _account(self):
+        accounts = self.app.get_accounts(username=self.login_hint) if self.login_hint else self.app.get_accounts()
+        if accounts:
+            log.debug(f"Found {len(accounts)} cached account(s); using {accounts[0].get('username')}")
+        return accounts[0] if accounts else None
+
+    def _acquire_silent(self, force_refresh: bool = False) -> dict | None:
+        account = self._account()
+        if account is None:
+            return None
+        result = self.app.acquire_token_silent(self.scopes, account=account, force_refresh=force_refresh)
         if result and "access_token" in result:
-            return result["access_token"]
-
-    print("Opening browser for interactive login...")
-    log.info("Opening browser for interactive login...")
-    
-    result = app.acquire_token_interactive(
-        scopes=scopes,
-        login_hint=username
-    )
-    if "access_token" in result:
-        return result["access_token"]
-    else:
-        raise Exception(f"Error getting token: {result.get('error_description')}")
-    
+            return result
+        if result:
+            log.warning(f"Silent token refresh failed: {result.get('error_description') or result.get('error')}")
+        return None
+
+    def _interactive_login(self, login: Future) -> None:
+        """Runs the browser flow without holding the lock and resolves `login` for every waiting thread."""
+        try:
+            result = self._acquire_interactive()
+            with self._lock:
+                self._login = None
+                login.set_result(self._store(result))
+        except Exception as e:
+            with self._lock:
+                self._login = None
+            login.set_exception(e)
+
+    def _acquire_interactive(self) -> dict:
+        log.info("There is no active session. A browser will open for you to log in.")
+        kwargs = {"login_hint": self.login_hint} if self.login_hint else {}
+        result = self.app.acquire_token_interactive(scopes=self.scopes, **kwargs)
+        if "access_token" not in result:
+            raise Exception(f"Error getting token: {result.get('error_description')}")
+        return result
+
+    def _store(self, result: dict) -> str:
+        self._token = result["access_token"]
+        self._expires_at = time.time() + int(result.get("expires_in") or 3600)
+        self._force_refresh = False
+        save = getattr(self.app.token_cache, "save", None)
+        if save:
+            save()
+        log.info(f"Access token acquired (valid for {self._remaining() / 60:.0f} min)")
+        return self._token
+
+    def _refresh_in_background(self) -> None:
+        with self._flag_lock:
+            if self._refreshing or time.time() < self._next_background_try:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="TokenRefresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            result = self._acquire_silent(force_refresh=True)
+            with self._lock:
+                if result:
+                    self._store(result)
+                else:
+                    self._next_background_try = time.time() + RETRY_REFRESH_S
+        except Exception as e:
+            log.warning(f"Background token refresh failed: {e}")
+            self._next_background_try = time.time() + RETRY_REFRESH_S
+        finally:
+            self._refreshing = False
+
+_providers: dict[str | None, TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+def get_token_provider(login_hint: str | None = None) -> TokenProvider:
+    """Shared TokenProvider per login hint (None = first cached account)."""
+    with _providers_lock:
+        provider = _providers.get(login_hint)
+        if provider is None:
+            dump_msal_config()
+            provider = _providers[login_hint] = TokenProvider(get_msal_app(), get_auth_settings().scopes, login_hint)
+        return provider
+
+def get_access_token_with_username():
+    return get_token_provider(get_auth_settings().username).get_token()
+
 def get_access_token_with_msal_default():
-    dump_msal_config() # just for debugging purposes
-    global _cached_token
-    
-    log.info("Getting access token with MSAL default method...")
-    
-    # If there is already a valid token in the global cache, we return it.
-    if _cached_token and "access_token" in _cached_token:
-        return _cached_token["access_token"]
-    
-    # 1. Search for cached accounts
-    accounts = app.get_accounts()
-    if accounts:
-        print("Cached Accounts:")
-        log.info(f"Found {len(accounts)} cached accounts.")
-        for idx, acc in enumerate(accounts):
-            print(f"{idx + 1}. {acc['username']}")
-        chosen = accounts[0]  # By default, the first
-        print(f"Using account: {chosen['username']}")
-        result = app.acquire_token_silent(scopes, account=chosen)
-        if result and "access_token" in result:
-            _cached_token = result
-            return result["access_token"]
-
-    # 2. No valid token, open browser
-    print("There is no active session. A browser will open for you to log in.")
-    log.info("There is no active session. A browser will open for you to log in.")
-    result = app.acquire_token_interactive(scopes=scopes)
-    if "access_token" in result:
-        _cached_token = result
-        return result["access_token"]
-    else:
-        raise Exception(f"Error getting token: {result.get('error_description')}")
\ No newline at end of file
+    return get_token_provider(None).get_token()
+
+def invalidate_access_token():
+    """Forgets the in-memory tokens (e.g. after a 401); the next call refreshes silently."""
+    with _providers_lock:
+        providers = list(_providers.values())
+    for provider in providers:
+        provider.invalidate()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import os
+import sys
+import threading
+from pathlib import Path
+
+from msal import SerializableTokenCache
+
+from ..logging.logging_conf import get_logger
+from ..services.env_loader import get_env_variable_value
+from ..services.runtime_paths import user_data_dir
+
+log = get_logger(__name__)
+
+CACHE_FILE_NAME = "msal_token_cache.bin"
+CACHE_ENV = "MSAL_TOKEN_CACHE"  # path of the cache file, or "off" for a memory-only cache
+_ENTROPY = b"DataFlipper.msal.token-cache.v1"
+
+# ---------- Windows DPAPI (encrypts for the current Windows user) ----------
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _DataBlob(ctypes.Structure):
+        _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_char))]
+
+    _CRYPTPROTECT_UI_FORBIDDEN = 0x01
+
+    def _blob(data: bytes):
+        buf = ctypes.create_string_buffer(data, len(data))
+        return _DataBlob(len(data), ctypes.cast(buf, ctypes.POINTER(ctypes.c_char))), buf
+
+    def _dpapi(data: bytes, protect: bool) -> bytes:
+        crypt32, kernel32 = ctypes.windll.crypt32, ctypes.windll.kernel32
+        data_in, _keep1 = _blob(data)
+        entropy, _keep2 = _blob(_ENTROPY)
+        data_out = _DataBlob()
+        if protect:
+            ok = crypt32.CryptProtectData(ctypes.byref(data_in), "DataFlipper MSAL cache", ctypes.byref(entropy),
+                                          None, None, _CRYPTPROTECT_UI_FORBIDDEN, ctypes.byref(data_out))
+        else:
+            ok = crypt32.CryptUnprotectData(ctypes.byref(data_in), None, ctypes.byref(entropy),
+                                            None, None, _CRYPTPROTECT_UI_FORBIDDEN, ctypes.byref(data_out))
+        if not ok:
+            raise ctypes.WinError()
+        try:
+            return ctypes.string_at(data_out.pbData, data_out.cbData)
+        finally:
+            kernel32.LocalFree(data_out.pbData)
+
+    def _encrypt(data: bytes) -> bytes:
+        return _dpapi(data, protect=True)
+
+    def _decrypt(data: bytes) -> bytes:
+        return _dpapi(data, protect=False)
+
+    ENCRYPTED = True
+else:  # no DPAPI: plain file readable only by the current user (0600)
+    def _encrypt(data: bytes) -> bytes:
+        return data
+
+    def _decrypt(data: bytes) -> bytes:
+        return data
+
+    ENCRYPTED = False
+
+def default_cache_path() -> Path | None:
+    """MSAL_TOKEN_CACHE (path or 'off'); default %LOCALAPPDATA%\\DataFlipper\\msal_token_cache.bin."""
+    value = (get_env_variable_value(CACHE_ENV, "") or "").strip()
+    if value.lower() in ("off", "0", "false", "none"):
+        return None
+    return Path(value) if value else user_data_dir() / CACHE_FILE_NAME
+
+class PersistentTokenCache(SerializableTokenCache):
+    """
+    MSAL SerializableTokenCache stored on disk (DPAPI-encrypted on Windows), so the
+    refresh token survives app restarts and no browser login is needed on startup.
+    save() only writes when MSAL reports a change; a memory-only cache when path is None.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        super().__init__()
+        self.path = path
+        self._io_lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            self.deserialize(_decrypt(self.path.read_bytes()).decode("utf-8"))
+            log.info(f"Token cache loaded ({'encrypted' if ENCRYPTED else 'user-only file'}): {self.path}")
+        except Exception as e:  # corrupt, or encrypted by another Windows user
+            log.warning(f"Ignoring unreadable token cache {self.path}: {e}")
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def save(self) -> None:
+        if self.path is None or not self.has_state_changed:
+            return
+        with self._io_lock:
+            try:
+                data = _encrypt(self.serialize().encode("utf-8"))
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, self.path)
+                self.has_state_changed = False
+            except Exception as e:
+                log.warning(f"Could not save the token cache to {self.path}: {e}")
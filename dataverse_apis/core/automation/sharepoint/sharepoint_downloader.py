@@ -7,6 +7,7 @@ import sys
 from shutil import which
 from ...services.runtime_paths import resolve_runtime_path
 from ...logging.logging_conf import get_logger
+from ...logging.run_report import timed
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
@@ -44,6 +45,10 @@ def _get_writable_base_dir() -> Path:
             return Path(os.getenv("LOCALAPPDATA", str(Path.home()))) / APP_NAME
     return Path.cwd()
 
+def ticket_download_dir(folder_name: str) -> Path:
+    """Final folder for a ticket's documents: <writable base>/downloads/<folder_name>."""
+    return (_get_writable_base_dir() / "downloads" / folder_name).resolve()
+
 def _resolve_driver(exe_name: str) -> str:
     """
     Returns the path to the driver:
@@ -246,11 +251,13 @@ def download_from_sharepoint(url, folder_name):
     # Temp path for downloading (shared for all iterations)
     # base_download_path = os.path.join(current_dir, "downloads", "temp")
     run_base = _get_writable_base_dir()
-    base_download_path = str((run_base / "downloads" / "temp").resolve())
+    # one temp folder per process: parallel CLI runs must not clean each other's downloads
+    base_download_path = str((run_base / "downloads" / "temp" / str(os.getpid())).resolve())
     os.makedirs(base_download_path, exist_ok=True)
 
     # Setup WebDriver
-    driver = setup_driver(base_download_path)
+    with timed("browser_start", ticket=folder_name):
+        driver = setup_driver(base_download_path)
 
     # (Optional but recommended in modern headless Chrome/Edge)
     # Allow headless downloads:
@@ -262,8 +269,9 @@ def download_from_sharepoint(url, folder_name):
     except Exception:
         pass
 
-    driver.get(url)
-    time.sleep(5)
+    with timed("page_load", ticket=folder_name, url=url):
+        driver.get(url)
+        time.sleep(5)
 
     log.info(f"{folder_name} - Accessing SharePoint URL: {url}")
 
@@ -291,19 +299,21 @@ def download_from_sharepoint(url, folder_name):
 
     # Wait indefinitely until the ZIP is complete
     try:
-        downloaded_file = wait_for_download(base_download_path, stable_for=8.0, poll=1.0)
+        with timed("download_wait", ticket=folder_name, url=url):
+            downloaded_file = wait_for_download(base_download_path, stable_for=8.0, poll=1.0)
 
         if downloaded_file:
             # Final folder and destination zip
             # final_folder = os.path.join(current_dir, "downloads", folder_name)
-            final_folder = str((run_base / "downloads" / folder_name).resolve())
+            final_folder = str(ticket_download_dir(folder_name))
             os.makedirs(final_folder, exist_ok=True)
 
             desired_path = os.path.join(final_folder, "Related Documents.zip")
 
             if os.path.exists(desired_path):
                 # Zip already exists -> merge contents and delete the new one
-                summary = merge_zip_into_existing(desired_path, downloaded_file)
+                with timed("zip_merge", ticket=folder_name):
+                    summary = merge_zip_into_existing(desired_path, downloaded_file)
                 msg = (f"Merged into existing ZIP: {desired_path} | "
                     f"Added: {summary['added']} | Skipped duplicates: {summary['skipped']}")
                 print(msg)
@@ -330,8 +340,7 @@ def extract_related_zip(folder_name: str, remove_zip: bool = True) -> bool:
     Extracts 'Related Documents.zip' to the same folder and (optional) deletes the ZIP file.
     Returns True if it extracted something, False if no ZIP file was found.
     """
-    run_base = _get_writable_base_dir()
-    dest_folder = Path((run_base / "downloads" / folder_name).resolve())
+    dest_folder = ticket_download_dir(folder_name)
     zip_path = Path(dest_folder / "Related Documents.zip")
 
     if not zip_path.exists():
@@ -339,7 +348,7 @@ def extract_related_zip(folder_name: str, remove_zip: bool = True) -> bool:
         return False
 
     try:
-        with zipfile.ZipFile(zip_path, "r") as z:
+        with timed("zip_extract", ticket=folder_name), zipfile.ZipFile(zip_path, "r") as z:
             z.extractall(dest_folder)
         if remove_zip:
             zip_path.unlink(missing_ok=True)
@@ -141,6 +141,16 @@ def setup_logging(app_name: str = APP_FALLBACK_NAME,
     root.info(f"Logging initialized → {log_file}")
     return log_file
 
+def current_log_file() -> Optional[Path]:
+    """Path of the .log file created by setup_logging (None if not configured)."""
+    return _current_log_file
+
+def writable_logs_dir(app_name: str = APP_FALLBACK_NAME) -> Path:
+    """Folder where setup_logging writes (or would write) its log files."""
+    if _current_log_file is not None:
+        return _current_log_file.parent
+    return _writable_logs_dir(app_name)
+
 def get_logger(name: str | None = None) -> logging.Logger:
     """_summary_
         Get one logger per module/area.
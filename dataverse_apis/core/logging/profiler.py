@@ -0,0 +1,184 @@
+from __future__ import annotations
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .logging_conf import get_logger, current_log_file, writable_logs_dir
+from ..services.env_loader import get_env_variable_value
+
+log = get_logger(__name__)
+
+PROFILE_ENV = "DATAFLIPPER_PROFILE"     # cprofile | sampling (unset/empty = off)
+PROFILE_MODES = ("cprofile", "sampling")
+TOP_N = 40
+SAMPLING_INTERVAL = 0.005               # seconds between stack samples
+
+def profile_mode() -> str | None:
+    """Reads DATAFLIPPER_PROFILE; returns 'cprofile', 'sampling' or None."""
+    mode = (get_env_variable_value(PROFILE_ENV, "") or "").strip().lower()
+    if not mode or mode in ("0", "off", "false", "none"):
+        return None
+    if mode not in PROFILE_MODES:
+        log.warning(f"Unknown {PROFILE_ENV}={mode!r}; expected one of {PROFILE_MODES}. Profiling disabled.")
+        return None
+    return mode
+
+def _profile_base(name: str, mode: str) -> Path:
+    """<logs dir>/<log file stem>_<name>_<mode>_<time> (next to the current .log file)."""
+    log_file = current_log_file()
+    folder = log_file.parent if log_file else writable_logs_dir()
+    stem = log_file.stem if log_file else "profile"
+    ts = datetime.now().strftime("%H%M%S")
+    return folder / f"{stem}_{name}_{mode}_{ts}"
+
+# ---------- sampling profiler ----------
+FrameKey = Tuple[str, int, str]  # (filename, first line, function)
+
+_THREAD_NUMBER_RE = re.compile(r"[-_]\d+(?:_\d+)?$")
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler: every `interval` seconds it reads, through
+    sys._current_frames(), the stack of the profiled thread and of every thread
+    started after it (ThreadPoolExecutor workers of the Dataverse lookups,
+    downloads...). Threads that already existed (e.g. the Qt UI thread) are
+    left out. Folded stacks start with the thread name (pool numbers dropped).
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLING_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0   # stacks sampled (one per live thread per tick)
+        self.threads = 0   # distinct threads seen
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.wall_s = 0.0
+        self._t0 = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="SamplingProfiler", daemon=True)
+        self._ignored: set[int] = set()        # threads that existed before start()
+        self._names: Dict[int, str] = {}
+
+    def _thread_name(self, tid: int) -> str:
+        if tid not in self._names:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self._names[tid] = _THREAD_NUMBER_RE.sub("", names.get(tid, "thread"))
+            self.threads += 1
+        return self._names[tid]
+
+    def _loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (tid != self.thread_id and tid in self._ignored):
+                    continue
+                stack: list[FrameKey] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self.samples += 1
+                self.self_counts[stack[0]] += 1
+                for key in set(stack):
+                    self.total_counts[key] += 1
+                frames = ";".join(f"{k[2]} ({Path(k[0]).name}:{k[1]})" for k in reversed(stack))
+                self.stacks[f"{self._thread_name(tid)};{frames}"] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._ignored = {t.ident for t in threading.enumerate()} - {self.thread_id}
+        self._t0 = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.wall_s = time.perf_counter() - self._t0
+
+    def write(self, base: Path, top: int = TOP_N) -> Dict[str, str]:
+        folded = base.with_name(base.name + ".folded")
+        with open(folded, "w", encoding="utf-8") as fh:  # flamegraph.pl / speedscope format
+            for stack, n in self.stacks.most_common():
+                fh.write(f"{stack} {n}\n")
+
+        def _fmt(key: FrameKey) -> str:
+            return f"{key[2]} ({key[0]}:{key[1]})"
+
+        out = io.StringIO()
+        total = max(1, self.samples)
+        out.write(f"Sampling profile: {self.samples} stack samples from {self.threads} thread(s) "
+                  f"(target every {self.interval * 1000:.0f} ms) over {self.wall_s:.1f}s wall time\n\n")
+        out.write(f"Top {top} by own time (self):\n")
+        for key, n in self.self_counts.most_common(top):
+            out.write(f"  {100 * n / total:6.2f}%  {n:7d}  {_fmt(key)}\n")
+        out.write(f"\nTop {top} by inclusive time (self + callees):\n")
+        for key, n in self.total_counts.most_common(top):
+            out.write(f"  {100 * n / total:6.2f}%  {n:7d}  {_fmt(key)}\n")
+
+        summary = Path(f"{base}_top.txt")
+        summary.write_text(out.getvalue(), encoding="utf-8")
+        return {"profile": str(folded), "summary": str(summary)}
+
+# ---------- cProfile ----------
+def _write_cprofile(prof: cProfile.Profile, base: Path, top: int = TOP_N) -> Dict[str, str]:
+    stats_file = base.with_name(base.name + ".prof")  # open with snakeviz / python -m pstats
+    prof.dump_stats(str(stats_file))
+
+    out = io.StringIO()
+    stats = pstats.Stats(prof, stream=out).strip_dirs()
+    out.write(f"Top {top} by cumulative time:\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write(f"\nTop {top} by own time (tottime):\n")
+    stats.sort_stats("tottime").print_stats(top)
+
+    summary = Path(f"{base}_top.txt")
+    summary.write_text(out.getvalue(), encoding="utf-8")
+    return {"profile": str(stats_file), "summary": str(summary)}
+
+def run_profiled(fn: Callable[..., Any], *args: Any, name: str = "worker", **kwargs: Any) -> Any:
+    """
+    Calls fn(*args, **kwargs), profiling it when DATAFLIPPER_PROFILE is set.
+    The profile and a top-N hot-function summary are saved next to the log file.
+    Profiling problems are logged, never raised.
+
+    "sampling" covers the calling thread plus the threads it starts (the
+    Dataverse lookup/download pools); "cprofile" covers the calling thread
+    only, so work done in pool workers shows up as time spent waiting.
+    """
+    mode = profile_mode()
+    if mode is None:
+        return fn(*args, **kwargs)
+
+    log.info(f"Profiling '{name}' with {mode} ({PROFILE_ENV})")
+    t0 = time.perf_counter()
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            _save(lambda base: _write_cprofile(prof, base), name, mode, t0)
+    else:
+        sampler = SamplingProfiler(threading.get_ident()).start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            _save(sampler.write, name, mode, t0)
+
+def _save(writer: Callable[[Path], Dict[str, str]], name: str, mode: str, t0: float) -> None:
+    try:
+        files = writer(_profile_base(name, mode))
+        log.info(f"Profile saved ({time.perf_counter() - t0:.1f}s run): {files['profile']} | summary: {files['summary']}")
+    except Exception as e:
+        log.error(f"Could not save the {mode} profile: {e}")
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+MAX_EVENTS = 50_000  # per-item timings kept in the report; stage totals are always complete
+
+class RunReport:
+    """
+    Structured timings for one run: per stage totals plus per item events
+    (file, sheet, target, URL...). Thread-safe.
+
+        with current_report().timed("excel_read", file=filename):
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self.dropped_events = 0
+
+    def record(self, stage: str, seconds: float, **ctx: Any) -> None:
+        with self._lock:
+            agg = self.stages.setdefault(stage, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            agg["count"] += 1
+            agg["total_s"] += seconds
+            agg["max_s"] = max(agg["max_s"], seconds)
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({"stage": stage, "seconds": round(seconds, 4), **ctx})
+            else:
+                self.dropped_events += 1
+
+    @contextmanager
+    def timed(self, stage: str, **ctx: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            if not ok:
+                ctx["error"] = True
+            self.record(stage, time.perf_counter() - t0, **ctx)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                k: {"count": int(v["count"]), "total_s": round(v["total_s"], 4), "max_s": round(v["max_s"], 4),
+                    "avg_s": round(v["total_s"] / v["count"], 4) if v["count"] else 0.0}
+                for k, v in sorted(self.stages.items(), key=lambda kv: -kv[1]["total_s"])
+            }
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "elapsed_s": round(self.elapsed(), 3),
+                "stages": stages,
+                "counters": dict(self.counters),
+                "events": list(self.events),
+                "dropped_events": self.dropped_events,
+            }
+
+    def write(self, path: str | Path) -> str:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, ensure_ascii=False, indent=2)
+        return str(path)
+
+    def summary_lines(self, top: int = 8) -> List[str]:
+        data = self.to_dict()
+        lines = [f"⏱ Run time: {data['elapsed_s']:.1f}s"]
+        for name, s in list(data["stages"].items())[:top]:
+            lines.append(f"   {name}: {s['total_s']:.1f}s ({s['count']}×, avg {s['avg_s']:.2f}s, max {s['max_s']:.2f}s)")
+        for name, n in sorted(data["counters"].items()):
+            lines.append(f"   {name}: {n}")
+        return lines
+
+# ---------- process-wide current report ----------
+_current: RunReport | None = None
+
+def start_run_report() -> RunReport:
+    """Starts a fresh report for a new run and makes it the current one."""
+    global _current
+    _current = RunReport()
+    return _current
+
+def current_report() -> RunReport:
+    """The report of the run in progress (a throwaway one if no run was started)."""
+    global _current
+    if _current is None:
+        _current = RunReport()
+    return _current
+
+def timed(stage: str, **ctx: Any):
+    """Shortcut: current_report().timed(stage, **ctx)."""
+    return current_report().timed(stage, **ctx)
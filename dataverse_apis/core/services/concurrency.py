@@ -0,0 +1,46 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Tuple, TypeVar
+
+from .env_loader import get_env_variable_value
+from .http_session import pool_size
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CONCURRENCY = 4  # in-flight Dataverse requests per resolution step
+
+def concurrency() -> int:
+    """
+    DATAVERSE_CONCURRENCY from .env/environment (default 4), capped at the
+    connection pool size so every in-flight request keeps a pooled connection.
+    """
+    try:
+        n = int(get_env_variable_value("DATAVERSE_CONCURRENCY", str(DEFAULT_CONCURRENCY)))
+    except (TypeError, ValueError):
+        n = DEFAULT_CONCURRENCY
+    return max(1, min(n, pool_size()))
+
+def map_ordered(fn: Callable[[T], R], items: Iterable[T],
+                workers: int | None = None) -> List[Tuple[R | None, Exception | None]]:
+    """
+    Runs fn(item) for every item with at most `workers` calls in flight and
+    returns [(result, None) | (None, error)] in the order of `items`.
+    One worker (or one item) runs inline, in the calling thread.
+
+    The threads share the process-wide token provider and pooled Session
+    (both thread-safe), so a run still uses one token and one pool.
+    """
+    items = list(items)
+    workers = max(1, min(workers or concurrency(), len(items) or 1))
+
+    def _call(item: T) -> Tuple[R | None, Exception | None]:
+        try:
+            return fn(item), None
+        except Exception as e:
+            return None, e
+
+    if workers == 1:
+        return [_call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dataverse") as pool:
+        return list(pool.map(_call, items))
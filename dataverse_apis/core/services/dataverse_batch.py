@@ -0,0 +1,242 @@
+"""
+OData $batch support for the Dataverse Web API.
+
+    from dataverse_apis.core.services.dataverse_batch import BatchOperation, call_dataverse_batch
+
+    results = call_dataverse_batch([
+        BatchOperation("GET", "incidents?$filter=ticketnumber eq 'CAS-1'&$select=incidentid"),
+        BatchOperation("POST", "Merge", data={...}, changeset="group-1"),
+        BatchOperation("PATCH", "accounts(<id>)", data={...}, changeset="group-1"),
+    ])
+    for op, res in zip(operations, results):
+        res.ok, res.status, res.data, res.error
+
+- results come back in the order of the operations, one BatchResult each; a
+  failed operation never raises, it carries `error` instead;
+- writes sharing a `changeset` label are sent as one changeset (all or nothing);
+  writes without a label and every GET are independent requests;
+- requests are split into several $batch calls at MAX_BATCH_OPERATIONS (a
+  changeset is never split) and sent with 'Prefer: odata.continue-on-error'.
+"""
+from __future__ import annotations
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+import requests
+from requests.utils import requote_uri
+
+from ..auth.msal_auth import get_auth_settings
+from ..logging.logging_conf import get_logger
+from ..logging.run_report import current_report, timed
+from .dataverse_client import dataverse_request, SUPPORTED_METHODS
+from .request_coalescing import get_coalescer
+
+log = get_logger(__name__)
+
+MAX_BATCH_OPERATIONS = 1000  # Dataverse limit per $batch request (and per changeset)
+CRLF = "\r\n"
+
+@dataclass
+class BatchOperation:
+    method: str                         # GET, POST, PATCH, PUT, DELETE
+    endpoint: str                       # relative to the Web API root, like call_dataverse
+    data: Dict[str, Any] | None = None  # JSON body for writes
+    headers: Dict[str, str] | None = None
+    changeset: str | None = None        # writes with the same label are atomic together
+
+@dataclass
+class BatchResult:
+    status: int                          # HTTP status of the operation (0 = not executed)
+    data: Any = None                     # parsed JSON body (or {"status": "success", "code": ...})
+    error: str | None = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    rolled_back: bool = False            # part of a changeset that failed as a whole
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+# ---------- request building ----------
+# a unit is one top-level part of a batch: ("single", [index]) or ("changeset", [indexes])
+Unit = Tuple[str, List[int]]
+
+def _units(operations: List[BatchOperation]) -> List[Unit]:
+    units: List[Unit] = []
+    changesets: Dict[str, List[int]] = {}
+    for i, op in enumerate(operations):
+        method = op.method.upper()
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"HTTP method not supported: {op.method}")
+        if op.changeset is None or method == "GET":  # GETs are not allowed inside changesets
+            units.append(("single", [i]))
+        elif op.changeset in changesets:
+            changesets[op.changeset].append(i)
+        else:
+            changesets[op.changeset] = [i]
+            units.append(("changeset", changesets[op.changeset]))
+    for label, idx in changesets.items():
+        if len(idx) > MAX_BATCH_OPERATIONS:
+            raise ValueError(f"Changeset {label!r} has {len(idx)} operations (max {MAX_BATCH_OPERATIONS})")
+    return units
+
+def _split(units: List[Unit], max_ops: int) -> Iterable[List[Unit]]:
+    chunk: List[Unit] = []
+    size = 0
+    for unit in units:
+        n = len(unit[1])
+        if chunk and size + n > max_ops:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(unit)
+        size += n
+    if chunk:
+        yield chunk
+
+def _http_part(op: BatchOperation, base_url: str, content_id: int | None) -> str:
+    lines = ["Content-Type: application/http", "Content-Transfer-Encoding: binary"]
+    if content_id is not None:
+        lines.append(f"Content-ID: {content_id}")
+    method = op.method.upper()
+    url = requote_uri(f"{base_url}/{op.endpoint.lstrip('/')}")  # e.g. spaces in $filter, as requests does
+    lines += ["", f"{method} {url} HTTP/1.1", "Accept: application/json"]
+    for k, v in (op.headers or {}).items():
+        lines.append(f"{k}: {v}")
+    body = ""
+    if op.data is not None and method != "GET":
+        lines.append("Content-Type: application/json; type=entry")
+        body = json.dumps(op.data, ensure_ascii=False)
+    return CRLF.join(lines) + CRLF + CRLF + body
+
+def build_batch_body(operations: List[BatchOperation], units: List[Unit], base_url: str) -> Tuple[str, str]:
+    """Returns (boundary, multipart/mixed body) for one $batch request."""
+    boundary = f"batch_{uuid.uuid4()}"
+    parts = []
+    for kind, idx in units:
+        if kind == "single":
+            parts.append(f"--{boundary}{CRLF}" + _http_part(operations[idx[0]], base_url, None))
+            continue
+        cs = f"changeset_{uuid.uuid4()}"
+        cs_parts = [f"--{cs}{CRLF}" + _http_part(operations[i], base_url, n)
+                    for n, i in enumerate(idx, start=1)]
+        parts.append(f"--{boundary}{CRLF}Content-Type: multipart/mixed; boundary={cs}{CRLF}{CRLF}"
+                     + CRLF.join(cs_parts) + f"{CRLF}--{cs}--")
+    return boundary, CRLF.join(parts) + f"{CRLF}--{boundary}--{CRLF}"
+
+# ---------- response parsing ----------
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+def _split_multipart(body: str, boundary: str) -> List[str]:
+    parts = []
+    for chunk in body.split(f"--{boundary}"):
+        if chunk.startswith("--"):  # closing delimiter
+            break
+        chunk = chunk.strip("\r\n")
+        if chunk:
+            parts.append(chunk)
+    return parts
+
+def _split_headers(text: str) -> Tuple[Dict[str, str], str]:
+    text = text.replace("\r\n", "\n")
+    if text.startswith("\n"):  # no headers at all
+        return {}, text[1:]
+    head, _, rest = text.partition("\n\n")
+    headers = {}
+    for line in head.split("\n"):
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return headers, rest
+
+def _parse_http_response(part: str) -> Tuple[Dict[str, str], BatchResult]:
+    """A MIME part holding 'HTTP/1.1 <status> ...' -> (MIME headers, result)."""
+    mime_headers, rest = _split_headers(part)
+    status_line, _, rest = rest.partition("\n")
+    m = re.match(r"HTTP/\d\.\d\s+(\d{3})\s*(.*)", status_line.strip())
+    status = int(m.group(1)) if m else 0
+    reason = m.group(2) if m else status_line.strip()
+    headers, body = _split_headers(rest)
+    body = body.strip()
+    data: Any = None
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = body
+    error = None
+    if not 200 <= status < 300:
+        detail = data.get("error", {}).get("message") if isinstance(data, dict) else None
+        error = f"Error HTTP: {status} - {detail or reason or body}"
+    elif data is None:
+        data = {"status": "success", "code": status}
+    return mime_headers, BatchResult(status, data, error, headers)
+
+def parse_batch_response(content_type: str, body: str, units: List[Unit], results: List[BatchResult | None]) -> None:
+    """Fills `results` (by operation index) from a $batch response."""
+    m = _BOUNDARY_RE.search(content_type or "")
+    if not m:
+        raise ValueError(f"Not a multipart $batch response: {content_type!r}")
+    parts = _split_multipart(body, m.group(1))
+    for (kind, idx), part in zip(units, parts):
+        mime_headers, inner = _split_headers(part)
+        inner_type = mime_headers.get("content-type", "")
+        if kind == "changeset" and inner_type.startswith("multipart/mixed"):
+            cm = _BOUNDARY_RE.search(inner_type)
+            for n, sub in enumerate(_split_multipart(inner, cm.group(1)) if cm else [], start=1):
+                sub_headers, result = _parse_http_response(sub)
+                cid = sub_headers.get("content-id", str(n))
+                pos = int(cid) - 1 if cid.isdigit() else n - 1
+                if 0 <= pos < len(idx):
+                    results[idx[pos]] = result
+        else:
+            _, result = _parse_http_response(part)
+            if kind == "changeset":
+                result.rolled_back = result.error is not None
+            for i in idx:  # a failed changeset answers once for all its operations
+                results[i] = result
+
+# ---------- public API ----------
+def call_dataverse_batch(operations: List[BatchOperation], *,
+                         max_per_batch: int = MAX_BATCH_OPERATIONS,
+                         continue_on_error: bool = True) -> List[BatchResult]:
+    """
+    Sends `operations` through as few $batch requests as possible and returns one
+    BatchResult per operation, in order. Transport failures (network, 5xx on the
+    $batch itself) mark every operation of that request as failed.
+    """
+    operations = list(operations)
+    results: List[BatchResult | None] = [None] * len(operations)
+    if not operations:
+        return []
+
+    if any(op.method.upper() != "GET" for op in operations):
+        get_coalescer().invalidate()  # remembered GET results may be stale after these writes
+    base_url = get_auth_settings().webapi_url
+    units = _units(operations)
+    for chunk in _split(units, max(1, min(max_per_batch, MAX_BATCH_OPERATIONS))):
+        n_ops = sum(len(idx) for _, idx in chunk)
+        boundary, body = build_batch_body(operations, chunk, base_url)
+        headers = {"Content-Type": f"multipart/mixed; boundary={boundary}"}
+        if continue_on_error:
+            headers["Prefer"] = "odata.continue-on-error"
+        try:
+            with timed("dv_batch", operations=n_ops):
+                response = dataverse_request("POST", f"{base_url}/$batch", headers,
+                                             data=body.encode("utf-8"))
+            current_report().count("dv_batch_operations", n_ops)
+            if response.status_code >= 400 and not response.headers.get("Content-Type", "").startswith("multipart/"):
+                raise requests.HTTPError(f"Error HTTP: {response.status_code} - {response.text[:500]}")
+            parse_batch_response(response.headers.get("Content-Type", ""),
+                                 response.content.decode("utf-8", errors="replace"), chunk, results)
+        except Exception as e:
+            log.error(f"$batch request with {n_ops} operation(s) failed: {e}")
+            for _, idx in chunk:
+                for i in idx:
+                    if results[i] is None:
+                        results[i] = BatchResult(0, None, f"Batch request failed: {e}")
+
+    # operations without a response were skipped by Dataverse (stopped at the first error)
+    return [r if r is not None else BatchResult(0, None, "Not executed (an earlier operation in the batch failed)")
+            for r in results]
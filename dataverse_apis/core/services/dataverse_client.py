@@ -1,77 +1,117 @@
-import os
+import time
 import requests
-from ..auth.msal_auth import get_access_token_with_msal_default
-from ..auth.msal_auth import get_access_token_with_msal_default
-from dotenv import load_dotenv
+from ..auth.msal_auth import get_access_token_with_msal_default, invalidate_access_token, get_auth_settings
+from ..logging.logging_conf import get_logger
+from ..logging.run_report import current_report
+from .http_session import get_session, request_timeout
+from .request_coalescing import get_coalescer
+from .throttling import (THROTTLED, backoff_seconds, get_rate_limiter, max_retries,
+                         retry_after_seconds, should_retry)
 
-# Environment variables
-# ICPS URL
-api_url = os.getenv("DATAVERSE_BASE_URI")
-api_version = os.getenv("API_VERSION")
-webapi_url = f"{api_url}/api/data/v{api_version}"
+log = get_logger(__name__)
 
+SUPPORTED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
 
-def call_dataverse(endpoint: str, method: str = "GET", data: dict = None):
-    token = get_access_token_with_msal_default() #using the default methodL of MSAL
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "OData-MaxVersion": "4.0",
-        "OData-Version": "4.0"
-    }
-    
-    url = f"{webapi_url}/{endpoint}"
-    response = requests.request(method.upper(), url, headers=headers, json=data)
-    response.raise_for_status()
-    return response.json() if response.content else {"status": "success"}
+def dataverse_request(method: str, url: str, headers_extra: dict = None, **kwargs) -> requests.Response:
+    """
+    Sends one authorized request through the pooled Session and returns the raw
+    response (no status check). `kwargs` go to Session.request (json=..., data=...);
+    without a `timeout` in them, DATAVERSE_TIMEOUT applies (see http_session).
+
+    - A 401 drops the cached token and retries once.
+    - Every attempt waits for the client-side rate limiter (see throttling).
+    - 429 (service protection) waits 'Retry-After'; 502/503/504 and connection
+      errors on idempotent methods back off exponentially with jitter; up to
+      DATAVERSE_MAX_RETRIES retries, counted in the run report ("dv_retries").
+    """
+    limiter = get_rate_limiter()
+    retries, retries_left, auth_retry = 0, max_retries(), True
+    kwargs.setdefault("timeout", request_timeout())  # a hung connection must not block a pool worker forever
+    while True:
+        access_token = get_access_token_with_msal_default() #using the default methodL of MSAL
+        # OData/Accept/gzip headers are session defaults
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        # Allow additional headers if needed
+        if headers_extra:
+            headers.update(headers_extra)
+
+        limiter.acquire()
+        try:
+            response = get_session().request(method, url, headers=headers, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if retries >= retries_left or not should_retry(method, None):
+                raise
+            retries += 1
+            delay = backoff_seconds(retries)
+            log.warning(f"Dataverse {method} failed ({e.__class__.__name__}); retry {retries} in {delay:.1f}s")
+        else:
+            status = response.status_code
+            if status == 401 and auth_retry:
+                auth_retry = False
+                invalidate_access_token()  # revoked/expired server-side: refresh once and retry
+                continue
+            if retries >= retries_left or not should_retry(method, status):
+                if status < 400:
+                    limiter.succeeded()
+                return response
+            retries += 1
+            delay = retry_after_seconds(response.headers.get("Retry-After"))
+            if status == THROTTLED:
+                delay = delay if delay is not None else backoff_seconds(retries)
+                limiter.throttled(delay)  # every thread pauses, then the rate is halved
+                current_report().count("dv_throttled")
+            elif delay is None:
+                delay = backoff_seconds(retries)
+            log.warning(f"Dataverse {method} answered {status}; retry {retries} in {delay:.1f}s")
+        current_report().count("dv_retries")
+        time.sleep(delay)
 
 def call_dataverse(endpoint: str, method: str = "GET", data: dict = None, headers_extra: dict = None):
     """
     Makes a request to the specified Dataverse endpoint.
 
+    Requests go through a pooled keep-alive Session (see http_session), so the
+    TCP/TLS connection to Dataverse is reused across calls. Plain GETs (no extra
+    headers) are coalesced: identical concurrent ones share one request, and
+    inside a memo_scope() (one run) results are remembered until a write
+    (see request_coalescing).
+
     Parameters:
-    - endpoint: string (e.g., 'WhoAmI' or 'contacts')
-    - method: 'GET', 'POST', 'PUT', 'DELETE'
-    - data: dictionary with the body (for POST or PUT)
+    - endpoint: string (e.g., 'WhoAmI' or 'contacts'), or an absolute URL
+      such as an '@odata.nextLink' returned by a previous call
+    - method: 'GET', 'POST', 'PUT', 'PATCH', 'DELETE'
+    - data: dictionary with the body (for POST, PUT or PATCH)
     - headers_extra: optional additional headers
 
     Returns:
     - dict with the JSON response if successful
     """
-    access_token = get_access_token_with_msal_default() #using the default methodL of MSAL
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "OData-MaxVersion": "4.0",
-        "OData-Version": "4.0"
-    }
+    method = method.upper()
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"HTTP method not supported: {method}")
 
-    # Allow additional headers if needed
-    if headers_extra:
-        headers.update(headers_extra)
+    # ICPS URL (read from .env on first use)
+    if endpoint.startswith(("https://", "http://")):
+        full_url = endpoint
+    else:
+        full_url = f"{get_auth_settings().webapi_url}/{endpoint}"
 
-    full_url = f"{webapi_url}/{endpoint}"
+    # Prefer headers (paging, change tracking) stream large results: never shared
+    if method == "GET" and not headers_extra:
+        return get_coalescer().get(full_url, lambda: _send(method, full_url, None, None))
+    if method != "GET":
+        get_coalescer().invalidate()
+    return _send(method, full_url, data, headers_extra)
 
-    # Mapping methods to request functions
-    method = method.upper()
+def _send(method: str, full_url: str, data: dict = None, headers_extra: dict = None):
     try:
-        if method == "GET":
-            response = requests.get(full_url, headers=headers)
-        elif method == "POST":
-            response = requests.post(full_url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(full_url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(full_url, headers=headers)
-        else:
-            raise ValueError(f"HTTP method not supported: {method}")
-        
+        response = dataverse_request(method, full_url, headers_extra,
+                                     json=data if method in ("POST", "PUT", "PATCH") else None)
         response.raise_for_status()
         return response.json() if response.content else {"status": "success", "code": response.status_code}
 
     except requests.exceptions.HTTPError as err:
         raise Exception(f"Error HTTP: {response.status_code} - {response.text}") from err
     except Exception as e:
-        raise Exception(f"Unexpected error: {e}") from e
\ No newline at end of file
+        raise Exception(f"Unexpected error: {e}") from e
@@ -0,0 +1,171 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+from urllib.parse import quote
+
+from .concurrency import map_ordered
+from .env_loader import get_env_variable_value
+from ..logging.run_report import timed
+
+DEFAULT_MAX_URL_LENGTH = 8000  # conservative: Dataverse accepts longer GETs, proxies often don't
+DEFAULT_MAX_KEYS = 500         # keys per query, whatever the URL length
+DEFAULT_PAGE_SIZE = 5000     # Dataverse's maximum for odata.maxpagesize
+FILTER_STYLES = ("in", "or")   # Microsoft.Dynamics.CRM.In(...) | "f eq 'a' or f eq 'b'"
+
+def odata_quote(value: str) -> str:
+    """Escape single quotes for OData and wrap in quotes."""
+    v = (value or "").replace("'", "''")
+    return f"'{v}'"
+
+def in_filter(field: str, values: Sequence[str]) -> str:
+    vals = ",".join(odata_quote(v) for v in values)
+    return f"Microsoft.Dynamics.CRM.In(PropertyName='{field}',PropertyValues=[{vals}])"
+
+def or_filter(field: str, values: Sequence[str]) -> str:
+    return " or ".join(f"{field} eq {odata_quote(v)}" for v in values)
+
+def normalize_key(value: Any) -> str:
+    """Dataverse string comparisons are case-insensitive: match results back the same way."""
+    return str(value or "").strip().casefold()
+
+def max_url_length() -> int:
+    """DATAVERSE_MAX_URL_LENGTH from .env/environment (default 8000)."""
+    try:
+        return max(512, int(get_env_variable_value("DATAVERSE_MAX_URL_LENGTH", str(DEFAULT_MAX_URL_LENGTH))))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_URL_LENGTH
+
+def _endpoint(entity_set: str, select: str, key_field: str, keys: Sequence[str], style: str,
+              expand: str | None = None, extra_filter: str | None = None) -> str:
+    flt = in_filter(key_field, keys) if style == "in" else or_filter(key_field, keys)
+    if extra_filter:
+        flt = f"({extra_filter}) and ({flt})"
+    return f"{entity_set}?$select={select}&$filter={flt}" + (f"&$expand={expand}" if expand else "")
+
+def _encoded_len(endpoint: str) -> int:
+    return len(quote(endpoint, safe="/?&=$(),'"))
+
+def chunk_keys(entity_set: str, select: str, key_field: str, keys: Sequence[str], *,
+               style: str = "in",
+               base_url_length: int = 100,
+               max_length: int | None = None,
+               max_keys: int = DEFAULT_MAX_KEYS,
+               expand: str | None = None,
+               extra_filter: str | None = None) -> Iterator[Tuple[List[str], str]]:
+    """
+    Yields (keys, endpoint) with as many keys per query as fit in `max_length`
+    once the URL is encoded (base URL included), at most `max_keys` each.
+    `expand` is an optional $expand clause added to every query; `extra_filter`
+    a condition and-ed with the key filter.
+    """
+    if style not in FILTER_STYLES:
+        raise ValueError(f"style must be one of {FILTER_STYLES}, got {style!r}")
+    budget = (max_length or max_url_length()) - base_url_length - 1
+    # the URL grows by a known amount per key, so sizes are computed incrementally
+    fixed = _encoded_len(_endpoint(entity_set, select, key_field, [], style, expand, extra_filter))
+    if style == "in":
+        sep = _encoded_len(",")
+        def _cost(key: str) -> int:
+            return _encoded_len(odata_quote(key))
+    else:
+        sep = _encoded_len(" or ")
+        def _cost(key: str) -> int:
+            return _encoded_len(f"{key_field} eq {odata_quote(key)}")
+
+    chunk: List[str] = []
+    length = fixed
+    for key in keys:
+        cost = _cost(key) + (sep if chunk else 0)
+        if chunk and (len(chunk) >= max_keys or length + cost > budget):
+            yield chunk, _endpoint(entity_set, select, key_field, chunk, style, expand, extra_filter)
+            chunk, length, cost = [], fixed, _cost(key)
+        chunk.append(key)
+        length += cost
+    if chunk:
+        yield chunk, _endpoint(entity_set, select, key_field, chunk, style, expand, extra_filter)
+
+def iter_pages(dv_call: Callable[..., Dict[str, Any]], endpoint: str,
+               headers: Dict[str, str] | None = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the 'value' list of each page, following '@odata.nextLink' (absolute
+    URLs). `headers` (e.g. a Prefer header) are sent with every page request.
+    """
+    next_url: str | None = endpoint
+    while next_url:
+        result = (dv_call(next_url, headers_extra=headers) if headers else dv_call(next_url)) or {}
+        yield result.get("value") or []
+        next_url = result.get("@odata.nextLink")
+
+def paginate(dv_call: Callable[..., Dict[str, Any]], entity_set: str, *,
+             select: Sequence[str] | None = None,
+             filter: str | None = None,
+             orderby: str | None = None,
+             page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Streams an entity set page by page: $select projection, optional $filter /
+    $orderby and 'Prefer: odata.maxpagesize', so only one page (at most
+    `page_size` records) is held in memory at a time.
+    """
+    params = []
+    if select:
+        params.append("$select=" + ",".join(select))
+    if filter:
+        params.append(f"$filter={filter}")
+    if orderby:
+        params.append(f"$orderby={orderby}")
+    endpoint = entity_set + ("?" + "&".join(params) if params else "")
+    headers = {"Prefer": f"odata.maxpagesize={max(1, page_size)}"}
+    yield from iter_pages(dv_call, endpoint, headers)
+
+def lookup_by_keys(dv_call: Callable[[str], Dict[str, Any]],
+                   entity_set: str, key_field: str, id_field: str, keys: Sequence[str], *,
+                   style: str = "in",
+                   base_url_length: int = 100,
+                   max_length: int | None = None,
+                   max_keys: int = DEFAULT_MAX_KEYS,
+                   stage: str = "dv_lookup",
+                   workers: int | None = None,
+                   expand: str | None = None,
+                   extra_filter: str | None = None,
+                   log: Callable[[str], None] | None = None) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Resolves many keys of one entity set with one filter per chunk (every page
+    of each chunk's result is read). Up to `workers` chunks are in flight at
+    once (default: DATAVERSE_CONCURRENCY). `stage` names the run report timing.
+    `expand` (e.g. "nav($select=col)") fetches related records in the same request;
+    `extra_filter` is and-ed with the key filter of every chunk.
+
+    Returns (found, errors):
+    - found:  {normalized key: [records]} (records carry key_field and id_field);
+    - errors: {normalized key: message} for keys whose chunk query failed.
+    Keys without a match are in neither.
+    """
+    log = log or (lambda msg: None)
+    unique: Dict[str, str] = {}
+    for k in keys:
+        nk = normalize_key(k)
+        if nk and nk not in unique:
+            unique[nk] = str(k).strip()
+
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    select = ",".join(dict.fromkeys([id_field, key_field]))
+    chunks = list(chunk_keys(entity_set, select, key_field, list(unique.values()), style=style,
+                             base_url_length=base_url_length, max_length=max_length, max_keys=max_keys,
+                             expand=expand, extra_filter=extra_filter))
+    for chunk, _ in chunks:
+        log(f"🔎 DV query: {entity_set} ({len(chunk)} key(s) in one filter)")
+
+    def _fetch(job: Tuple[List[str], str]) -> List[Dict[str, Any]]:
+        chunk, endpoint = job
+        with timed(stage, entity=entity_set, keys=len(chunk)):
+            return [rec for page in iter_pages(dv_call, endpoint) for rec in page]
+
+    # merged in chunk order, so the result doesn't depend on which request finished first
+    for (chunk, _), (records, error) in zip(chunks, map_ordered(_fetch, chunks, workers)):
+        if error is not None:
+            for k in chunk:
+                errors[normalize_key(k)] = str(error)
+            continue
+        for rec in records:
+            found.setdefault(normalize_key(rec.get(key_field)), []).append(rec)
+    return found, errors
@@ -0,0 +1,209 @@
+"""
+Incremental copies of Dataverse tables with change tracking.
+
+    with DeltaSnapshot("ICPS_Accounts.sqlite", "accounts", "accountid", columns) as snapshot:
+        result = sync_entity(call_dataverse, snapshot)    # full the first time, then deltas
+        for page in snapshot.iter_pages():
+            ...
+
+- the first sync reads the whole entity set with 'Prefer: odata.track-changes'
+  and stores the '@odata.deltaLink' of the last page next to the rows (SQLite);
+- later syncs request that delta link: only new, changed and deleted rows come
+  back ('$deletedEntity' / '@removed' entries) and are applied to the snapshot;
+- each sync is one transaction: an interrupted sync leaves the previous
+  snapshot and delta link untouched; a delta link Dataverse rejects
+  (expired/invalid token) or a different $select falls back to a full sync,
+  any other failure (throttling, outage) is raised and the next run retries
+  the same delta.
+
+Change tracking must be enabled on the table in Dataverse; $filter/$orderby
+are not allowed with it, only $select.
+"""
+from __future__ import annotations
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from ..logging.run_report import timed
+from .dataverse_query import DEFAULT_PAGE_SIZE
+
+_ID_IN_URL_RE = re.compile(r"\(([0-9a-fA-F-]{36})\)\s*$")
+_REJECTED_STATUS_RE = re.compile(r"HTTP: (400|410)\b")
+EXPIRED_TOKEN_CODE = "0x80044352"  # ExpiredVersionStamp: the delta token is too old
+
+@dataclass
+class SyncResult:
+    full: bool          # whole table read (first run, expired delta link, --full)
+    added: int = 0
+    changed: int = 0
+    deleted: int = 0
+    total: int = 0      # rows in the snapshot afterwards
+    delta_link: bool = False
+
+class DeltaSnapshot:
+    """Local SQLite copy of one entity set (selected columns) plus its delta link."""
+
+    def __init__(self, path: str | Path, entity_set: str, id_field: str, select: Sequence[str]) -> None:
+        self.path = Path(path)
+        self.entity_set = entity_set
+        self.id_field = id_field
+        self.select = list(dict.fromkeys([id_field, *select]))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (entity_set TEXT PRIMARY KEY, "
+                         "select_cols TEXT NOT NULL, delta_link TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rows (entity_set TEXT NOT NULL, id TEXT NOT NULL, "
+                         "data TEXT NOT NULL, PRIMARY KEY (entity_set, id))")
+        self._db.commit()
+
+    @property
+    def delta_link(self) -> str | None:
+        """The stored delta link, only if it was taken with the same $select."""
+        row = self._db.execute("SELECT select_cols, delta_link FROM meta WHERE entity_set = ?",
+                               (self.entity_set,)).fetchone()
+        if not row or json.loads(row[0]) != self.select:
+            return None
+        return row[1]
+
+    def set_delta_link(self, link: str | None) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?)",
+                         (self.entity_set, json.dumps(self.select), link))
+
+    def reset(self) -> None:
+        self._db.execute("DELETE FROM rows WHERE entity_set = ?", (self.entity_set,))
+        self.set_delta_link(None)
+
+    def upsert(self, records: List[Dict[str, Any]]) -> tuple[int, int]:
+        """Returns (added, changed)."""
+        added = changed = 0
+        for rec in records:
+            rid = str(rec.get(self.id_field) or "").lower()
+            if not rid:
+                continue
+            data = json.dumps({c: rec.get(c) for c in self.select}, ensure_ascii=False)
+            cur = self._db.execute("UPDATE rows SET data = ? WHERE entity_set = ? AND id = ?",
+                                   (data, self.entity_set, rid))
+            if cur.rowcount:
+                changed += 1
+            else:
+                self._db.execute("INSERT INTO rows VALUES (?, ?, ?)", (self.entity_set, rid, data))
+                added += 1
+        return added, changed
+
+    def delete(self, ids: List[str]) -> int:
+        deleted = 0
+        for rid in ids:
+            cur = self._db.execute("DELETE FROM rows WHERE entity_set = ? AND id = ?",
+                                   (self.entity_set, rid.lower()))
+            deleted += cur.rowcount
+        return deleted
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM rows WHERE entity_set = ?", (self.entity_set,)).fetchone()[0]
+
+    def iter_pages(self, size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """The snapshot rows, `size` at a time (constant memory)."""
+        cur = self._db.execute("SELECT data FROM rows WHERE entity_set = ? ORDER BY rowid", (self.entity_set,))
+        while True:
+            batch = cur.fetchmany(size)
+            if not batch:
+                return
+            yield [json.loads(data) for (data,) in batch]
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def rollback(self) -> None:
+        self._db.rollback()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "DeltaSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _removed_id(rec: Dict[str, Any]) -> str | None:
+    """Id of a deleted-entity entry ('$deletedEntity' context or '@removed'), else None."""
+    if "$deletedEntity" in str(rec.get("@odata.context", "")) or "@removed" in rec:
+        if rec.get("id"):
+            return str(rec["id"])
+        m = _ID_IN_URL_RE.search(str(rec.get("@id", "")))
+        return m.group(1) if m else None
+    return None
+
+def _delta_rejected(error: BaseException) -> bool:
+    """Dataverse refused the delta token itself (400/410, expired version stamp), not a transient failure."""
+    message = str(error)
+    return bool(_REJECTED_STATUS_RE.search(message)) or EXPIRED_TOKEN_CODE in message.lower()
+
+def _apply(dv_call: Callable[..., Dict[str, Any]], snapshot: DeltaSnapshot, url: str,
+           headers: Dict[str, str], full: bool, log: Callable[[str], None]) -> SyncResult:
+    result = SyncResult(full=full)
+    if full:
+        snapshot.reset()
+    delta_link = None
+    page_no = 0
+    while url:
+        page = dv_call(url, headers_extra=headers) or {}
+        page_no += 1
+        removed, records = [], []
+        for rec in page.get("value") or []:
+            rid = _removed_id(rec)
+            if rid:
+                removed.append(rid)
+            else:
+                records.append(rec)
+        added, changed = snapshot.upsert(records)
+        result.added += added
+        result.changed += changed
+        result.deleted += snapshot.delete(removed)
+        log(f"📄 {snapshot.entity_set} page {page_no}: +{added} ~{changed} -{len(removed)}")
+        url = page.get("@odata.nextLink")
+        delta_link = page.get("@odata.deltaLink") or delta_link
+
+    snapshot.set_delta_link(delta_link)
+    snapshot.commit()
+    result.total = snapshot.count()
+    result.delta_link = bool(delta_link)
+    return result
+
+def sync_entity(dv_call: Callable[..., Dict[str, Any]], snapshot: DeltaSnapshot, *,
+                page_size: int = DEFAULT_PAGE_SIZE,
+                full: bool = False,
+                log: Callable[[str], None] | None = None) -> SyncResult:
+    """
+    Brings `snapshot` up to date: applies the changes since the stored delta link,
+    or reloads the whole entity set (first run, `full=True`, changed $select,
+    or a delta link Dataverse no longer accepts). Other errors on the delta
+    link are raised; the snapshot and its delta link are kept.
+    """
+    log = log or (lambda msg: None)
+    headers = {"Prefer": f"odata.track-changes,odata.maxpagesize={max(1, page_size)}"}
+    link = None if full else snapshot.delta_link
+    if link:
+        try:
+            with timed("dv_delta_sync", entity=snapshot.entity_set, full=False):
+                return _apply(dv_call, snapshot, link, headers, False, log)
+        except Exception as e:
+            snapshot.rollback()
+            if not _delta_rejected(e):
+                raise
+            log(f"⚠️ Delta link of {snapshot.entity_set} rejected ({e}) — running a full sync.")
+
+    endpoint = f"{snapshot.entity_set}?$select={','.join(snapshot.select)}"
+    try:
+        with timed("dv_delta_sync", entity=snapshot.entity_set, full=True):
+            result = _apply(dv_call, snapshot, endpoint, headers, True, log)
+    except Exception:
+        snapshot.rollback()
+        raise
+    if not result.delta_link:
+        log(f"⚠️ No delta link returned for {snapshot.entity_set}: is change tracking enabled on the table? "
+            "The next sync will be a full one again.")
+    return result
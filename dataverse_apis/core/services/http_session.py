@@ -0,0 +1,76 @@
+from __future__ import annotations
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .env_loader import get_env_variable_value
+
+DEFAULT_POOL_SIZE = 10  # keep-alive connections per host (>= concurrent Dataverse calls)
+DEFAULT_TIMEOUT = (10.0, 150.0)  # (connect, read) seconds; read > Dataverse's own 2-minute limit
+
+# Sent with every Dataverse request; Authorization is added per call (tokens expire)
+ODATA_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "OData-MaxVersion": "4.0",
+    "OData-Version": "4.0",
+}
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+_session_pid: int | None = None
+
+def pool_size() -> int:
+    """DATAVERSE_POOL_SIZE from .env/environment (default 10)."""
+    try:
+        return max(1, int(get_env_variable_value("DATAVERSE_POOL_SIZE", str(DEFAULT_POOL_SIZE))))
+    except (TypeError, ValueError):
+        return DEFAULT_POOL_SIZE
+
+def request_timeout() -> tuple[float, float]:
+    """DATAVERSE_TIMEOUT from .env/environment: "connect,read" seconds, or one number for both."""
+    value = get_env_variable_value("DATAVERSE_TIMEOUT", "")
+    try:
+        parts = [float(p) for p in str(value).split(",") if p.strip()]
+    except ValueError:
+        return DEFAULT_TIMEOUT
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or min(parts) <= 0:
+        return DEFAULT_TIMEOUT
+    return parts[0], parts[1]
+
+def build_session(size: int | None = None, headers: dict | None = None) -> requests.Session:
+    """New Session with a keep-alive connection pool of `size` and default OData headers."""
+    size = size or pool_size()
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(ODATA_HEADERS if headers is None else headers)
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Process-wide pooled Session (created on first use). Connections are reused
+    across calls, so only the first request to a host pays for TCP + TLS.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:  # never share sockets with a forked parent
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = build_session()
+                _session_pid = pid
+    return _session
+
+def close_session() -> None:
+    """Closes the pooled connections (a new Session is created on next use)."""
+    global _session, _session_pid
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
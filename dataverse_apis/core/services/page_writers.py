@@ -0,0 +1,138 @@
+"""
+Append-only writers for paginated Dataverse exports (see dataverse_query.paginate).
+
+    with open_page_writer("ICPS_Accounts.xlsx", columns) as writer:
+        for page in paginate(call_dataverse, "accounts", select=columns):
+            writer.write_page(page)
+
+Each page is written and dropped, so memory stays flat whatever the row count:
+- .csv     csv module, UTF-8 with BOM (opens cleanly in Excel);
+- .parquet pyarrow ParquetWriter, one row group per page, string columns;
+- .xlsx    openpyxl write-only workbook (rows are streamed to the file).
+"""
+from __future__ import annotations
+import csv
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+EXCEL_MAX_ROWS = 1_048_576  # header included
+
+def export_columns(page: List[Dict[str, Any]]) -> List[str]:
+    """Columns of a page without OData annotations ('@odata.etag', 'x@OData.Community...')."""
+    return [k for k in (page[0] if page else {}) if "@" not in k]
+
+def _cell(value: Any) -> Any:
+    return "" if value is None else value
+
+class PageWriter(ABC):
+    """Base class: writes the header on the first page, then rows in `columns` order."""
+
+    def __init__(self, path: str | Path, columns: Sequence[str] | None = None) -> None:
+        self.path = Path(path)
+        self.columns: List[str] | None = list(columns) if columns else None
+        self.rows = 0
+
+    def write_page(self, page: List[Dict[str, Any]]) -> None:
+        if not page:
+            return
+        if self.columns is None:  # no $select: take the columns of the first page
+            self.columns = export_columns(page)
+        if self.rows == 0:
+            self._open(self.columns)
+        self._write([[rec.get(c) for c in self.columns] for rec in page])
+        self.rows += len(page)
+
+    def close(self) -> None:
+        if self.rows == 0 and self.columns:  # header-only file for empty exports
+            self._open(self.columns)
+        self._close()
+
+    def __enter__(self) -> "PageWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ————— per format —————
+    @abstractmethod
+    def _open(self, columns: List[str]) -> None:
+        """Creates the file and writes the header."""
+
+    @abstractmethod
+    def _write(self, rows: List[List[Any]]) -> None:
+        """Appends rows (values in `columns` order)."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Flushes and closes the file (must work if _open was never called)."""
+
+class CsvPageWriter(PageWriter):
+    _fh = None
+
+    def _open(self, columns):
+        self._fh = open(self.path, "w", encoding="utf-8-sig", newline="")
+        self._csv = csv.writer(self._fh)
+        self._csv.writerow(columns)
+
+    def _write(self, rows):
+        self._csv.writerows([[_cell(v) for v in row] for row in rows])
+
+    def _close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+class ParquetPageWriter(PageWriter):
+    _writer = None
+
+    def _open(self, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # all strings: Dataverse returns nulls/mixed types across pages, a fixed schema never breaks
+        self._pa = pa
+        self._schema = pa.schema([(c, pa.string()) for c in columns])
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+
+    def _write(self, rows):
+        pa = self._pa
+        arrays = [pa.array([None if row[i] is None else str(row[i]) for row in rows], type=pa.string())
+                  for i in range(len(self._schema))]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def _close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+class XlsxPageWriter(PageWriter):
+    _wb = None
+
+    def _open(self, columns):
+        from openpyxl import Workbook
+
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet("Sheet1")
+        self._ws.append(columns)
+
+    def _write(self, rows):
+        if self.rows + len(rows) >= EXCEL_MAX_ROWS:
+            raise ValueError(f"More than {EXCEL_MAX_ROWS - 1} rows do not fit in {self.path.name}; "
+                             "export to .csv or .parquet instead.")
+        for row in rows:
+            self._ws.append([_cell(v) for v in row])
+
+    def _close(self):
+        if self._wb:
+            self._wb.save(self.path)
+            self._wb = None
+
+WRITERS = {".csv": CsvPageWriter, ".parquet": ParquetPageWriter, ".xlsx": XlsxPageWriter}
+
+def open_page_writer(path: str | Path, columns: Sequence[str] | None = None) -> PageWriter:
+    """Writer for the file extension of `path` (.csv, .parquet or .xlsx)."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in WRITERS:
+        raise ValueError(f"Unsupported export format {suffix!r} (use one of {', '.join(WRITERS)})")
+    return WRITERS[suffix](path, columns)
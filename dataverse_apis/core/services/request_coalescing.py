@@ -0,0 +1,124 @@
+"""
+Coalescing of identical Dataverse GETs within a run.
+
+- concurrent callers asking for the same URL share one in-flight request
+  (the first one sends it, the others wait for its result or its error);
+- inside a memo_scope() (one per run: the pipeline run, a task script),
+  successful results are remembered until the scope ends, so the same GET
+  never goes over the wire twice; outside any scope nothing is remembered;
+- any write (POST/PATCH/PUT/DELETE, $batch) empties the memo: reads after a
+  write always see the new data.
+
+Callers get their own copy of the result, so mutating it never leaks into
+other callers. DATAVERSE_GET_MEMO_SIZE bounds the memo (least recently used
+URLs are dropped; 0 = share in-flight requests only).
+"""
+from __future__ import annotations
+import copy
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from ..logging.run_report import current_report
+from .env_loader import get_env_variable_value
+
+DEFAULT_MEMO_SIZE = 2000
+
+class _InFlight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+class RequestCoalescer:
+    """Per-run memo plus in-flight table of GET results, keyed by absolute URL."""
+
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.memo_size = max(0, memo_size)
+        self._lock = threading.Lock()
+        self._scopes = 0  # open memo scopes (nested scopes share the outermost memo)
+        self._memo: "OrderedDict[str, Any]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._generation = 0  # bumped by invalidate(): results read before a write aren't remembered
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """Remembers GET results until the (outermost) scope ends."""
+        with self._lock:
+            if not self._scopes:
+                self._memo.clear()
+                self._generation += 1
+            self._scopes += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._scopes -= 1
+                if not self._scopes:
+                    self._memo.clear()
+                    self._generation += 1
+
+    def get(self, url: str, fetch: Callable[[], Any]) -> Any:
+        """The result of fetch() for `url`, sent at most once per memo scope."""
+        report = current_report()
+        with self._lock:
+            if url in self._memo:
+                self._memo.move_to_end(url)
+                report.count("dv_memo_hits")
+                return copy.deepcopy(self._memo[url])
+            flight = self._in_flight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[url] = _InFlight()
+            generation = self._generation
+
+        if not leader:
+            report.count("dv_coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e  # shared with the waiting callers, never remembered
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(url) is flight:
+                    del self._in_flight[url]
+                if flight.error is None and self.memo_size and self._scopes and self._generation == generation:
+                    self._memo[url] = flight.result
+                    while len(self._memo) > self.memo_size:
+                        self._memo.popitem(last=False)
+            flight.done.set()
+        return copy.deepcopy(flight.result)
+
+    def invalidate(self) -> None:
+        """Forgets every remembered result (after a write); later GETs don't join requests already in flight."""
+        with self._lock:
+            self._memo.clear()
+            self._in_flight.clear()
+            self._generation += 1
+
+_coalescer: RequestCoalescer | None = None
+_coalescer_lock = threading.Lock()
+
+def get_coalescer() -> RequestCoalescer:
+    """Process-wide coalescer (DATAVERSE_GET_MEMO_SIZE read on first use)."""
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                try:
+                    size = int(get_env_variable_value("DATAVERSE_GET_MEMO_SIZE", str(DEFAULT_MEMO_SIZE)))
+                except (TypeError, ValueError):
+                    size = DEFAULT_MEMO_SIZE
+                _coalescer = RequestCoalescer(size)
+    return _coalescer
+
+def memo_scope():
+    """Context manager: identical GETs inside it are sent once (see RequestCoalescer.scope)."""
+    return get_coalescer().scope()
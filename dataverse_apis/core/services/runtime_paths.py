@@ -1,5 +1,5 @@
 from __future__ import annotations
-import sys, inspect
+import os, sys, inspect
 from pathlib import Path
 from typing import Optional
 
@@ -47,4 +47,16 @@ def resolve_runtime_path(rel_path: str | Path) -> Optional[str]:
         if p.exists():
             return str(p)
 
-    return None
\ No newline at end of file
+    return None
+
+def user_data_dir(app_name: str = "DataFlipper") -> Path:
+    """Per-user writable folder for app state (token cache...), created if missing:
+    %LOCALAPPDATA%\\{app} on Windows, $XDG_DATA_HOME/{app} (~/.local/share/{app}) elsewhere.
+    """
+    if sys.platform == "win32":
+        base = Path(os.getenv("LOCALAPPDATA") or (Path.home() / "AppData" / "Local"))
+    else:
+        base = Path(os.getenv("XDG_DATA_HOME") or (Path.home() / ".local" / "share"))
+    folder = base / app_name
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
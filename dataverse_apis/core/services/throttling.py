@@ -0,0 +1,128 @@
+"""
+Dataverse service protection: retry policy and client-side rate limiter.
+
+- Every request waits for the process-wide RateLimiter (token bucket,
+  DATAVERSE_MAX_RPS per second, default 20 ≈ 6000 requests / 5 min per user).
+- 429 responses pause all threads until 'Retry-After' has passed and halve the
+  rate; it grows back slowly while requests succeed (so a sustained run settles
+  just below the limit instead of bouncing off it).
+- 429 is retried for every method (Dataverse did not execute the request);
+  502/503/504 and connection errors only for idempotent methods.
+"""
+from __future__ import annotations
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .env_loader import get_env_variable_value
+
+THROTTLED = 429
+TRANSIENT_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "PUT", "PATCH", "DELETE")
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_RPS = 20.0
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+MIN_RPS = 0.5  # the limiter never slows down below this
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(get_env_variable_value(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+def max_retries() -> int:
+    """DATAVERSE_MAX_RETRIES from .env/environment (default 5)."""
+    return max(0, int(_env_number("DATAVERSE_MAX_RETRIES", DEFAULT_MAX_RETRIES)))
+
+def should_retry(method: str, status: int | None) -> bool:
+    """status None = the request never got a response (connection error, timeout)."""
+    if status == THROTTLED:
+        return True
+    if status is None or status in TRANSIENT_STATUSES:
+        return method.upper() in IDEMPOTENT_METHODS
+    return False
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """'Retry-After' as seconds (delta-seconds or HTTP date), None if absent/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with full jitter: random in [0, min(max, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** max(0, attempt - 1)))
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all Dataverse calls of the process.
+    rate <= 0 disables the bucket (throttling pauses still apply).
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self._lock = threading.Lock()
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0 and self.rate > 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                    self._stamp = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+                elif wait <= 0:
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def throttled(self, pause_s: float) -> None:
+        """Server said 429: every thread waits `pause_s`, then goes on at half the rate."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause_s)
+            if self.max_rate > 0:
+                self.rate = max(MIN_RPS, self.rate / 2)
+                self._tokens = 0.0
+
+    def succeeded(self) -> None:
+        """Additive increase back towards max_rate (about +1 req/s every 20 successes)."""
+        if self.max_rate > 0 and self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + 0.05)
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter (DATAVERSE_MAX_RPS read on first use; 0 = no client-side limit)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(_env_number("DATAVERSE_MAX_RPS", DEFAULT_MAX_RPS))
+    return _limiter
@@ -1,9 +1,28 @@
+from dataclasses import dataclass, field
 import pandas as pd
 from core.services.dataverse_client import call_dataverse
+from core.services.dataverse_query import DEFAULT_PAGE_SIZE, lookup_by_keys, normalize_key, paginate
+from core.services.request_coalescing import memo_scope
+from core.services.delta_sync import DeltaSnapshot, sync_entity
+from core.services.page_writers import open_page_writer
 
 INPUT_FILE = "data/Merge_Accounts_ICPS - format.xlsx"
 COLUMN_NAME = "BUS ID"
 
+ACCOUNTS_EXPORT_FILE = "ICPS_Accounts.xlsx"
+ACCOUNTS_SNAPSHOT_FILE = "ICPS_Accounts.sqlite"  # local copy + delta link for sync_accounts_from_ICPS
+# columns kept by sync_accounts_from_ICPS (fetch_accounts_from_ICPS exports every column by default)
+ACCOUNT_COLUMNS = ["accountid", "accountnumber", "name", "statecode", "statuscode", "createdon", "modifiedon"]
+STATUS_COLUMN = "accountid_status"
+REPORT_LIMIT = 20  # IDs listed per category in the console report
+
+@dataclass
+class BusIdResolution:
+    ids: dict[str, str] = field(default_factory=dict)              # normalized BUS ID -> accountid (single match)
+    ambiguous: dict[str, list[str]] = field(default_factory=dict)  # BUS ID -> accountids (several matches)
+    unresolved: list[str] = field(default_factory=list)            # BUS IDs without any match
+    errors: dict[str, str] = field(default_factory=dict)           # BUS ID -> error of its chunk query
+
 def get_column_name():
     return COLUMN_NAME
 
@@ -16,24 +35,112 @@ def get_account_id_by_bus_id(bus_id: str) -> str | None:
         return records[0].get("accountid")
     return None
 
-def fetch_accounts_from_ICPS() -> pd.DataFrame:
-    endpoint = "accounts"
-    records = []
-
-    while endpoint:
-        result = call_dataverse(endpoint)
-        batch = result.get("value", [])
-        records.extend(batch)
-        endpoint = result.get("@odata.nextLink")
-        
-        # Remove the full URL if `call_dataverse()` only accepts the relative path
-        if endpoint and endpoint.startswith("https://"):
-            endpoint = endpoint.split("/api/data/v9.2/")[-1]
-            
-    df = pd.DataFrame(records)
-    df.to_excel("ICPS_Accounts.xlsx", index=False)
-
-    return records
+def resolve_account_ids(bus_ids, workers: int | None = None) -> BusIdResolution:
+    """
+    Resolves many BUS IDs (accountnumber) at once: duplicates and empty cells are
+    dropped, the rest is queried in chunks of Microsoft.Dynamics.CRM.In filters,
+    up to `workers` chunks in flight (default: DATAVERSE_CONCURRENCY).
+    BUS IDs matching several accounts are reported as ambiguous, not resolved.
+    """
+    keys = {}
+    for bus_id in bus_ids:
+        if pd.isna(bus_id) or not normalize_key(bus_id):
+            continue
+        keys.setdefault(normalize_key(bus_id), str(bus_id).strip())
+
+    found, errors = lookup_by_keys(call_dataverse, "accounts", "accountnumber", "accountid", list(keys.values()),
+                                   stage="dv_bus_id_lookup", workers=workers)
+
+    resolution = BusIdResolution(errors={keys.get(k, k): msg for k, msg in errors.items()})
+    for key, records in found.items():
+        account_ids = list(dict.fromkeys(r["accountid"] for r in records if r.get("accountid")))
+        if len(account_ids) == 1:
+            resolution.ids[key] = account_ids[0]
+        elif account_ids:
+            resolution.ambiguous[keys.get(key, key)] = account_ids
+    resolution.unresolved = [bus_id for key, bus_id in keys.items() if key not in found and key not in errors]
+    return resolution
+
+def add_account_ids(df: pd.DataFrame, column: str = COLUMN_NAME,
+                    workers: int | None = None) -> tuple[pd.DataFrame, BusIdResolution]:
+    """
+    Fills df["accountid"] (single matches only) and df[STATUS_COLUMN] for every
+    row from one bulk resolution of the distinct BUS IDs of `column`.
+    """
+    resolution = resolve_account_ids(df[column], workers=workers)
+
+    lookup = [(k, account_id, "✅ Found") for k, account_id in resolution.ids.items()]
+    lookup += [(normalize_key(b), None, f"⚠️ Ambiguous ({len(ids)} accounts)") for b, ids in resolution.ambiguous.items()]
+    lookup += [(normalize_key(b), None, "❌ Not found") for b in resolution.unresolved]
+    lookup += [(normalize_key(b), None, f"❌ Lookup error: {msg}") for b, msg in resolution.errors.items()]
+    lookup = pd.DataFrame(lookup, columns=["_key", "accountid", STATUS_COLUMN])
+
+    keys = pd.DataFrame({"_key": df[column].map(lambda v: None if pd.isna(v) else normalize_key(v) or None)})
+    merged = keys.merge(lookup, on="_key", how="left", validate="many_to_one")
+    df["accountid"] = merged["accountid"].to_numpy()
+    df[STATUS_COLUMN] = merged[STATUS_COLUMN].fillna("❌ Empty BUS ID").to_numpy()
+    return df, resolution
+
+def print_resolution_report(resolution: BusIdResolution, limit: int = REPORT_LIMIT) -> None:
+    print(f"🔎 BUS IDs: {len(resolution.ids)} resolved, {len(resolution.unresolved)} not found, "
+          f"{len(resolution.ambiguous)} ambiguous, {len(resolution.errors)} failed")
+    sections = [
+        ("⚠️ Ambiguous (several accounts)", [f"{b}: {', '.join(ids)}" for b, ids in resolution.ambiguous.items()]),
+        ("❌ Not found", resolution.unresolved),
+        ("❌ Lookup errors", [f"{b}: {msg}" for b, msg in resolution.errors.items()]),
+    ]
+    for title, lines in sections:
+        if not lines:
+            continue
+        print(f"{title}:")
+        for line in lines[:limit]:
+            print(f"   - {line}")
+        if len(lines) > limit:
+            print(f"   ... and {len(lines) - limit} more (see the '{STATUS_COLUMN}' column)")
+
+def fetch_accounts_from_ICPS(output_file: str = ACCOUNTS_EXPORT_FILE,
+                             select: list[str] | None = None,
+                             page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    Exports the ICPS accounts to `output_file` (.xlsx, .csv or .parquet) page by
+    page: each page of `page_size` records is appended to the file and dropped,
+    so memory stays flat for hundreds of thousands of accounts.
+    `select=None` (default) exports every column, e.g. select=ACCOUNT_COLUMNS
+    a smaller file. Returns the number of accounts written (the records are
+    not kept in memory any more).
+    """
+    with open_page_writer(output_file, select) as writer:
+        for n, page in enumerate(paginate(call_dataverse, "accounts", select=select, page_size=page_size), start=1):
+            writer.write_page(page)
+            print(f"📄 Page {n}: {writer.rows} accounts written")
+
+    print(f"📁 File generated with {writer.rows} accounts: {output_file}")
+    return writer.rows
+
+def sync_accounts_from_ICPS(output_file: str = ACCOUNTS_EXPORT_FILE,
+                            snapshot_file: str = ACCOUNTS_SNAPSHOT_FILE,
+                            select: list[str] = ACCOUNT_COLUMNS,
+                            full: bool = False,
+                            page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    Incremental version of fetch_accounts_from_ICPS: keeps a local snapshot of
+    the accounts (SQLite) and, with Dataverse change tracking, downloads only
+    the accounts added, changed or deleted since the last run; the export is then
+    regenerated from the snapshot. full=True reloads the whole table.
+    Returns the number of accounts written.
+    """
+    with DeltaSnapshot(snapshot_file, "accounts", "accountid", select) as snapshot:
+        result = sync_entity(call_dataverse, snapshot, page_size=page_size, full=full, log=print)
+        kind = "Full sync" if result.full else "Delta sync"
+        print(f"🔄 {kind}: +{result.added} new, ~{result.changed} changed, -{result.deleted} deleted "
+              f"({result.total} accounts in {snapshot_file})")
+
+        with open_page_writer(output_file, snapshot.select) as writer:
+            for page in snapshot.iter_pages(page_size):
+                writer.write_page(page)
+
+    print(f"📁 File generated with {writer.rows} accounts: {output_file}")
+    return writer.rows
 
 def fetch_accounts() -> pd.DataFrame:
     df = pd.read_excel(INPUT_FILE)
@@ -41,7 +148,9 @@ def fetch_accounts() -> pd.DataFrame:
     if COLUMN_NAME not in df.columns:
         raise Exception(f"❌ The column '{COLUMN_NAME}' doesn't exist in the Excel file.")
 
-    df["accountid"] = df[COLUMN_NAME].apply(lambda bus_id: get_account_id_by_bus_id(bus_id))
+    with memo_scope():
+        df, resolution = add_account_ids(df)
+    print_resolution_report(resolution)
     return df
 
 def main():
@@ -54,11 +163,10 @@ def main():
     1. Reads the input Excel file specified by INPUT_FILE.
     2. Checks if the specified column, COLUMN_NAME, exists in the DataFrame.
        Raises an exception if the column is not found.
-    3. Initializes a new column, 'accountid', in the DataFrame to store results.
-    4. Iterates over each row in the DataFrame, retrieves the Business ID, and
-       fetches the corresponding account ID using the get_account_id_by_bus_id function.
-    5. Stores the fetched account ID in the 'accountid' column, and prints the progress.
-    6. Exports the DataFrame with the results to an Excel file.
+    3. Resolves the distinct Business IDs in bulk (add_account_ids) and writes
+       the 'accountid' and 'accountid_status' columns.
+    4. Prints a report of the IDs not found, ambiguous or failed.
+    5. Exports the DataFrame with the results to an Excel file.
     """
 
     df = pd.read_excel(INPUT_FILE)
@@ -66,15 +174,9 @@ def main():
     if COLUMN_NAME not in df.columns:
         raise Exception(f"❌ The column '{COLUMN_NAME}' doesn't exist in the Excel file. Make sure the column existe in the file..")
 
-    # New column to store results
-    df["accountid"] = None
-
-    for index, row in df.iterrows():
-        bus_id = row[COLUMN_NAME]
-        print(f"🔍 Searching accountid for BUS ID: {bus_id}...")
-        account_id = get_account_id_by_bus_id(bus_id)
-        df.at[index, "accountid"] = account_id
-        print(f"✅ Result: {account_id or 'Not found'}")
+    with memo_scope():
+        df, resolution = add_account_ids(df)
+    print_resolution_report(resolution)
 
     # Export results
     output_file = "data/accounts_with_ids.xlsx"
@@ -1,47 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from tqdm import tqdm
 from tasks.fetch_accounts import get_column_name
+from core.services.dataverse_batch import BatchOperation, call_dataverse_batch
 from core.services.dataverse_client import call_dataverse
 
 OUTPUT_FILE = "data/merged_output_results.xlsx"
 
+def merge_payload(target_account_id: str, subordinate_account_id: str) -> dict:
+    return {
+        "Target": {
+            "@odata.type": "Microsoft.Dynamics.CRM.account",
+            "accountid": target_account_id
+        },
+        "Subordinate": {
+            "@odata.type": "Microsoft.Dynamics.CRM.account",
+            "accountid": subordinate_account_id
+        },
+        "PerformParentingChecks": False
+    }
+
 def call_merge_endpoint(target_account_id: str, subordinate_account_id: str) -> dict:
     try:
         endpoint = "Merge"
-        payload = {
-            "Target": {
-                "@odata.type": "Microsoft.Dynamics.CRM.account",
-                "accountid": target_account_id
-            },
-            "Subordinate": {
-                "@odata.type": "Microsoft.Dynamics.CRM.account",
-                "accountid": subordinate_account_id
-            },
-            "PerformParentingChecks": False
-        }
+        payload = merge_payload(target_account_id, subordinate_account_id)
         return call_dataverse(endpoint, method="POST", data=payload)
     except Exception as e:
         return {"status": f"error: {str(e)}", "code": 500}
 
-def merge_accounts(target_account: dict, subordinate_accounts: list[dict]) -> dict:
+def call_merge_batch(target_account_id: str, subordinate_account_ids: list[str], changeset: str) -> list[dict]:
+    """
+    All merges of one group in a single $batch request, as one changeset (the
+    group is merged completely or not at all). Same result shape as
+    call_merge_endpoint, one per subordinate.
+    """
+    operations = [BatchOperation("POST", "Merge", data=merge_payload(target_account_id, sub_id), changeset=changeset)
+                  for sub_id in subordinate_account_ids]
+    results = []
+    for res in call_dataverse_batch(operations):
+        if res.ok:
+            results.append({"status": "success", "code": res.status})
+        elif res.rolled_back:
+            results.append({"status": f"error: {res.error} (changeset rolled back)", "code": res.status})
+        else:  # the $batch request itself failed, or Dataverse never ran the operation
+            results.append({"status": f"error: {res.error}", "code": res.status or 500})
+    return results
+
+def merge_accounts(target_account: dict, subordinate_accounts: list[dict],
+                   use_batch: bool = False, show_progress: bool = True) -> dict:
+    """
+    Merges the subordinates into the target, one Merge request each, or with
+    use_batch=True as one $batch changeset for the whole group.
+    """
     errors = []
     details = {}
 
-    for subordinate in tqdm(
-        subordinate_accounts,
-        desc=f"🔃 Merging Group {target_account['Merge_Group_ID']}",
-        unit="sub",
-        leave=False,
-        ncols=60
-    ):
-        subordinate_id = subordinate.get("accountid")
-        if not subordinate_id:
+    subordinate_ids = []
+    for subordinate in subordinate_accounts:
+        if not subordinate.get("accountid"):
             details["UNKNOWN"] = "❌ Subordinate without accountid"
             errors.append("Subordinate without accountid")
-            continue
+        else:
+            subordinate_ids.append(subordinate["accountid"])
 
+    if use_batch and subordinate_ids:
+        batch_results = call_merge_batch(target_account["accountid"], subordinate_ids,
+                                         changeset=f"merge-group-{target_account['Merge_Group_ID']}")
+    else:
+        batch_results = None
+
+    for n, subordinate_id in enumerate(tqdm(
+        subordinate_ids,
+        desc=f"🔃 Merging Group {target_account['Merge_Group_ID']}",
+        unit="sub",
+        leave=False,
+        ncols=60,
+        disable=not show_progress or batch_results is not None,
+    )):
         try:
-            result = call_merge_endpoint(target_account["accountid"], subordinate_id)
+            if batch_results is not None:
+                result = batch_results[n]
+            else:
+                result = call_merge_endpoint(target_account["accountid"], subordinate_id)
             code = result.get("code", None)
             status = result.get("status", "unknown")
 
@@ -64,7 +104,18 @@ def merge_accounts(target_account: dict, subordinate_accounts: list[dict]) -> di
         "details": details
     }
 
-def process_merge_for_all_groups(df: pd.DataFrame) -> pd.DataFrame:
+def process_merge_for_all_groups(df: pd.DataFrame, workers: int = 1,
+                                 use_batch: bool = False) -> pd.DataFrame:
+    """
+    Merges every Merge_Group_ID group (one Merge_Role 1 target, Merge_Role 0
+    subordinates) and records the outcome in merge_result / merge_detail.
+
+    Groups run one after the other unless `workers` > 1 is passed (opt-in:
+    groups are independent, but every merge writes to account records).
+    use_batch=True sends each group as one $batch changeset instead of one
+    request per subordinate. Each group is printed as soon as it is done.
+    """
+    workers = max(1, workers or 1)
     df["merge_result"] = None
     df["merge_detail"] = None
     column_name = get_column_name()
@@ -73,7 +124,8 @@ def process_merge_for_all_groups(df: pd.DataFrame) -> pd.DataFrame:
     if not duplicates.empty:
         raise Exception(f"❌ Error: Duplicates found in '{column_name}' column:\n{duplicates[[column_name, 'Merge_Group_ID']]}")
 
-    for group_id, group in tqdm(df.groupby("Merge_Group_ID"), desc="🔄 Processing Merge Groups", unit="group"):
+    jobs = []
+    for group_id, group in df.groupby("Merge_Group_ID"):
         target_row = group[group["Merge_Role"] == 1]
         subordinates = group[group["Merge_Role"] == 0]
 
@@ -90,17 +142,21 @@ def process_merge_for_all_groups(df: pd.DataFrame) -> pd.DataFrame:
             df.loc[group.index, "merge_detail"] = "No Subordinate present"
             continue
 
-        target_account = target_row.iloc[0].to_dict()
-        subordinate_accounts = subordinates.to_dict(orient="records")
+        jobs.append((group_id, group, target_row.iloc[0].to_dict(), subordinates.to_dict(orient="records")))
 
+    def _show_group(group_id, target_account, subordinate_accounts):
         print("\n" + "-"*60)
         print(f"🔧 Merge Group: {group_id}")
         print(f"📌 Target Account ID: {target_account['accountid']}")
         print(f"   ↳ Subordinate(s): {[s['accountid'] for s in subordinate_accounts]}")
 
-        merge_output = merge_accounts(target_account, subordinate_accounts)
+    def _record_group(group, subordinate_accounts, merge_output, error):
+        if error is not None:
+            merge_output = {"summary": "❌ Merge completed with errors",
+                            "details": {s.get("accountid"): f"❌ Exception: {error}" for s in subordinate_accounts}}
 
         df.loc[group.index, "merge_result"] = merge_output["summary"]
+        print(f"   {merge_output['summary']}")
 
         for idx, row in group.iterrows():
             account_id = row.get("accountid")
@@ -110,6 +166,29 @@ def process_merge_for_all_groups(df: pd.DataFrame) -> pd.DataFrame:
             )
             df.at[idx, "merge_detail"] = detail
 
+    progress = tqdm(total=len(jobs), desc="🔄 Processing Merge Groups", unit="group")
+    if workers == 1:
+        for group_id, group, target_account, subordinate_accounts in jobs:
+            _show_group(group_id, target_account, subordinate_accounts)
+            try:
+                merge_output, error = merge_accounts(target_account, subordinate_accounts, use_batch=use_batch), None
+            except Exception as e:
+                merge_output, error = None, e
+            _record_group(group, subordinate_accounts, merge_output, error)
+            progress.update(1)
+    else:
+        # groups run concurrently; each one is shown (and recorded) as soon as it finishes
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="merge") as pool:
+            futures = {pool.submit(merge_accounts, job[2], job[3], use_batch=use_batch, show_progress=False): job
+                       for job in jobs}
+            for future in as_completed(futures):
+                group_id, group, target_account, subordinate_accounts = futures[future]
+                _show_group(group_id, target_account, subordinate_accounts)
+                error = future.exception()
+                _record_group(group, subordinate_accounts, None if error else future.result(), error)
+                progress.update(1)
+    progress.close()
+
     df.to_excel(OUTPUT_FILE, index=False)
     print(f"\n📁 Generated file: {OUTPUT_FILE}")
 
@@ -1,14 +1,23 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
 from ..core.services.env_loader import get_env_variable_value
 from ..core.logging.logging_conf import get_logger
+from ..core.services.concurrency import map_ordered
 from ..core.services.dataverse_client import call_dataverse
+from ..core.services.dataverse_query import lookup_by_keys, normalize_key
 from urllib.parse import quote
 
 log = get_logger(__name__)
 
-# ---------- Read environment variables ----------
-SHAREPOINT_BASE_URL = get_env_variable_value("SHAREPOINT_BASE_URL")
-SHAREPOINT_SITE_PATH = get_env_variable_value("SHAREPOINT_SITE_PATH")
-LOCATION_QUERY = get_env_variable_value("LOCATION_QUERY")
+# ---------- Read environment variables (on first use) ----------
+@lru_cache(maxsize=1)
+def sharepoint_settings() -> dict:
+    return {
+        "SHAREPOINT_BASE_URL": get_env_variable_value("SHAREPOINT_BASE_URL"),
+        "SHAREPOINT_SITE_PATH": get_env_variable_value("SHAREPOINT_SITE_PATH"),
+        "LOCATION_QUERY": get_env_variable_value("LOCATION_QUERY"),
+    }
 
 # Entity Mapping -> Folder in SharePoint
 FOLDER_MAP = {
@@ -19,10 +28,98 @@ FOLDER_MAP = {
     "investigation": "icps_investigation",
 }
 
+OBJECT_ID_PLACEHOLDER = "{object_id}"
+
+def location_query_for(object_id) -> str:
+    """LOCATION_QUERY for one object: '{object_id}' is replaced, or the id appended ('... eq <id>')."""
+    template = (sharepoint_settings()["LOCATION_QUERY"] or "").strip()
+    if OBJECT_ID_PLACEHOLDER in template:
+        return template.replace(OBJECT_ID_PLACEHOLDER, str(object_id))
+    return f"{template} {object_id}"
+
+@dataclass(frozen=True)
+class LocationQuery:
+    """LOCATION_QUERY taken apart, so many object ids can be queried the same way."""
+    entity_set: str
+    key_field: str                  # compared with the object id
+    extra_filter: str | None = None  # the rest of $filter (and-ed), if any
+
+_KEY_TERM_RE = re.compile(r"([\w.]+)\s+eq\s*(?:'?\{object_id\}'?)?\s*$", re.IGNORECASE)
+_AND_RE = re.compile(r"^\s*and\s+|\s+and\s*$", re.IGNORECASE)
+
+def _top_level_or(expr: str) -> bool:
+    depth = 0
+    for i, ch in enumerate(expr):
+        depth += (ch == "(") - (ch == ")")
+        if depth == 0 and expr[i:i + 4].lower() == " or ":
+            return True
+    return False
+
+def parse_location_query(template: str) -> LocationQuery | None:
+    """
+    Entity set, key field and extra condition of a LOCATION_QUERY such as
+    "sharepointdocumentlocations?$select=relativeurl&$filter=statecode eq 0 and _regardingobjectid_value eq".
+    None when it can't be reproduced with one filter per chunk of ids (options
+    other than $select/$filter, key term not in a top-level 'and', ...).
+    """
+    template = (template or "").strip()
+    entity_set, _, query = template.partition("?")
+    if not entity_set or not query:
+        return None
+    params = {}
+    for part in query.split("&"):
+        name, _, value = part.partition("=")
+        params[name.strip().lower()] = value
+    if set(params) - {"$select", "$filter"} or "$filter" not in params:
+        return None
+
+    flt = params["$filter"]
+    if OBJECT_ID_PLACEHOLDER in flt:
+        if flt.count(OBJECT_ID_PLACEHOLDER) != 1:
+            return None
+        head, tail = flt.split(OBJECT_ID_PLACEHOLDER)
+        head += OBJECT_ID_PLACEHOLDER + ("'" if tail.startswith("'") else "")
+        tail = tail[1:] if tail.startswith("'") else tail
+    else:
+        head, tail = flt, ""
+    m = _KEY_TERM_RE.search(head)
+    if not m:
+        return None
+    before, after = head[:m.start()].strip(), tail.strip()
+    if (before and not re.search(r"\sand$", " " + before, re.IGNORECASE)) or \
+            (after and not re.match(r"^and\s", after, re.IGNORECASE)):
+        return None
+    extra = " and ".join(p for p in (_AND_RE.sub("", before), _AND_RE.sub("", after)) if p.strip())
+    if extra and _top_level_or(extra):
+        return None
+    return LocationQuery(entity_set.strip(), m.group(1), extra or None)
+
+@lru_cache(maxsize=1)
+def bulk_location_query() -> LocationQuery | None:
+    spec = parse_location_query(sharepoint_settings()["LOCATION_QUERY"])
+    if spec is None:
+        log.warning("LOCATION_QUERY can't be split into chunked filters — locations are queried one object id at a time.")
+    return spec
+
+def location_expand_options() -> str | None:
+    """
+    Nested options for $expand'ing the regarding locations of a record
+    ("$select=relativeurl[;$filter=...]"), or None when LOCATION_QUERY asks for
+    something the expansion can't mirror (another entity set or key).
+    """
+    spec = bulk_location_query()
+    if not spec or spec.entity_set.lower() != "sharepointdocumentlocations" \
+            or spec.key_field.lower() != "_regardingobjectid_value":
+        return None
+    return "$select=relativeurl" + (f";$filter={spec.extra_filter}" if spec.extra_filter else "")
+
+def location_query_signature() -> str:
+    """What decides which locations come back (LOCATION_QUERY and the $expand options built from it)."""
+    return f"{(sharepoint_settings()['LOCATION_QUERY'] or '').strip()}|{location_expand_options() or ''}"
+
 def get_relativeurls_for_object_id(object_id):
     # Query SharePoint document locations associated with the given object ID
-    location_query = f"{LOCATION_QUERY} {object_id}"
-    response = call_dataverse(location_query)
+    response = call_dataverse(location_query_for(object_id))
 
     if not response.get("value"):
         print(f"No SharePoint document locations found for object ID: {object_id}")
@@ -34,6 +131,53 @@ def get_relativeurls_for_object_id(object_id):
 
     return relative_urls
 
+def get_relativeurls_for_object_ids(object_ids, dv_call=call_dataverse, logger=None, base_url_length=100, workers=None):
+    """
+    Bulk version of get_relativeurls_for_object_id: fetches the SharePoint document
+    locations of many regarding objects with one filter per chunk (following
+    @odata.nextLink), instead of one query per object. Up to `workers` chunks
+    run at once (default: DATAVERSE_CONCURRENCY).
+
+    The entity set, key and extra conditions come from LOCATION_QUERY, so both
+    paths return the same locations; a LOCATION_QUERY that can't be chunked is
+    run once per object id instead.
+
+    Returns {object_id: [relativeurl, ...]} ([] when an object has no location).
+    Object ids whose chunk failed are left out (and logged), so callers can retry them.
+    """
+    ids = [str(o).strip() for o in object_ids if o and str(o).strip()]
+    spec = bulk_location_query()
+    if spec is None:
+        result = {}
+        for object_id, (urls, error) in zip(ids, map_ordered(get_relativeurls_for_object_id, ids, workers)):
+            if error is not None:
+                log.error(f"SharePoint document locations failed for object ID {object_id}: {error}")
+            else:
+                result[object_id] = urls
+        return result
+
+    found, errors = lookup_by_keys(
+        dv_call, spec.entity_set, spec.key_field, "relativeurl", ids,
+        base_url_length=base_url_length, stage="dv_locations", workers=workers,
+        extra_filter=spec.extra_filter, log=logger,
+    )
+    if errors:
+        log.error(f"SharePoint document locations failed for {len(errors)} object ID(s): "
+                  f"{next(iter(errors.values()))}")
+
+    result = {}
+    for object_id in ids:
+        nk = normalize_key(object_id)
+        if nk in errors:
+            continue
+        urls = []
+        for location in found.get(nk, []):
+            rel = location.get("relativeurl")
+            if rel and rel not in urls:
+                urls.append(rel)
+        result[object_id] = urls
+    return result
+
 def build_sharepoint_folder_url(relativeurl: str, entity_type: str):
     """
     Constructs the full folder URL in SharePoint for a related document.
@@ -44,8 +188,9 @@ def build_sharepoint_folder_url(relativeurl: str, entity_type: str):
     * Otherwise, use FOLDER_MAP[entity]
     """
     
-    sharepoint_base_url = SHAREPOINT_BASE_URL
-    sharepoint_site_path = SHAREPOINT_SITE_PATH
+    settings = sharepoint_settings()
+    sharepoint_base_url = settings["SHAREPOINT_BASE_URL"]
+    sharepoint_site_path = settings["SHAREPOINT_SITE_PATH"]
 
     # Make sure to encode spaces and special characters
     rel = (relativeurl or "").strip().lstrip("/")      # without initial slashes
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import os
+import pickle
+from typing import Dict, List, Tuple
+
+try:  # optional: Arrow IPC files can be memory-mapped
+    import pyarrow as pa
+except ImportError:  # fall back to pickle files
+    pa = None
+
+# Transposed sheet as produced by transposer.transpose_row_by_row:
+# [[(field, value), ...], ...]  (one inner list per record)
+Records = List[List[Tuple[str, str]]]
+
+def arrow_available() -> bool:
+    return pa is not None
+
+def records_to_columns(records: Records) -> Dict[str, list]:
+    """Flattens transposed records into three parallel columns: record, field, value."""
+    rec_col: List[int] = []
+    field_col: List[str] = []
+    value_col: List[str] = []
+    for i, record in enumerate(records):
+        for field, value in record:
+            rec_col.append(i)
+            field_col.append(field)
+            value_col.append(value)
+    return {"record": rec_col, "field": field_col, "value": value_col, "n_records": len(records)}
+
+def columns_to_records(rec_col, field_col, value_col, n_records: int) -> Records:
+    records: Records = [[] for _ in range(n_records)]
+    for i, field, value in zip(rec_col, field_col, value_col):
+        records[i].append((field, value))
+    return records
+
+def estimate_records_bytes(records: Records) -> int:
+    """Rough in-memory size of transposed records (strings + tuple/list overhead)."""
+    total = 0
+    for record in records:
+        total += 56 + 8 * len(record)
+        for field, value in record:
+            total += 64 + 2 * 49 + len(field) + len(value)
+    return total
+
+def records_to_table(records: Records):
+    cols = records_to_columns(records)
+    return pa.table(
+        {
+            "record": pa.array(cols["record"], type=pa.int32()),
+            "field": pa.array(cols["field"], type=pa.string()).dictionary_encode(),
+            "value": pa.array(cols["value"], type=pa.string()),
+        },
+        metadata={"n_records": str(cols["n_records"])},
+    )
+
+def table_to_records(table) -> Records:
+    n_records = int((table.schema.metadata or {}).get(b"n_records", b"0"))
+    return columns_to_records(
+        table.column("record").to_pylist(),
+        table.column("field").to_pylist(),
+        table.column("value").to_pylist(),
+        n_records,
+    )
+
+def write_records(path: str | os.PathLike, records: Records) -> str:
+    """Writes records to an Arrow IPC file (or a pickle file if pyarrow is missing)."""
+    path = str(path)
+    if pa is None:
+        with open(path, "wb") as fh:
+            pickle.dump(records_to_columns(records), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+    table = records_to_table(records)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+def read_records(path: str | os.PathLike) -> Records:
+    """
+    Reads records back as Python objects: the whole sheet is copied into the
+    heap. Arrow files are memory-mapped while decoding (no raw read buffer on
+    top of that); memory stays bounded because SpillStore loads one spilled
+    sheet at a time.
+    """
+    path = str(path)
+    if pa is None:
+        with open(path, "rb") as fh:
+            cols = pickle.load(fh)
+        return columns_to_records(cols["record"], cols["field"], cols["value"], cols["n_records"])
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        return table_to_records(table)
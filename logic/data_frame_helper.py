@@ -70,11 +70,15 @@ def export_targets_to_excel(targets: Any,
 
     return str(output_path)
 
-def collect_targets_from_excels(self, excel_files, entity_columns: dict[str, str]) -> list[dict]:
+def collect_targets_from_excels(self, excel_files, entity_columns: dict[str, str],
+                                targets_by_ticket: dict[str, dict] | None = None) -> list[dict]:
         """
         It loops through each Excel file and, if its first word matches a known entity,
         searches its sheets for the configured column and collects *all* non-empty ticket_numbers.
         Returns a list unique by ticket_number (globally).
+
+        Pass the same `targets_by_ticket` dict on every call to collect incrementally,
+        one file at a time (uniqueness is then kept across calls).
         """
         
         def _first_word(text: str) -> str:
@@ -90,7 +94,8 @@ def collect_targets_from_excels(self, excel_files, entity_columns: dict[str, str
                 return normalized.get(target)
         
         # ticket_normalized -> target
-        targets_by_ticket: dict[str, dict] = {}
+        if targets_by_ticket is None:
+            targets_by_ticket = {}
 
         def _norm_ticket(v: str) -> str:
             # normalizer for comparison (avoids duplicates with case/space variations)
@@ -124,7 +129,7 @@ def collect_targets_from_excels(self, excel_files, entity_columns: dict[str, str
                         prev = targets_by_ticket[norm]
                         if prev["entity"] != entity_key:
                             # Conflict: same ticket in another entity → we keep the first one and notify
-                            self.log_updated.emit(
+                            self.log(
                                 f"⚠️ Ticket '{ticket}' already registered for entity '{prev['entity']}'. "
                                 f"I ignore duplicate in '{entity_key}' (file: {filename}, sheet: {sheet_name})."
                             )
@@ -150,13 +155,13 @@ def load_entity_columns_map(self) -> dict[str, str]:
         path = resolve_runtime_path(Path("resources") / "entity_mapping.xlsx")
         
         if not path:
-            self.log_updated.emit("⚠️ entity_mapping.xlsx not found; SharePoint flow will not be applied.")
+            self.log("⚠️ entity_mapping.xlsx not found; SharePoint flow will not be applied.")
             return {}
 
         try:
             df = pd.read_excel(path)  # requires openpyxl
         except Exception as e:
-            self.log_updated.emit(f"❌ The mapping could not be read '{path}': {e}")
+            self.log(f"❌ The mapping could not be read '{path}': {e}")
             return {}
 
         # we normalize column names
@@ -173,7 +178,7 @@ def load_entity_columns_map(self) -> dict[str, str]:
         col_colname = pick("column name", "column", "column_name")
 
         if not (col_entity and col_spdoc and col_colname):
-            self.log_updated.emit("❌ The mapping does not contain expected columns: 'Entity', 'Sharepoint Doc', 'Column Name'.")
+            self.log("❌ The mapping does not contain expected columns: 'Entity', 'Sharepoint Doc', 'Column Name'.")
             return {}
 
         mapping: dict[str, str] = {}
@@ -187,8 +192,8 @@ def load_entity_columns_map(self) -> dict[str, str]:
                 mapping[entity] = colname
 
         if not mapping:
-            self.log_updated.emit(f"⚠️ Empty mapping in '{path}'.")
+            self.log(f"⚠️ Empty mapping in '{path}'.")
             return {}
 
-        self.log_updated.emit(f"✅ Feature mapping loaded ({len(mapping)}): {path}")
+        self.log(f"✅ Feature mapping loaded ({len(mapping)}): {path}")
         return mapping
@@ -36,6 +36,55 @@ def get_visible_sheets(file_path):
         pass
     return visible_sheets
 
+def is_excel_filename(filename):
+    """True for .xlsx/.xls/.csv files that are not Office lock files ('~$...')."""
+    return (filename.endswith(".xlsx") or filename.endswith(".xls") or filename.endswith(".csv")) \
+        and not filename.startswith("~$")
+
+def list_excel_files(folder_path):
+    """
+    Returns the Excel/CSV filenames in the folder, alphabetically, skipping
+    Office lock files ('~$...').
+    """
+    return sorted([f for f in os.listdir(folder_path) if is_excel_filename(f)], key=str.lower)
+
+def read_excel_file(folder_path, filename):
+    """
+    Reads the visible, valid sheets of one file.
+
+    Returns:
+        dict: {sheet_name: DataFrame}; {"Error": DataFrame} if the file can't be read.
+    """
+    full_path = os.path.join(folder_path, filename)
+    try:
+        visible_sheets = get_visible_sheets(full_path)
+        sheets_dict = {}
+
+        for sheet_name in visible_sheets:
+            try:
+                df = pd.read_excel(full_path, sheet_name=sheet_name, engine="openpyxl")
+                if is_valid_sheet(df):
+                    sheets_dict[sheet_name] = df
+            except Exception:
+                continue  # Ignore unreadable sheets
+
+        return sheets_dict
+
+    except Exception as e:
+        return {"Error": pd.DataFrame({"Exception": [str(e)]})}
+
+def iter_excel_files(folder_path, filenames=None):
+    """
+    Yields (filename, {sheet_name: DataFrame}) one file at a time, so callers
+    can release each file's DataFrames before the next one is read.
+
+    Args:
+        folder_path (str): Path to the folder containing Excel files.
+        filenames (list[str] | None): Files to read (default: list_excel_files).
+    """
+    for filename in (filenames if filenames is not None else list_excel_files(folder_path)):
+        yield filename, read_excel_file(folder_path, filename)
+
 def read_excel_files(folder_path):
     """
     Reads all Excel files from the given folder in alphabetical order.
@@ -46,31 +95,4 @@ def read_excel_files(folder_path):
     Returns:
         list of tuple: Each item contains (filename, {sheet_name: DataFrame}).
     """
-    dataframes = []
-
-    # Get and sort valid files alphabetically
-    filenames = sorted([
-        f for f in os.listdir(folder_path)
-        if (f.endswith(".xlsx") or f.endswith(".xls") or f.endswith(".csv")) and not f.startswith("~$")
-    ], key=str.lower)
-
-    for filename in filenames:
-        full_path = os.path.join(folder_path, filename)
-        try:
-            visible_sheets = get_visible_sheets(full_path)
-            sheets_dict = {}
-
-            for sheet_name in visible_sheets:
-                try:
-                    df = pd.read_excel(full_path, sheet_name=sheet_name, engine="openpyxl")
-                    if is_valid_sheet(df):
-                        sheets_dict[sheet_name] = df
-                except Exception:
-                    continue  # Ignore unreadable sheets
-
-            dataframes.append((filename, sheets_dict))
-
-        except Exception as e:
-            dataframes.append((filename, {"Error": pd.DataFrame({"Exception": [str(e)]})}))
-
-    return dataframes
\ No newline at end of file
+    return list(iter_excel_files(folder_path))
@@ -0,0 +1,184 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from logic.file_reader import is_excel_filename, list_excel_files
+from logic.run_journal import file_fingerprint
+
+try:  # optional: filesystem notifications (polling is used without it)
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+DEFAULT_DEBOUNCE_S = 5.0   # a file must stay unchanged this long before it is processed
+DEFAULT_POLL_S = 2.0       # how often pending files are checked
+DEFAULT_RESCAN_S = 60.0    # full folder rescan (safety net for missed notifications, e.g. SMB shares)
+
+class WatchState:
+    """
+    Persistent record of processed workbooks: {filename: {fp, ok, processed}}.
+    A file is (re)processed when its fingerprint (size+mtime) differs from the
+    recorded one; files whose last processing failed are retried on restart.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as fh:
+                    self.files = json.load(fh).get("files", {})
+            except (OSError, ValueError):
+                self.files = {}
+
+    def needs_processing(self, filename: str, fp: str, retry_failed: bool = False) -> bool:
+        with self._lock:
+            rec = self.files.get(filename)
+        if rec is None or rec.get("fp") != fp:
+            return True
+        return retry_failed and not rec.get("ok", False)
+
+    def mark(self, filename: str, fp: str, ok: bool) -> None:
+        with self._lock:
+            self.files[filename] = {"fp": fp, "ok": ok,
+                                    "processed": datetime.now().isoformat(timespec="seconds")}
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"files": self.files}, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)  # atomic: a crash never leaves a half-written state
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "FolderWatcher") -> None:
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory:
+            return
+        for attr in ("src_path", "dest_path"):
+            path = getattr(event, attr, None)
+            if path and os.path.dirname(os.path.abspath(path)) == self.watcher.folder:
+                self.watcher.touch(os.path.basename(path))
+
+class FolderWatcher:
+    """
+    Watches a folder and calls `on_batch(filenames) -> bool` with the Excel files
+    that are new or changed since they were last processed (per WatchState).
+
+    - filesystem notifications through watchdog when installed, polling otherwise,
+      plus a periodic full rescan;
+    - debounce: a file is only handed over after its size+mtime stayed unchanged
+      for `debounce_s` and it can be opened (still being copied/saved otherwise);
+    - Office lock files ('~$...') and non-Excel files are ignored.
+    """
+
+    def __init__(self, folder: str, state: WatchState, on_batch: Callable[[List[str]], bool], *,
+                 debounce_s: float = DEFAULT_DEBOUNCE_S,
+                 poll_s: float = DEFAULT_POLL_S,
+                 rescan_s: float = DEFAULT_RESCAN_S,
+                 log: Callable[[str], None] | None = None) -> None:
+        self.folder = os.path.abspath(folder)
+        self.state = state
+        self.on_batch = on_batch
+        self.debounce_s = debounce_s
+        self.poll_s = poll_s
+        self.rescan_s = rescan_s
+        self.log = log or (lambda msg: None)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple[str | None, float]] = {}  # filename -> (last fp, since)
+
+    # ————— change detection —————
+    def touch(self, filename: str) -> None:
+        if not is_excel_filename(filename):
+            return
+        with self._lock:
+            if filename not in self._pending:
+                self._pending[filename] = (None, time.monotonic())
+
+    def rescan(self, retry_failed: bool = False) -> None:
+        """Queues every file whose fingerprint differs from the persisted state."""
+        for filename in list_excel_files(self.folder):
+            try:
+                fp = file_fingerprint(os.path.join(self.folder, filename))
+            except OSError:
+                continue
+            if self.state.needs_processing(filename, fp, retry_failed):
+                self.touch(filename)
+
+    def _can_open(self, path: str) -> bool:
+        try:
+            with open(path, "rb"):
+                return True
+        except OSError:
+            return False
+
+    def _ready_files(self) -> Dict[str, str]:
+        """Pending files that are stable (debounced); returns {filename: fp}."""
+        now = time.monotonic()
+        ready: Dict[str, str] = {}
+        with self._lock:
+            for filename, (last_fp, since) in list(self._pending.items()):
+                path = os.path.join(self.folder, filename)
+                try:
+                    fp = file_fingerprint(path)
+                except OSError:
+                    del self._pending[filename]  # deleted/renamed meanwhile
+                    continue
+                if fp != last_fp:
+                    self._pending[filename] = (fp, now)  # still changing: restart the debounce
+                    continue
+                if now - since < self.debounce_s or not self._can_open(path):
+                    continue
+                del self._pending[filename]
+                if self.state.needs_processing(filename, fp, retry_failed=True):
+                    ready[filename] = fp
+        return ready
+
+    # ————— main loop —————
+    def run_forever(self, stop: threading.Event | None = None) -> None:
+        stop = stop or threading.Event()
+        observer = None
+        if Observer is not None:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), self.folder, recursive=False)
+            observer.start()
+            self.log(f"👀 Watching {self.folder} (filesystem notifications)")
+        else:
+            self.log(f"👀 Watching {self.folder} (polling every {self.poll_s:.0f}s; install 'watchdog' for notifications)")
+
+        self.rescan(retry_failed=True)  # new/changed/failed files since the last session
+        last_rescan = time.monotonic()
+        try:
+            while not stop.wait(self.poll_s):
+                if observer is None or time.monotonic() - last_rescan >= self.rescan_s:
+                    self.rescan()
+                    last_rescan = time.monotonic()
+
+                ready = self._ready_files()
+                if not ready:
+                    continue
+
+                names = sorted(ready, key=str.lower)
+                self.log(f"📥 {len(names)} new/changed workbook(s): {', '.join(names)}")
+                try:
+                    ok = bool(self.on_batch(names))
+                except Exception as e:
+                    self.log(f"❌ Batch failed: {e}")
+                    ok = False
+                for filename in names:
+                    self.state.mark(filename, ready[filename], ok)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
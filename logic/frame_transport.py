@@ -0,0 +1,265 @@
+"""
+Hands DataFrames / transposed records to other processes through shared memory
+instead of pickling them through a pipe.
+
+Not used by the app yet: the CLI (--jobs) and the UI's process mode send folder
+paths to their worker processes and get logs back, no DataFrames cross a
+process boundary. benchmarks/bench_frame_transport.py measures it against
+pickling, for when a pipeline stage moves to a process pool.
+"""
+from __future__ import annotations
+import mmap
+import os
+import pickle
+import sys
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from logic.columnar import Records, records_to_table, table_to_records
+
+try:  # optional: Arrow IPC (zero-copy reads); pickle is used without it
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+STORAGES = ("shm", "file")
+
+@dataclass(frozen=True)
+class FrameHandle:
+    """
+    Small, picklable reference to a DataFrame or transposed records published by
+    a FrameTransport. Send the handle to the worker process instead of the data.
+    """
+    kind: str      # "frame" | "records"
+    storage: str   # "shm" (multiprocessing.shared_memory) | "file" (memory-mapped file)
+    location: str  # shared memory name or file path
+    size: int      # payload bytes
+    codec: str     # "arrow" (IPC stream) | "pickle"
+
+class FrameTransport:
+    """
+    Owner side of the handoff: publishes DataFrames / transposed records as Arrow
+    IPC streams in shared memory (or memory-mapped files under `spill_dir`) and
+    frees them on release()/close(), at the latest when the transport is garbage
+    collected or the interpreter exits.
+
+        with FrameTransport() as transport:
+            handle = transport.put_frame(df)
+            pool.submit(render, handle).result()   # worker: load_frame(handle)
+            transport.release(handle)
+
+    Frames Arrow cannot type (e.g. mixed int/str object columns) and installs
+    without pyarrow fall back to pickle (protocol 5), still via shared memory.
+    """
+
+    def __init__(self, storage: str = "shm", spill_dir: str | os.PathLike | None = None) -> None:
+        if storage not in STORAGES:
+            raise ValueError(f"storage must be one of {STORAGES}, got {storage!r}")
+        if storage == "file" and spill_dir is None:
+            raise ValueError("storage='file' needs a spill_dir")
+        self.storage = storage
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._lock = threading.Lock()
+        self._live: Dict[str, Any] = {}  # location -> SharedMemory | None (file)
+        self._finalizer = weakref.finalize(self, _release_all, self._live, self._lock)
+
+    # ————— publish —————
+    def put_frame(self, df) -> FrameHandle:
+        if pa is not None:
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                table = None
+            if table is not None:
+                return self._put_table("frame", table)
+        return self._put_pickle("frame", df)
+
+    def put_records(self, records: Records) -> FrameHandle:
+        if pa is not None:
+            return self._put_table("records", records_to_table(records))
+        return self._put_pickle("records", records)
+
+    def _put_table(self, kind: str, table) -> FrameHandle:
+        sizer = pa.MockOutputStream()
+        with pa.ipc.new_stream(sizer, table.schema) as writer:
+            writer.write_table(table)
+        size = sizer.size()
+
+        def _write(buf) -> None:  # serialize straight into the shared buffer (no staging copy)
+            with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(buf)), table.schema) as writer:
+                writer.write_table(table)
+
+        return self._publish(kind, "arrow", size, _write)
+
+    def _put_pickle(self, kind: str, obj: Any) -> FrameHandle:
+        payload = pickle.dumps(obj, protocol=5)
+
+        def _write(buf) -> None:
+            buf[:len(payload)] = payload
+
+        return self._publish(kind, "pickle", len(payload), _write)
+
+    def _publish(self, kind: str, codec: str, size: int, write) -> FrameHandle:
+        if self.storage == "shm":
+            shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+            try:
+                _write_view(shm.buf, size, write)
+            except BaseException:
+                _close_shm(shm, unlink=True)
+                raise
+            location, resource = shm.name, shm
+        else:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            location = str(self.spill_dir / f"{kind}_{uuid.uuid4().hex}.{codec}")
+            with open(location, "w+b") as fh:
+                fh.truncate(size)
+                if size:
+                    with mmap.mmap(fh.fileno(), size) as mm:
+                        _write_view(mm, size, write)
+            resource = None
+        with self._lock:
+            self._live[location] = resource
+        return FrameHandle(kind, self.storage, location, size, codec)
+
+    # ————— release —————
+    def release(self, handle: FrameHandle) -> None:
+        """Frees the data behind `handle` (safe to call twice)."""
+        with self._lock:
+            if handle.location not in self._live:
+                return
+            resource = self._live.pop(handle.location)
+        _free(handle.location, resource)
+
+    def close(self) -> None:
+        """Frees everything still published by this transport."""
+        self._finalizer()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._live)
+
+    def __enter__(self) -> "FrameTransport":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _write_view(target, size: int, write) -> None:
+    view = memoryview(target)[:size]
+    try:
+        write(view)
+    finally:
+        view.release()
+
+def _free(location: str, resource) -> None:
+    if resource is not None:
+        _close_shm(resource, unlink=True)
+    else:
+        try:
+            os.remove(location)
+        except OSError:
+            pass
+
+def _release_all(live: Dict[str, Any], lock: threading.Lock) -> None:
+    with lock:
+        items = list(live.items())
+        live.clear()
+    for location, resource in items:
+        _free(location, resource)
+
+def _close_shm(shm, unlink: bool = False) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        pass  # a zero-copy view is still alive; the OS frees it with the last handle
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def _attach_shm(name: str):
+    """
+    Opens an existing segment. Worker processes started by multiprocessing share
+    the owner's resource tracker, so attaching never unlinks it on worker exit;
+    3.13+ skips tracking attached segments altogether.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+# ————— consumer side (any process) —————
+@contextmanager
+def open_buffer(handle: FrameHandle) -> Iterator[memoryview]:
+    """Maps the payload of `handle` read-only for the duration of the block."""
+    if handle.storage == "shm":
+        shm = _attach_shm(handle.location)
+        view = shm.buf[:handle.size]
+        try:
+            yield view
+        finally:
+            _release_view(view)
+            _close_shm(shm)
+    else:
+        with open(handle.location, "rb") as fh:
+            if not handle.size:
+                yield memoryview(b"")
+                return
+            mm = mmap.mmap(fh.fileno(), handle.size, access=mmap.ACCESS_READ)
+            view = memoryview(mm)
+            try:
+                yield view
+            finally:
+                _release_view(view)
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # closed by the GC once the last zero-copy view is gone
+
+def _release_view(view: memoryview) -> None:
+    try:
+        view.release()
+    except BufferError:
+        pass  # something still exports it (e.g. an Arrow table kept past the block)
+
+@contextmanager
+def open_table(handle: FrameHandle):
+    """
+    Zero-copy pyarrow.Table over the shared payload; the table (and arrays taken
+    from it) must not be used after the block. Arrow-coded handles only.
+    """
+    if handle.codec != "arrow":
+        raise ValueError(f"{handle.location} is pickle-coded; use load_frame/load_records")
+    with open_buffer(handle) as buf:
+        yield pa.ipc.open_stream(pa.py_buffer(buf)).read_all()
+
+def _load(handle: FrameHandle, convert):
+    with open_buffer(handle) as buf:
+        if handle.codec == "pickle":
+            return pickle.loads(buf)
+        table = pa.ipc.open_stream(pa.py_buffer(buf)).read_all()
+        try:
+            return convert(table)
+        finally:
+            del table  # drop the zero-copy view before the buffer is unmapped
+
+def load_frame(handle: FrameHandle):
+    """Materializes the DataFrame behind `handle` in this process."""
+    if handle.codec == "pickle":
+        return _load(handle, None)
+    # to_pandas() keeps numeric and Arrow-backed string columns as views of the
+    # Arrow buffers: decode a private copy, so the frame never points into the
+    # shared segment (which is then unmapped at the end of the block)
+    with open_buffer(handle) as buf:
+        data = pa.py_buffer(bytes(buf))
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def load_records(handle: FrameHandle) -> Records:
+    """Materializes the transposed records behind `handle` in this process."""
+    return _load(handle, table_to_records)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+CACHE_NAME = "lookup_cache.sqlite"
+CACHE_ENV = "LOOKUP_CACHE"  # path of the cache file, or "off"
+
+# kinds of cached lookups
+KIND_OBJECT_ID = "object_id"          # (environment, "entity:ticket") -> object_id
+KIND_RELATIVE_URLS = "relative_urls"  # (environment, query hash:object_id) -> [relativeurl, ...]
+
+DAY = 24 * 3600
+DEFAULT_TTLS = {
+    KIND_OBJECT_ID: 30 * DAY,     # record ids never change; only deletions/merges make them stale
+    KIND_RELATIVE_URLS: 1 * DAY,  # document locations are added while a case is worked on
+}
+DEFAULT_NEGATIVE_TTL = 3600       # "not found" is remembered for a short time only
+DEFAULT_MAX_ENTRIES = 200_000
+SQLITE_VARS = 500                 # keys per IN (...) query (SQLite's limit is 999 on old builds)
+
+def object_id_key(entity: str, ticket_number: str) -> str:
+    return f"{(entity or '').strip().lower()}:{(ticket_number or '').strip().casefold()}"
+
+def location_key(object_id: str, query: str = "") -> str:
+    """`query` is what selects the locations (LOCATION_QUERY...): entries cached under another one never match."""
+    oid = (object_id or "").strip().lower()
+    if not query:
+        return oid
+    return f"{hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]}:{oid}"
+
+class LookupCache:
+    """
+    On-disk (SQLite) cache of Dataverse lookups, shared by runs and processes.
+
+    - entries are keyed by (kind, environment, key), so several Dataverse
+      environments never mix;
+    - every kind has its own TTL; negative results (value None, e.g. a ticket
+      without match) use the shorter `negative_ttl`;
+    - at most `max_entries` rows are kept: least recently used ones are evicted.
+
+    get_many() returns {key: value} for fresh entries only (value None = known
+    negative). With bypass=True reads always miss but results are still stored,
+    so a bypassing run refreshes the cache for the next ones.
+    """
+
+    def __init__(self, path: str | os.PathLike, environment: str, *,
+                 ttls: Dict[str, float] | None = None,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 bypass: bool = False) -> None:
+        self.path = Path(path)
+        self.environment = (environment or "").rstrip("/").lower()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # WAL + busy timeout: CLI jobs in parallel processes share the file
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            " kind TEXT NOT NULL, env TEXT NOT NULL, key TEXT NOT NULL,"
+            " value TEXT, expires REAL NOT NULL, used REAL NOT NULL,"
+            " PRIMARY KEY (kind, env, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS lookups_used ON lookups (used)")
+        self._db.commit()
+
+    def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(k for k in keys if k))
+        if self.bypass or not keys:
+            self.misses += len(keys)
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_VARS):
+                part = keys[i:i + SQLITE_VARS]
+                rows = self._db.execute(
+                    f"SELECT key, value FROM lookups WHERE kind = ? AND env = ? AND expires > ?"
+                    f" AND key IN ({','.join('?' * len(part))})",
+                    (kind, self.environment, now, *part),
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = None if value is None else json.loads(value)
+            if found:
+                self._db.executemany("UPDATE lookups SET used = ? WHERE kind = ? AND env = ? AND key = ?",
+                                     [(now, kind, self.environment, k) for k in found])
+                self._db.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, kind: str, items: Dict[str, Any]) -> None:
+        """Stores {key: value}; None (or an empty list) is stored as a negative result."""
+        if not items:
+            return
+        now = time.time()
+        ttl = self.ttls.get(kind, DAY)
+        rows = []
+        for key, value in items.items():
+            if not key:
+                continue
+            negative = value is None or value == []
+            rows.append((kind, self.environment, key, None if value is None else json.dumps(value),
+                         now + (self.negative_ttl if negative else ttl), now))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM lookups WHERE expires <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM lookups").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM lookups WHERE rowid IN (SELECT rowid FROM lookups ORDER BY used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM lookups")
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+def _env_float(name: str, default: float) -> float:
+    from dataverse_apis.core.services.env_loader import get_env_variable_value
+    try:
+        return float(get_env_variable_value(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+def default_cache_path() -> Path | None:
+    """LOOKUP_CACHE from .env/environment ("off" disables it); default in the user data folder."""
+    from dataverse_apis.core.services.env_loader import get_env_variable_value
+    from dataverse_apis.core.services.runtime_paths import user_data_dir
+
+    value = (get_env_variable_value(CACHE_ENV) or "").strip()
+    if value.lower() in ("off", "none", "0", "false"):
+        return None
+    return Path(value) if value else user_data_dir() / CACHE_NAME
+
+def open_lookup_cache(bypass: bool = False,
+                      log: Callable[[str], None] | None = None) -> LookupCache | None:
+    """
+    The lookup cache for the configured Dataverse environment, or None when it
+    is disabled or can't be opened (the run then simply queries Dataverse).
+    TTLs (hours) and size come from LOOKUP_CACHE_TTL_IDS_H, LOOKUP_CACHE_TTL_URLS_H,
+    LOOKUP_CACHE_NEGATIVE_TTL_H and LOOKUP_CACHE_MAX_ENTRIES.
+    """
+    log = log or (lambda msg: None)
+    try:
+        path = default_cache_path()
+        if path is None:
+            return None
+        from dataverse_apis.core.auth.msal_auth import get_auth_settings
+
+        return LookupCache(
+            path,
+            get_auth_settings().api_url,
+            ttls={
+                KIND_OBJECT_ID: _env_float("LOOKUP_CACHE_TTL_IDS_H", DEFAULT_TTLS[KIND_OBJECT_ID] / 3600) * 3600,
+                KIND_RELATIVE_URLS: _env_float("LOOKUP_CACHE_TTL_URLS_H", DEFAULT_TTLS[KIND_RELATIVE_URLS] / 3600) * 3600,
+            },
+            negative_ttl=_env_float("LOOKUP_CACHE_NEGATIVE_TTL_H", DEFAULT_NEGATIVE_TTL / 3600) * 3600,
+            max_entries=int(_env_float("LOOKUP_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            bypass=bypass,
+        )
+    except Exception as e:
+        log(f"⚠️ Lookup cache unavailable ({e}) — every lookup goes to Dataverse.")
+        return None
@@ -261,10 +261,12 @@ def generate_combined_pdf(all_data, output_path, log_callback=None):
 
         combined_file = os.path.join(output_path, "DataFlipper_Export.pdf")
         pdf.output(combined_file)
+        return combined_file
     except Exception as e:
         raise Exception(f"PDF generation error (Combined): {str(e)}")
 
 def generate_pdf_per_excel(data_by_excel_file, output_path, log_callback=None):
+    output_files = []
     try:
         for filename, sheets_data in data_by_excel_file.items():
             printed_on = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -279,5 +281,7 @@ def generate_pdf_per_excel(data_by_excel_file, output_path, log_callback=None):
             output_filename = os.path.splitext(filename)[0] + "_Export.pdf"
             output_file = os.path.join(output_path, output_filename)
             pdf.output(output_file)
+            output_files.append(output_file)
+        return output_files
     except Exception as e:
         raise Exception(f"PDF generation error (Per Excel File): {str(e)}")
\ No newline at end of file
@@ -0,0 +1,346 @@
+from __future__ import annotations
+import gc
+import os
+from typing import Callable
+from logic.data_frame_helper import collect_targets_from_excels, export_targets_to_excel, load_entity_columns_map
+from logic.file_reader import list_excel_files, read_excel_file
+from logic.transposer import transpose_row_by_row
+from logic.pdf_generator import (
+    generate_pdf,
+    generate_combined_pdf,
+    generate_pdf_per_excel,
+)
+from logic.run_journal import (
+    RunJournal, KIND_SHEET, KIND_EXCEL, KIND_COMBINED,
+    file_fingerprint, combine_fingerprints,
+)
+from logic.spill_store import SpillStore
+from dataverse_apis.core.services.env_loader import get_env_variable_value
+from dataverse_apis.core.logging.run_report import RunReport, start_run_report, timed
+from dataverse_apis.core.services.request_coalescing import memo_scope
+
+RUN_REPORT_NAME = "run_report.json"
+
+EXPORT_MODES = ("separate", "combined", "per_excel")
+PROCESS_TYPES = ("transpose_only", "transpose_and_docs", "docs_only")
+
+DEFAULT_MEMORY_BUDGET_MB = 512  # transposed data kept in RAM by combined mode before spilling
+SPILL_DIRNAME = ".spill"
+
+def _memory_budget_mb(value: int | None) -> int:
+    if value is not None:
+        return int(value)
+    try:
+        return int(get_env_variable_value("MEMORY_BUDGET_MB", str(DEFAULT_MEMORY_BUDGET_MB)))
+    except ValueError:
+        return DEFAULT_MEMORY_BUDGET_MB
+
+class ProcessingPipeline:
+    """
+    The transpose/PDF and related-documents flows, free of any Qt dependency.
+
+    Used by WorkerThread (GUI) and by the headless CLI (python -m dataflipper).
+    Progress and logs are reported through plain callbacks.
+    """
+
+    def __init__(self, folder_path: str, export_mode: str, process_type: str, *,
+                 output_dir: str = "output",
+                 resume: bool = False,
+                 bypass_cache: bool = False,
+                 memory_budget_mb: int | None = None,
+                 filenames: list[str] | None = None,
+                 log: Callable[[str], None] | None = None,
+                 progress: Callable[[int], None] | None = None,
+                 log_pdf: Callable[[str], None] | None = None) -> None:
+        """
+        :param folder_path: Path to the folder containing Excel files
+        :param export_mode: "separate", "per_excel" or "combined".
+        :param process_type: "transpose_only", "transpose_and_docs" or "docs_only".
+        :param output_dir: Where PDFs, targets.xlsx and the run journal are written.
+        :param resume: Skip units already completed by the last run with the
+            same folder/options (see logic.run_journal).
+        :param bypass_cache: Query Dataverse for every ticket/location instead of
+            reusing the lookup cache of earlier runs (results still refresh it).
+        :param memory_budget_mb: RAM allowed for data combined mode keeps until
+            the end; beyond it sheets are spilled to disk. Default: MEMORY_BUDGET_MB
+            env var or 512.
+        :param filenames: Only process these files of the folder (default: all
+            Excel files, see file_reader.list_excel_files).
+        """
+        self.folder_path = folder_path
+        self.export_mode = export_mode
+        self.process_type = process_type
+        self.output_dir = output_dir
+        self.resume = resume
+        self.bypass_cache = bypass_cache
+        self.memory_budget_bytes = _memory_budget_mb(memory_budget_mb) * 1024 * 1024
+        self.filenames = filenames
+        self.journal: RunJournal | None = None
+        self.report: RunReport | None = None
+        self.errors: list[str] = []
+        self._log_cb = log or (lambda msg: None)
+        self._progress_cb = progress or (lambda pct: None)
+        self.log_pdf = log_pdf or (lambda msg: None)
+
+        # status of progress
+        self._p_total = 1
+        self._p_done = 0
+        self._p_last = 0
+
+    # ----------------------------- Driver -----------------------------
+    def run(self) -> bool:
+        """Runs the selected flows. Returns True if everything succeeded (see .errors)."""
+        ok = True
+        self.report = start_run_report()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._open_journal()
+            with memo_scope():  # identical Dataverse GETs are sent once per run
+                self._process_files()
+
+        except Exception as e:
+            self._log_error("Unexpected error", e)
+            ok = False
+        finally:
+            if self.journal:
+                self.journal.close()
+            self._write_run_report()
+
+        # always close at 100%
+        self._p_finish()
+        return ok and not self.errors
+
+    def _write_run_report(self):
+        try:
+            path = self.report.write(os.path.join(self.output_dir, RUN_REPORT_NAME))
+            for line in self.report.summary_lines():
+                self.log(line)
+            self.log(f"📊 Timing report: {path}")
+        except Exception as e:
+            self.log(f"⚠️ Could not write the run report: {e}")
+
+    def log(self, msg: str):
+        self._log_cb(msg)
+
+    def progress(self, pct: int):
+        self._progress_cb(pct)
+        
+    # --------------------------- Option Helpers ------------------------------
+    def _should_transpose(self) -> bool:
+        return self.process_type in ("transpose_only", "transpose_and_docs")
+
+    def _should_get_docs(self) -> bool:
+        return self.process_type in ("transpose_and_docs", "docs_only")
+
+    def _open_journal(self):
+        params = {
+            "folder": os.path.abspath(self.folder_path),
+            "export_mode": self.export_mode,
+            "process_type": self.process_type,
+        }
+        self.journal = RunJournal(self.output_dir, params, resume=self.resume)
+        if self.resume and self.journal.resumed:
+            self.log("♻️ Resuming last run: completed units with unchanged inputs will be skipped.")
+        elif self.resume:
+            self.log("⚠️ No matching previous run to resume — starting from scratch.")
+
+    def _file_fp(self, filename: str) -> str:
+        try:
+            return file_fingerprint(os.path.join(self.folder_path, filename))
+        except OSError:
+            return ""
+
+    def _log_error(self, message: str, exc: Exception):
+        msg = f"❌ {message}: {exc}"
+        self.log(msg)
+        self.errors.append(msg)
+        
+    # --- Progress helpers -------------------------------------------------
+    def _p_init(self, total_steps: int):
+        # avoid division by zero
+        self._p_total = max(1, int(total_steps))
+        self._p_done = 0
+        self.progress(0)
+
+    def _p_add(self, extra_steps: int):
+        # allows you to add steps dynamically (e.g. after knowing #urls)
+        if extra_steps > 0:
+            self._p_total += int(extra_steps)
+
+    def _p_step(self, n: int = 1):
+        self._p_done += n
+        pct = int(min(99, (self._p_done / self._p_total) * 100))
+        # steps are added as files are read: never move the bar backwards
+        self._p_last = max(self._p_last, pct)
+        self.progress(self._p_last)
+
+    def _p_finish(self):
+        self.progress(100)
+        
+    # ---------------------------- Per-file pipeline ----------------------------
+    def _process_files(self):
+        """
+        Reads one file at a time: transposes/exports it and collects its targets,
+        then releases its DataFrames before reading the next file. Only combined
+        mode keeps data until the end, bounded by the memory budget (SpillStore).
+        """
+        self.log("📂 Reading Excel files...")
+        filenames = list(self.filenames) if self.filenames is not None else list_excel_files(self.folder_path)
+        if not filenames:
+            self.log("⚠️ No Excel files found.")
+
+        transpose = self._should_transpose()
+        get_docs = self._should_get_docs()
+        entity_columns = load_entity_columns_map(self) if get_docs else {}
+        targets_by_ticket: dict[str, dict] = {}  # ticket_normalized -> target (global uniqueness)
+
+        combined_fp = combine_fingerprints(f"{fn}={self._file_fp(fn)}" for fn in filenames)
+        if transpose and self.export_mode == "combined" and self.journal.get(KIND_COMBINED, "combined", combined_fp):
+            self.log("⏭ Combined PDF already generated by the last run with the same files — skipped.")
+            transpose = False
+
+        # 1 step per file read (+2 for the combined PDF); sheet steps are added as files are read
+        combined_mode = transpose and self.export_mode == "combined"
+        self._p_add(len(filenames) + (2 if combined_mode else 0))
+
+        combined = SpillStore(self.memory_budget_bytes, os.path.join(self.output_dir, SPILL_DIRNAME)) if combined_mode else None
+        try:
+            for filename in filenames:
+                spilled_before = combined.spilled if combined is not None else 0
+                with timed("excel_read", file=filename):
+                    sheets = read_excel_file(self.folder_path, filename)
+                self._p_step(1)
+                if transpose:
+                    self._transpose_file(filename, sheets, combined)
+                if entity_columns:
+                    collect_targets_from_excels(self, [(filename, sheets)], entity_columns, targets_by_ticket)
+                # release this file's DataFrames before the next one is read; a full
+                # collection only pays off when this file pushed data over the budget
+                del sheets
+                if combined is not None and combined.spilled > spilled_before:
+                    gc.collect()
+
+            if combined is not None:
+                self._export_combined(combined, combined_fp)
+        finally:
+            if combined is not None:
+                combined.close()
+
+        if get_docs and entity_columns:
+            self._related_documents_flow(list(targets_by_ticket.values()), entity_columns)
+
+    # ------------------------ Transpose / PDF flow --------------------
+    def _transpose_file(self, filename, sheets, combined: SpillStore | None):
+        file_fp = self._file_fp(filename)
+        per_excel = self.export_mode == "per_excel"
+
+        # static steps (2 per sheet with data: process + export/enqueue) + 1 per file in per_excel mode
+        sheet_steps = 2 * sum(1 for df in sheets.values() if df is not None and not df.empty)
+        self._p_add(sheet_steps + (1 if per_excel and sheets else 0))
+
+        if per_excel and sheets and self.journal.get(KIND_EXCEL, filename, file_fp):
+            self.log(f"⏭ Already exported in the last run: {filename}")
+            self._p_step(sheet_steps + 1)
+            return
+
+        file_rows = []  # per_excel: [(sheet, transposed), ...] of this file only
+        for sheet_name, df in sheets.items():
+            if df.empty:
+                continue
+            if self.export_mode == "separate" and self.journal.get(KIND_SHEET, f"{filename}::{sheet_name}", file_fp):
+                self.log(f"⏭ Already rendered in the last run: {filename} - {sheet_name}")
+                self._p_step(2)
+                continue
+            try:
+                self.log(f"📄 Processing: {filename} - Sheet: {sheet_name}")
+                with timed("transpose", file=filename, sheet=sheet_name, rows=len(df)):
+                    transposed = transpose_row_by_row(df)
+                self._collect_export_units(filename, sheet_name, transposed, combined, file_rows, file_fp)
+                self._p_step(2)  # processing + export/gluing
+                self.log(f"✔ Done: {filename} - {sheet_name}\n")
+            except Exception as e:
+                self._log_error(f"Error in {filename} - {sheet_name}", e)
+
+        if per_excel and file_rows:
+            self._export_excel_file(filename, file_rows, file_fp)
+
+    def _collect_export_units(self, filename, sheet_name, df_transposed, combined, file_rows, file_fp):
+        """Decide what to do with each sheet based on the export_mode."""
+        if self.export_mode == "combined":
+            title = f"{filename} - {sheet_name}"
+            combined.append(title, df_transposed)
+        elif self.export_mode == "per_excel":
+            file_rows.append((sheet_name, df_transposed))
+        else:  # "separate"
+            with timed("pdf_render", file=filename, sheet=sheet_name):
+                output_file = generate_pdf(
+                    df_transposed,
+                    self.output_dir,
+                    filename,
+                    sheet_name,
+                    log_callback=self.log_pdf,
+                )
+            self.journal.mark(KIND_SHEET, f"{filename}::{sheet_name}", file_fp, output=output_file)
+
+    def _export_excel_file(self, filename, rows, file_fp: str):
+        try:
+            self.log(f"📁 Generating PDF for Excel file: {filename}")
+            with timed("pdf_render", file=filename):
+                output_files = generate_pdf_per_excel({filename: rows}, self.output_dir, log_callback=self.log_pdf)
+            self.journal.mark(KIND_EXCEL, filename, file_fp, output=output_files[0])
+        except Exception as e:
+            self._log_error(f"Export error ({filename})", e)
+        self._p_step(1)
+
+    def _export_combined(self, combined: SpillStore, combined_fp: str):
+        try:
+            self.log("📄 Generating combined PDF...")
+            if combined.spilled:
+                self.log(f"💾 {combined.spilled} sheet(s) were spilled to disk to stay within the memory budget.")
+            with timed("pdf_render", file="<combined>", sheets=len(combined)):
+                output_file = generate_combined_pdf(combined, self.output_dir, log_callback=self.log_pdf)
+            self.journal.mark(KIND_COMBINED, "combined", combined_fp, output=output_file)
+            self._p_step(2)  # pre + post (already mentioned above)
+        except Exception as e:
+            self._log_error("Final export error", e)
+                        
+    # ---------------------- Related documents flow ------------------------    
+    def _related_documents_flow(self, targets: list[dict], entity_columns: dict[str, str]):
+        """
+        Resolves and downloads the related documents of the targets collected
+        (unique ticket numbers per entity) from Excel files whose filename
+        matches the entity.
+        """
+        if not targets:
+            self.log("⚠️ No matching entities/tickets found para SharePoint.")
+            return
+
+        # 2) Enrich with relative+sharepoint urls
+        # imported here: Dataverse/SharePoint/selenium are only needed for the docs flow
+        from logic.related_documents_service import RelatedDocumentsService, to_targets, to_dicts
+        from logic.lookup_cache import open_lookup_cache
+        cache = open_lookup_cache(bypass=self.bypass_cache, log=self.log)
+        resolver = RelatedDocumentsService(logger=self.log, journal=self.journal, cache=cache,
+                                           fingerprint=self._file_fp)
+        try:
+            targets = to_targets(targets) # dicts -> dataclasses
+            restored = resolver.restore_from_journal(targets)
+            if restored:
+                self.log(f"♻️ {restored} target(s) already resolved in the last run.")
+            # targets = resolver.enrich_with_sharepoint_urls(targets) # add object_id, relative_url, sharepoint_url        
+            
+            # progreso: 1 paso por target + 1 para export a excel
+            self._p_add(len(targets) + 1)
+            
+            # 3) Export targets with URLs to Excel
+            outfile = os.path.join(self.output_dir, "targets.xlsx")
+            with timed("targets_export", targets=len(targets)):
+                export_targets_to_excel(to_dicts(targets), outfile, entity_columns)
+            
+            # 4) Download (the method is responsible for resolving relative+sharepoint URLs if ensure_urls=True)
+            resolver.download_sharepoint_documents(targets, ensure_urls=True)
+        finally:
+            if cache:
+                self.log(f"💾 Lookup cache: {cache.hits} hit(s), {cache.misses} miss(es)"
+                         + (" (bypassed)" if cache.bypass else ""))
+                cache.close()
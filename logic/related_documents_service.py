@@ -1,9 +1,48 @@
 from __future__ import annotations
 from dataclasses import dataclass, asdict, field
 from typing import Callable, Iterable, List, Dict, Any
-from dataverse_apis.core.automation.sharepoint.sharepoint_downloader import download_from_sharepoint, extract_related_zip
+from dataverse_apis.core.automation.sharepoint.sharepoint_downloader import download_from_sharepoint, extract_related_zip, ticket_download_dir
+from dataverse_apis.core.services.concurrency import concurrency as dv_concurrency, map_ordered
 from dataverse_apis.core.services.dataverse_client import call_dataverse
-from dataverse_apis.tasks.sharepoint_documents import build_sharepoint_folder_url, get_relativeurls_for_object_id
+from dataverse_apis.core.services.dataverse_query import lookup_by_keys, normalize_key
+from dataverse_apis.tasks.sharepoint_documents import (
+    build_sharepoint_folder_url, get_relativeurls_for_object_id, get_relativeurls_for_object_ids,
+    location_expand_options, location_query_signature,
+)
+from dataverse_apis.core.logging.run_report import current_report, timed
+from logic.lookup_cache import LookupCache, KIND_OBJECT_ID, KIND_RELATIVE_URLS, object_id_key, location_key
+from logic.run_journal import RunJournal, KIND_TARGET, KIND_DOWNLOAD, target_key
+
+# entity -> (entity set, key column, id column)
+ENTITY_LOOKUPS: Dict[str, tuple[str, str, str]] = {
+    "account": ("accounts", "accountnumber", "accountid"),
+    "case": ("incidents", "ticketnumber", "incidentid"),
+    "ecase": ("icps_ecases", "icps_name", "icps_ecaseid"),
+    "inspection": ("icps_inspections", "icps_name", "icps_inspectionid"),
+    "investigation": ("icps_investigations", "icps_name", "icps_investigationid"),
+}
+
+# entity -> collection-valued navigation property to its sharepointdocumentlocations
+# (the regarding relationship), so one query returns the id and its locations.
+# Entities missing here, or whose property is rejected, use the two-step path.
+LOCATION_EXPANDS: Dict[str, str] = {
+    "account": "Account_SharepointDocumentLocation",
+    "case": "Incident_SharepointDocumentLocations",
+    "ecase": "icps_ecase_SharePointDocumentLocations",
+    "inspection": "icps_inspection_SharePointDocumentLocations",
+    "investigation": "icps_investigation_SharePointDocumentLocations",
+}
+
+def _expand_rejected(error: str, nav: str) -> bool:
+    """A 400 naming the navigation property: Dataverse doesn't know it (not a transient failure)."""
+    return "HTTP: 400" in error and nav.lower() in error.lower()
+
+def _web_api_url_length() -> int:
+    try:
+        from dataverse_apis.core.auth.msal_auth import get_auth_settings
+        return len(get_auth_settings().webapi_url)
+    except Exception:
+        return 100
 
 # --- Simple and extensible model ---
 @dataclass
@@ -43,13 +82,33 @@ class RelatedDocumentsService:
     def __init__(self, dv_call: Callable[[str], Dict[str, Any]] = call_dataverse,
                  logger: Callable[[str], None] | None = None,
                  relurl_resolver: Callable[[str], List[str]] = get_relativeurls_for_object_id,
+                 relurls_bulk_resolver: Callable[..., Dict[str, List[str]]] | None = get_relativeurls_for_object_ids,
                  sp_url_builder: Callable[[str, str], str] = build_sharepoint_folder_url,
-                 sp_downloader: Callable[[str, str], Any] = download_from_sharepoint) -> None:
+                 sp_downloader: Callable[[str, str], Any] = download_from_sharepoint,
+                 journal: RunJournal | None = None,
+                 filter_style: str = "in",
+                 base_url_length: int | None = None,
+                 concurrency: int | None = None,
+                 cache: LookupCache | None = None,
+                 expand_locations: bool = True,
+                 fingerprint: Callable[[str], str] | None = None) -> None:
         self.dv_call = dv_call
         self.log = logger or (lambda msg: None)
         self.relurl_resolver = relurl_resolver
+        self.relurls_bulk_resolver = relurls_bulk_resolver  # None: one query per object_id
         self.sp_url_builder = sp_url_builder
         self.sp_downloader = sp_downloader
+        self.journal = journal
+        self.fingerprint = fingerprint  # source file -> fingerprint, checked by the journal entries
+        self._fps: Dict[str, str] = {}
+        self.filter_style = filter_style  # "in" (Microsoft.Dynamics.CRM.In) or "or" (eq ... or eq ...)
+        self.base_url_length = base_url_length if base_url_length is not None else _web_api_url_length()
+        self.concurrency = max(1, concurrency or dv_concurrency())  # in-flight Dataverse requests
+        self.cache = cache  # persistent lookups across runs (see logic.lookup_cache)
+        self.expand_locations = expand_locations  # ids + locations in one request (LOCATION_EXPANDS)
+        self._no_expand: set[str] = set()         # entities whose $expand failed this session
+        self._locations_done: set[str] = set()    # object ids whose locations came with the id
+        self._location_query: str | None = None   # location_query_signature(), read on first use
         
      # ————— helpers —————
     @staticmethod
@@ -59,88 +118,278 @@ class RelatedDocumentsService:
             if x not in seen:
                 seen.add(x); out.append(x)
         return out
+
+    def _location_key(self, object_id: str) -> str:
+        """Cache key of an object's locations: a LOCATION_QUERY/$expand change invalidates it."""
+        if self._location_query is None:
+            self._location_query = location_query_signature()
+        return location_key(object_id, self._location_query)
+
+    # ————— checkpoint journal (resume) —————
+    def _target_fp(self, t: Target) -> str:
+        """Fingerprint of the file the target was read from ("" without a fingerprint function)."""
+        if not self.fingerprint or not t.file:
+            return ""
+        if t.file not in self._fps:
+            self._fps[t.file] = self.fingerprint(t.file)
+        return self._fps[t.file]
+
+    def restore_from_journal(self, targets: List[Target]) -> int:
+        """
+        Pre-fills object_id/relative_urls of targets already resolved in a
+        previous run, if the file they were read from is unchanged.
+        """
+        if not self.journal:
+            return 0
+        restored = 0
+        for t in targets:
+            rec = self.journal.get(KIND_TARGET, target_key(t.entity, t.ticket_number), self._target_fp(t))
+            if rec and rec.get("object_id"):
+                t.object_id = rec["object_id"]
+                t.relative_urls = list(rec.get("relative_urls") or [])
+                restored += 1
+        return restored
+
+    def _journal_target(self, t: Target) -> None:
+        if self.journal and t.object_id:
+            self.journal.mark(KIND_TARGET, target_key(t.entity, t.ticket_number), self._target_fp(t),
+                              object_id=t.object_id, relative_urls=list(t.relative_urls))
+
+    # ————— persistent lookup cache —————
+    def _cached(self, kind: str, keys: List[str]) -> Dict[str, Any]:
+        if not self.cache or not keys:
+            return {}
+        try:
+            found = self.cache.get_many(kind, keys)
+        except Exception as e:
+            self.log(f"⚠️ Lookup cache read failed: {e}")
+            return {}
+        current_report().count(f"cache_{kind}_hits", len(found))
+        current_report().count(f"cache_{kind}_misses", len(set(keys)) - len(found))
+        return found
+
+    def _cache_put(self, kind: str, items: Dict[str, Any]) -> None:
+        if self.cache and items:
+            try:
+                self.cache.put_many(kind, items)
+            except Exception as e:
+                self.log(f"⚠️ Lookup cache write failed: {e}")
+
+    def _already_downloaded(self, t: Target) -> bool:
+        return bool(self.journal
+                    and self.journal.get(KIND_DOWNLOAD, t.ticket_number, self._target_fp(t))
+                    and ticket_download_dir(t.ticket_number).exists())
     
     # 1) get object_id por entidad/ticket_number
     def resolve_object_ids(self, targets: List[Target]) -> List[Target]:
-        """Iterate targets and add .object_id based on the entity."""
+        """
+        Add .object_id to the targets: targets are grouped by entity and their
+        keys resolved with one filter per chunk (see dataverse_query.lookup_by_keys),
+        so N tickets cost about N / chunk size requests instead of N.
+        Entities and chunks are queried concurrently (at most `concurrency`
+        requests in flight); results and logs keep the order of `targets`.
+        Tickets found in the lookup cache (including cached "not found") are
+        not queried again.
+
+        With expand_locations, the SharePoint document locations come back in
+        the same request ($expand on LOCATION_EXPANDS, with the conditions of
+        LOCATION_QUERY), so resolve_relative_urls has nothing left to query for
+        those targets. If Dataverse rejects the navigation property (400), the
+        entity falls back to the plain lookup (two-step path); other failed
+        chunks are retried once with the $expand.
+        """
         if not self.dv_call:
             raise RuntimeError("No dv_call is set in ObjectIdResolver.")
-        
-        # -------------------- internal helpers --------------------    
-        def _odata_quote(value: str) -> str:
-            """Escape single quotes for OData and wrap in quotes."""
-            v = (value or "").replace("'", "''")
-            return f"'{v}'"
-
-        def _build_endpoint_and_id_field(ent: str, key: str) -> tuple[str | None, str | None]:
-            q = _odata_quote
-            if ent == "account":
-                return (f"accounts?$select=accountid&$filter=accountnumber eq {q(key)}",
-                        "accountid")
-            if ent == "case":
-                return (f"incidents?$select=incidentid&$filter=ticketnumber eq {q(key)}",
-                        "incidentid")
-            if ent == "ecase":
-                return (f"icps_ecases?$select=icps_ecaseid&$filter=icps_name eq {q(key)}",
-                        "icps_ecaseid")
-            if ent == "inspection":
-                return (f"icps_inspections?$select=icps_inspectionid&$filter=icps_name eq {q(key)}",
-                        "icps_inspectionid")
-            if ent == "investigation":
-                return (f"icps_investigations?$select=icps_investigationid&$filter=icps_name eq {q(key)}",
-                        "icps_investigationid")
-            return (None, None)
-    
+
+        by_entity: Dict[str, List[Target]] = {}
         for t in targets:
-            ent = (t.entity or "").lower() ## error here
+            if t.object_id:
+                continue  # already resolved (e.g. restored from the run journal)
+
+            ent = (t.entity or "").lower()
             key = (t.ticket_number or "").strip()
 
             if not ent or not key:
                 self.log("⚠️ Target without 'entity' or 'ticket_number' — ignored.")
                 t.object_id = None
                 continue
-
-            endpoint, id_field = _build_endpoint_and_id_field(ent, key)
-            if not endpoint:
+            if ent not in ENTITY_LOOKUPS:
                 self.log(f"⚠️ Unknown entity '{ent}' — ignored.")
                 t.object_id = None
                 continue
+            by_entity.setdefault(ent, []).append(t)
 
-            try:
-                self.log(f"🔎 DV query: {endpoint}")
-                result = self.dv_call(endpoint) or {}
-                items = result.get("value") or []
-                if items:
-                    first = items[0]
+        if self.cache:
+            cached = self._cached(KIND_OBJECT_ID, [object_id_key(ent, t.ticket_number)
+                                                   for ent, group in by_entity.items() for t in group])
+            for ent in list(by_entity):
+                remaining = []
+                for t in by_entity[ent]:
+                    ck = object_id_key(ent, t.ticket_number)
+                    if ck not in cached:
+                        remaining.append(t)
+                    elif cached[ck]:
+                        t.object_id = cached[ck]
+                        self.log(f"   ✓ {ent} {t.ticket_number.strip()} → {t.object_id} (cached)")
+                        self._journal_target(t)
+                    else:
+                        t.object_id = None
+                        self.log(f"   ⚠️ {ent} {t.ticket_number.strip()}: without results (cached).")
+                if remaining:
+                    by_entity[ent] = remaining
+                else:
+                    del by_entity[ent]
+
+        groups = list(by_entity.items())
+        # split the budget between entities so the total stays within `concurrency`
+        per_entity = max(1, self.concurrency // max(1, len(groups)))
+
+        expand_options = location_expand_options()
+
+        def _query(ent: str, group: List[Target], nav: str | None):
+            entity_set, key_field, id_field = ENTITY_LOOKUPS[ent]
+            return lookup_by_keys(
+                self.dv_call, entity_set, key_field, id_field,
+                [t.ticket_number for t in group],
+                style=self.filter_style,
+                base_url_length=self.base_url_length,
+                workers=per_entity,
+                expand=f"{nav}({expand_options})" if nav else None,
+            )
+
+        # runs in the pool: no logging and no shared state, the outcome is applied below
+        def _lookup(item):
+            ent, group, nav = item
+            found, errors = _query(ent, group, nav)
+            rejected = None
+            if nav and errors:
+                retry = [t for t in group if normalize_key(t.ticket_number) in errors]
+                rejected = next((e for e in errors.values() if _expand_rejected(e, nav)), None)
+                # unknown navigation property: plain lookup; throttling/outage that outlasted
+                # the retries: those chunks once more, $expand kept
+                found2, errors = _query(ent, retry, None if rejected else nav)
+                found.update(found2)
+            return found, errors, None if rejected else nav, rejected
+
+        jobs = [(ent, group, self._location_expand(ent)) for ent, group in groups]
+        for ent, group, nav in jobs:
+            self.log(f"🔎 DV query: {ENTITY_LOOKUPS[ent][0]} ({len(group)} ticket(s) in chunked filters"
+                     + (f", locations via $expand {nav})" if nav else ")"))
+
+        to_cache: Dict[str, str | None] = {}
+        for (ent, group, asked_nav), (res, error) in zip(jobs, map_ordered(_lookup, jobs, self.concurrency)):
+            _, _, id_field = ENTITY_LOOKUPS[ent]
+            if error is None:
+                found, errors, nav, rejected = res
+            else:
+                found, errors, nav, rejected = {}, {normalize_key(t.ticket_number): str(error) for t in group}, None, None
+            if rejected:
+                self._no_expand.add(ent)  # the plain lookup for this entity from now on
+                self.log(f"⚠️ $expand {asked_nav} rejected for {ent} ({rejected[:200]}) "
+                         f"— falling back to separate location queries.")
+            for t in group:
+                key = t.ticket_number.strip()
+                nk = normalize_key(key)
+                if nk in errors:
+                    t.object_id = None
+                    self.log(f"   ❌ Error DV ({ent} {key}): {errors[nk]}")
+                elif found.get(nk):
+                    first = found[nk][0]
                     t.object_id = first.get(id_field) or first.get(id_field.lower())
+                    self._take_expanded_locations(t, first, nav)
                     self.log(f"   ✓ {ent} {key} → {t.object_id}")
+                    self._journal_target(t)
+                    to_cache[object_id_key(ent, key)] = t.object_id
                 else:
                     t.object_id = None
                     self.log(f"   ⚠️ {ent} {key}: without results.")
-            except Exception as e:
-                t.object_id = None
-                self.log(f"   ❌ Error DV ({ent} {key}): {e}")
+                    to_cache[object_id_key(ent, key)] = None  # negative: short TTL
 
+        self._cache_put(KIND_OBJECT_ID, to_cache)  # errors are never cached
+        self._cache_put(KIND_RELATIVE_URLS, {self._location_key(t.object_id): list(t.relative_urls)
+                                             for t in targets if t.object_id in self._locations_done})
         return targets
+
+    def _location_expand(self, ent: str) -> str | None:
+        if not self.expand_locations or ent in self._no_expand or location_expand_options() is None:
+            return None
+        return LOCATION_EXPANDS.get(ent)
+
+    def _take_expanded_locations(self, t: Target, record: Dict[str, Any], nav: str | None) -> None:
+        """Relative URLs from an $expand'ed record (a truncated collection is left to resolve_relative_urls)."""
+        if not nav or nav not in record or record.get(f"{nav}@odata.nextLink"):
+            return
+        t.relative_urls = self._dedupe_keep_order(
+            loc["relativeurl"] for loc in record.get(nav) or [] if loc.get("relativeurl"))
+        self._locations_done.add(t.object_id)
     
     # 2) get relative_urls por object_id
     def resolve_relative_urls(self, targets: List[Target]) -> List[Target]:
-        if not self.relurl_resolver:
+        if not self.relurl_resolver and not self.relurls_bulk_resolver:
             raise RuntimeError("No relurl_resolver set to ObjectIdResolver.")
 
+        pending: List[Target] = []
         for t in targets:
-            try:
-                if not t.object_id:
-                    self.log(f"⋯ {t.entity} {t.ticket_number}: without object_id — I skip resolving relative_urls.")
-                    t.relative_urls = t.relative_urls or []
+            if not t.object_id:
+                self.log(f"⋯ {t.entity} {t.ticket_number}: without object_id — I skip resolving relative_urls.")
+                t.relative_urls = t.relative_urls or []
+                continue
+            # Only solve if they are not empty (or came with the object_id, see resolve_object_ids)
+            if not t.relative_urls and t.object_id not in self._locations_done:
+                pending.append(t)
+
+        if pending and self.cache:
+            cached = self._cached(KIND_RELATIVE_URLS, [self._location_key(t.object_id) for t in pending])
+            remaining = []
+            for t in pending:
+                urls = cached.get(self._location_key(t.object_id))
+                if urls is None:  # miss (a cached "no location" is [])
+                    remaining.append(t)
                     continue
-                # Only solve if they are not empty
-                if not t.relative_urls:
-                    urls = self.relurl_resolver(t.object_id) or []
-                    t.relative_urls = self._dedupe_keep_order(urls)
+                t.relative_urls = self._dedupe_keep_order(urls)
+                self._journal_target(t)
+            if len(remaining) < len(pending):
+                self.log(f"💾 {len(pending) - len(remaining)} location lookup(s) served from the cache.")
+            pending = remaining
+        resolved: List[Target] = []
+
+        if pending and self.relurls_bulk_resolver:
+            # many object ids per request; targets missing from the result had a failed chunk
+            try:
+                by_id = self.relurls_bulk_resolver([t.object_id for t in pending],
+                                                   dv_call=self.dv_call, logger=self.log,
+                                                   base_url_length=self.base_url_length,
+                                                   workers=self.concurrency)
             except Exception as e:
-                self.log(f"❌ Error get_relativeurls_for_object_id ({t.entity} {t.ticket_number}): {e}")
+                self.log(f"❌ Error get_relativeurls_for_object_ids ({len(pending)} object ids): {e}")
+                by_id = {}
+            unresolved: List[Target] = []
+            for t in pending:
+                if t.object_id in by_id:
+                    t.relative_urls = self._dedupe_keep_order(by_id[t.object_id])
+                    self._journal_target(t)
+                    resolved.append(t)
+                else:
+                    unresolved.append(t)
+            pending = unresolved if self.relurl_resolver else []
+            if pending:
+                self.log(f"↻ Retrying locations one by one for {len(pending)} object id(s).")
+
+        def _fetch(t: Target) -> List[str]:
+            with timed("dv_locations", entity=t.entity, ticket=t.ticket_number):
+                return self.relurl_resolver(t.object_id) or []
+
+        # one query per object id, `concurrency` at a time; journal and log in target order
+        for t, (urls, error) in zip(pending, map_ordered(_fetch, pending, self.concurrency)):
+            if error is not None:
+                self.log(f"❌ Error get_relativeurls_for_object_id ({t.entity} {t.ticket_number}): {error}")
                 t.relative_urls = t.relative_urls or []
+                continue
+            t.relative_urls = self._dedupe_keep_order(urls)
+            self._journal_target(t)
+            resolved.append(t)
+
+        self._cache_put(KIND_RELATIVE_URLS, {self._location_key(t.object_id): list(t.relative_urls) for t in resolved})
         return targets
     
     # 3) build sharepoint_urls por relative_urls + entidad propia
@@ -184,13 +433,11 @@ class RelatedDocumentsService:
         Download the content of each URL in sharepoint_urls using sp_downloader(url, ticket_number).
         - ensure_urls=True: Ensures relative_urls and sharepoint_urls first.
         - stop_on_error=False: Continues even if there are errors (logs each one).
-        - unzip_after=True: After all downloads, extract 'Related Documents.zip' and remove it.
+        - unzip_after=True: After each ticket's downloads, extract 'Related Documents.zip' and remove it.
         """
         if ensure_urls:
             self.build_sharepoint_urls(targets)
             
-        processed_tickets: set[str] = set()
-
         for t in targets:
             if not t.object_id:
                 self.log(f"⋯ {t.entity} {t.ticket_number}: without object_id — skip download.")
@@ -198,24 +445,39 @@ class RelatedDocumentsService:
             if not t.sharepoint_urls:
                 self.log(f"⋯ {t.entity} {t.ticket_number}: no sharepoint_urls — nothing to download.")
                 continue
+            if self._already_downloaded(t):
+                self.log(f"⏭ {t.entity} {t.ticket_number}: already downloaded in the last run — skip.")
+                continue
 
+            downloaded, failed = False, False
             for url in t.sharepoint_urls:
                 try:
                     self.log(f"↓ Downloading: {t.entity} {t.ticket_number} ← {url}")
-                    self.sp_downloader(url, t.ticket_number)
-                    processed_tickets.add(t.ticket_number)
+                    with timed("download", entity=t.entity, ticket=t.ticket_number, url=url):
+                        self.sp_downloader(url, t.ticket_number)
+                    downloaded = True
                 except Exception as e:
                     self.log(f"❌ Error downloading ({t.entity} {t.ticket_number}): {e}")
+                    failed = True
                     if stop_on_error:
                         raise
-                    
-        # --- Post-process: unzip and delete ZIP ---
-        if unzip_after and processed_tickets:
-            for ticket in sorted(processed_tickets):
+
+            if not downloaded:
+                continue
+
+            # --- Post-process (per ticket, tickets are unique): unzip and delete ZIP ---
+            if unzip_after:
                 try:
-                    if extract_related_zip(ticket, remove_zip=True):
-                        self.log(f"📦 Extracted and cleaned ZIP for {ticket}")
+                    with timed("unzip", ticket=t.ticket_number):
+                        extracted = extract_related_zip(t.ticket_number, remove_zip=True)
+                    if extracted:
+                        self.log(f"📦 Extracted and cleaned ZIP for {t.ticket_number}")
                     else:
-                        self.log(f"⋯ No ZIP found to extract for {ticket}")
+                        self.log(f"⋯ No ZIP found to extract for {t.ticket_number}")
                 except Exception as e:
-                    self.log(f"❌ Error unzipping for {ticket}: {e}")
\ No newline at end of file
+                    self.log(f"❌ Error unzipping for {t.ticket_number}: {e}")
+                    failed = True
+
+            # --- Checkpoint: only tickets whose every URL went through ---
+            if self.journal and not failed:
+                self.journal.mark(KIND_DOWNLOAD, t.ticket_number, self._target_fp(t))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+JOURNAL_NAME = "run_journal.jsonl"
+
+# unit kinds written to the journal
+KIND_SHEET = "sheet"        # separate mode: one PDF per sheet
+KIND_EXCEL = "excel"        # per_excel mode: one PDF per Excel file
+KIND_COMBINED = "combined"  # combined mode: the single combined PDF
+KIND_TARGET = "target"      # entity/ticket resolved to object_id (+ relative_urls)
+KIND_DOWNLOAD = "download"  # ticket downloaded and extracted
+
+def file_fingerprint(path: str | os.PathLike) -> str:
+    """Cheap 'unchanged input' check: size + mtime (ns)."""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def combine_fingerprints(parts: Iterable[str]) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def target_key(entity: str, ticket_number: str) -> str:
+    return f"{(entity or '').strip().lower()}:{(ticket_number or '').strip().upper()}"
+
+class RunJournal:
+    """
+    Append-only journal of completed units for one output folder (JSON lines).
+
+    The first line describes the run (folder, export mode, process type). With
+    resume=True the previous journal is reused only if that header matches;
+    otherwise (or with resume=False) a fresh journal is started.
+
+    Each completed unit is one line: {"kind", "key", "fp", ...data}. A unit
+    counts as done only when its fingerprint (e.g. source file size+mtime)
+    matches the current input.
+    """
+
+    def __init__(self, output_dir: str | os.PathLike, params: Dict[str, Any], resume: bool = False) -> None:
+        self.path = Path(output_dir) / JOURNAL_NAME
+        self.params = {k: params[k] for k in sorted(params)}
+        self._lock = threading.Lock()
+        self._done: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.resumed = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self._load():
+            self.resumed = True
+            self._fh = open(self.path, "a", encoding="utf-8")
+        else:
+            self._fh = open(self.path, "w", encoding="utf-8")
+            self._write({"kind": "run", "params": self.params,
+                         "started": datetime.now().isoformat(timespec="seconds")})
+
+    def _load(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except OSError:
+            return False
+        if not lines:
+            return False
+
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return False
+        if header.get("kind") != "run" or header.get("params") != self.params:
+            return False
+
+        for line in lines[1:]:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            self._done[(rec.get("kind", ""), rec.get("key", ""))] = rec
+        return True
+
+    def _write(self, rec: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()  # survive a process crash
+
+    # ————— public API —————
+    def get(self, kind: str, key: str, fp: str = "") -> Dict[str, Any] | None:
+        """Returns the completed unit if it exists and its fingerprint still matches."""
+        with self._lock:
+            rec = self._done.get((kind, key))
+        if rec is None or rec.get("fp", "") != fp:
+            return None
+        output = rec.get("output")
+        if output and not Path(output).exists():
+            return None  # result was deleted: redo it
+        return rec
+
+    def mark(self, kind: str, key: str, fp: str = "", **data: Any) -> None:
+        rec = {"kind": kind, "key": key, "fp": fp, **data}
+        with self._lock:
+            self._done[(kind, key)] = rec
+            self._write(rec)
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return sum(1 for (k, _) in self._done if k == kind)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
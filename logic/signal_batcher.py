@@ -0,0 +1,77 @@
+from __future__ import annotations
+import threading
+from typing import Callable, List
+
+DEFAULT_FLUSH_INTERVAL = 0.1  # seconds (100 ms)
+
+class SignalBatcher:
+    """
+    Buffers log lines and progress values produced by a worker and delivers them
+    on a fixed cadence instead of one cross-thread signal per line.
+
+    - log(msg): queue a line (thread-safe).
+    - progress(pct): remember the latest value; only the last one is delivered.
+    - flush(): deliver everything pending right now.
+    - close(): stop the background flusher and do a final (guaranteed) flush.
+
+    Log lines are delivered joined with '\\n' in a single call to `on_logs`, which
+    keeps QTextEdit.append() to one re-layout per interval.
+    """
+
+    def __init__(self,
+                 on_logs: Callable[[str], None],
+                 on_progress: Callable[[int], None] | None = None,
+                 interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        self._on_logs = on_logs
+        self._on_progress = on_progress
+        self._interval = max(0.01, float(interval))
+        self._lock = threading.Lock()
+        self._lines: List[str] = []
+        self._progress: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ————— producer side —————
+    def log(self, msg: str) -> None:
+        with self._lock:
+            self._lines.append(str(msg))
+
+    def progress(self, pct: int) -> None:
+        with self._lock:
+            self._progress = int(pct)
+
+    # ————— delivery —————
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+            pct, self._progress = self._progress, None
+
+        # logs first, so the bar never runs ahead of the text
+        if lines:
+            self._on_logs("\n".join(lines))
+        if pct is not None and self._on_progress:
+            self._on_progress(pct)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.flush()
+
+    def start(self) -> "SignalBatcher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="SignalBatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def __enter__(self) -> "SignalBatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
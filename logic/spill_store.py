@@ -0,0 +1,66 @@
+from __future__ import annotations
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from logic.columnar import Records, estimate_records_bytes, write_records, read_records, arrow_available
+
+class SpillStore:
+    """
+    Ordered list of (title, transposed records) that keeps at most `budget_bytes`
+    in memory. When the budget is exceeded, the oldest in-memory entries are
+    written to Arrow IPC files under `spill_dir` (pickle files if pyarrow is not
+    installed) and read back, one sheet at a time, when iterated.
+
+    Used by combined export mode, the only mode that needs every sheet at the end.
+    """
+
+    def __init__(self, budget_bytes: int, spill_dir: str | os.PathLike) -> None:
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.spill_dir = Path(spill_dir)
+        # each entry: [title, records | None, spill_path | None, size]
+        self._entries: List[list] = []
+        self._in_memory = 0
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, title: str, records: Records) -> None:
+        size = estimate_records_bytes(records)
+        self._entries.append([title, records, None, size])
+        self._in_memory += size
+        self._enforce_budget()
+
+    def _enforce_budget(self) -> None:
+        for entry in self._entries:
+            if self._in_memory <= self.budget_bytes:
+                return
+            if entry[1] is None:
+                continue
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            ext = ".arrow" if arrow_available() else ".pkl"
+            path = self.spill_dir / f"sheet_{self.spilled:06d}{ext}"
+            entry[2] = write_records(path, entry[1])
+            entry[1] = None
+            self._in_memory -= entry[3]
+            self.spilled += 1
+
+    def __iter__(self) -> Iterator[Tuple[str, Records]]:
+        """Yields (title, records) in insertion order, loading spilled entries lazily."""
+        for title, records, path, _ in self._entries:
+            yield title, (records if records is not None else read_records(path))
+
+    def close(self) -> None:
+        """Drops everything and removes the spill files."""
+        self._entries.clear()
+        self._in_memory = 0
+        if self.spill_dir.exists():
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self) -> "SpillStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,16 +1,18 @@
 import sys
 import os
-import json
 
-from common.helper import resolve_current_user_email, resolve_current_environment
-from dataverse_apis.core.services.dataverse_client import call_dataverse
+from common.helper import resolve_current_user_email
 from dataverse_apis.core.logging.logging_conf import get_logger, setup_logging
-from dataverse_apis.tasks.sharepoint_documents import build_sharepoint_folder_url, get_relativeurls_for_object_id
+from dataverse_apis.core.services.env_loader import get_env_variable_value
 from datetime import datetime
+from multiprocessing import freeze_support
 from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox
 from PySide6.QtGui import QIcon
 from ui.main_window import Ui_MainWindow
 from worker_thread import WorkerThread
+from process_worker import ProcessWorker
+
+EXECUTION_ENV = "DATAFLIPPER_EXECUTION"  # thread (default) | process
 
 try:
     from common.build_info import FULL_VERSION, APP_VERSION, BUILD_NUMBER, GIT_SHA
@@ -57,6 +59,7 @@ class MainWindow(QMainWindow):
         # print(json.dumps(relative_urls, indent=2))
                             
         super().__init__()
+        self.cancel_requested = False  # set by Cancel, checked when the worker finishes
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.setWindowTitle(f"Data Flipper with Dataverse APIs — v{FULL_VERSION}")
@@ -73,6 +76,7 @@ class MainWindow(QMainWindow):
         # bottom connections
         self.ui.btnSelectFolder.clicked.connect(self.select_folder)
         self.ui.btnProcess.clicked.connect(self.process_files)
+        self.ui.btnCancel.clicked.connect(self.cancel_processing)
         self.ui.btnOpenOutputFolder.clicked.connect(self.open_output_folder)
         
     def _update_sections_visibility(self):
@@ -119,6 +123,8 @@ class MainWindow(QMainWindow):
         self.ui.btnSelectFolder.setEnabled(not processing)
         self.ui.btnProcess.setEnabled(not processing)
         self.ui.btnOpenOutputFolder.setEnabled(not processing)
+        # only a child process can be stopped safely mid-run
+        self.ui.btnCancel.setEnabled(processing and hasattr(getattr(self, "worker", None), "cancel"))
         if processing:
             self.ui.txtOutput.append(f"⏳ Processing started at {timestamp}\n")
         else:
@@ -151,29 +157,55 @@ class MainWindow(QMainWindow):
         else:
             process_type = "docs_only"
 
-        self.set_processing_state(True)
+        resume = self.ui.chkResume.isChecked()
+        bypass_cache = self.ui.chkBypassCache.isChecked()
 
-        self.worker = WorkerThread(folder_path, export_mode, process_type)
+        # DATAFLIPPER_EXECUTION=process runs the pipeline in a child process (keeps the UI responsive, cancellable)
+        execution = (get_env_variable_value(EXECUTION_ENV, "thread") or "thread").strip().lower()
+        worker_cls = ProcessWorker if execution == "process" else WorkerThread
+        self.worker = worker_cls(folder_path, export_mode, process_type, resume=resume, bypass_cache=bypass_cache)
+        self.cancel_requested = False
+        self.set_processing_state(True)
         self.worker.progress_updated.connect(self.ui.progressBar.setValue)
         self.worker.log_updated.connect(self.ui.txtOutput.append)
         # self.worker.log_pdf_update.connect(self.ui.lblStatus.setText)
         self.worker.finished.connect(self.on_worker_finished)
         self.worker.start()
 
+    def cancel_processing(self):
+        worker = getattr(self, "worker", None)
+        if worker is not None and hasattr(worker, "cancel"):
+            self.cancel_requested = True
+            self.ui.btnCancel.setEnabled(False)
+            self.ui.txtOutput.append("🛑 Cancelling...")
+            worker.cancel()
+
     def on_worker_finished(self, success, errors):
         self.set_processing_state(False)
-        self.ui.lblStatus.setText("✅ Completed.")
-        if errors:
-            QMessageBox.warning(self, "Completed with Errors", "Some issues occurred:\n\n" + "\n".join(errors[-3:]))
+        if self.cancel_requested:
+            self.ui.lblStatus.setText("🛑 Cancelled.")
+            self.ui.txtOutput.append("🛑 Processing cancelled.\n")
+            QMessageBox.information(self, "Cancelled", "🛑 Processing was cancelled.")
+        elif getattr(self.worker, "crashed", False) or (not success and not errors):
+            # the worker died (ProcessWorker reports its exit code) or stopped without saying why
+            self.ui.lblStatus.setText("❌ Failed.")
+            self.ui.txtOutput.append("❌ Processing failed.\n")
+            QMessageBox.warning(self, "Failed", "The run did not finish:\n\n"
+                                + ("\n".join(errors[-3:]) if errors else "No error was reported."))
         else:
-            QMessageBox.information(self, "Success", "✅ All files processed successfully!")
-        self.ui.txtOutput.append("🎉 Finished processing all files.\n")
+            self.ui.lblStatus.setText("✅ Completed.")
+            if errors:  # some files failed, the others were processed
+                QMessageBox.warning(self, "Completed with Errors", "Some issues occurred:\n\n" + "\n".join(errors[-3:]))
+            else:
+                QMessageBox.information(self, "Success", "✅ All files processed successfully!")
+            self.ui.txtOutput.append("🎉 Finished processing all files.\n")
 
     def open_output_folder(self):
         output_dir = os.path.abspath("output")
         os.startfile(output_dir)
 
 if __name__ == "__main__":
+    freeze_support()  # child processes of a frozen (PyInstaller) build start here
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon(resource_path("resources/data_flipper_icon.ico")))
     window = MainWindow()
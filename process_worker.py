@@ -0,0 +1,148 @@
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import queue
+import subprocess
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+LOG_FLUSH_INTERVAL = 0.1  # seconds between log/progress messages sent by the child
+POLL_INTERVAL_MS = 50     # how often the UI drains the message queue
+MAX_MESSAGES_PER_POLL = 200
+
+def _child_main(q, folder_path: str, export_mode: str, process_type: str,
+                output_dir: str, resume: bool, bypass_cache: bool = False) -> None:
+    """Entry point of the child process: runs the pipeline and reports over `q`."""
+    # heavy imports happen here, in the child, not in the GUI process
+    from logic.pipeline import ProcessingPipeline
+    from logic.signal_batcher import SignalBatcher
+    from dataverse_apis.core.logging.logging_conf import setup_logging
+    from dataverse_apis.core.logging.profiler import run_profiled
+
+    setup_logging(app_name="dataverse_apis")
+    ok, errors = False, []
+    try:
+        with SignalBatcher(lambda text: q.put(("log", text)),
+                           lambda pct: q.put(("progress", pct)),
+                           interval=LOG_FLUSH_INTERVAL) as batcher:
+            pipeline = ProcessingPipeline(
+                folder_path,
+                export_mode,
+                process_type,
+                output_dir=output_dir,
+                resume=resume,
+                bypass_cache=bypass_cache,
+                log=batcher.log,
+                progress=batcher.progress,
+                log_pdf=lambda text: q.put(("log_pdf", text)),
+            )
+            ok = run_profiled(pipeline.run, name="worker")
+        errors = pipeline.errors
+    except Exception as e:
+        errors = errors or [f"❌ Worker process failed: {e}"]
+    finally:
+        q.put(("finished", ok, list(errors)))
+
+class ProcessWorker(QObject):
+    """
+    Runs the pipeline in a child process so pandas/openpyxl/FPDF work never
+    competes with the Qt event loop for the GIL.
+
+    Same signals as WorkerThread (progress_updated, log_updated, log_pdf_update,
+    finished); the child sends them as tuples over a multiprocessing.Queue that
+    is drained by a QTimer on the UI thread. cancel() kills the child process.
+    """
+    progress_updated = Signal(int)
+    log_updated = Signal(str)
+    log_pdf_update = Signal(str)
+    finished = Signal(bool, list)  # success, error_list
+
+    def __init__(self, folder_path: str, export_mode: str, process_type: str, resume: bool = False,
+                 bypass_cache: bool = False):
+        super().__init__()
+        self.folder_path = folder_path
+        self.export_mode = export_mode
+        self.process_type = process_type
+        self.output_dir = "output"
+        self.resume = resume
+        self.bypass_cache = bypass_cache
+        self.errors: list[str] = []
+        self.crashed = False  # the child process exited without reporting "finished"
+        self._ctx = mp.get_context("spawn")  # same behaviour on Windows, Linux and frozen builds
+        self._queue = None
+        self._process = None
+        self._done = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(POLL_INTERVAL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self) -> None:
+        self._queue = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_child_main,
+            args=(self._queue, self.folder_path, self.export_mode, self.process_type,
+                  self.output_dir, self.resume, self.bypass_cache),
+            name="DataFlipperWorker",
+            daemon=True,
+        )
+        self._process.start()
+        self._timer.start()
+
+    def isRunning(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def cancel(self) -> None:
+        """Kills the child process (and, on Windows, the browsers it started)."""
+        if self._done or self._process is None:
+            return
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/PID", str(self._process.pid), "/T", "/F"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        else:
+            self._process.terminate()
+        self._process.join(5)
+        self._drain()
+        self._finish(False, self.errors + ["🛑 Cancelled by user."])
+
+    # ————— UI thread side —————
+    def _poll(self) -> None:
+        alive = self._process is not None and self._process.is_alive()  # checked before draining
+        finished, empty = self._drain()
+        if not finished and empty and not alive:
+            code = self._process.exitcode if self._process is not None else None
+            self.crashed = True
+            self._finish(False, self.errors + [f"❌ Worker process exited unexpectedly (code {code})."])
+
+    def _drain(self) -> tuple[bool, bool]:
+        """Emits queued messages; returns (finished handled, queue empty)."""
+        for _ in range(MAX_MESSAGES_PER_POLL):
+            if self._done:
+                return True, True
+            try:
+                msg = self._queue.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return False, True
+            kind = msg[0]
+            if kind == "log":
+                self.log_updated.emit(msg[1])
+            elif kind == "progress":
+                self.progress_updated.emit(msg[1])
+            elif kind == "log_pdf":
+                self.log_pdf_update.emit(msg[1])
+            elif kind == "finished":
+                self._finish(msg[1], msg[2])
+                return True, True
+        return self._done, False
+
+    def _finish(self, ok: bool, errors: list) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._timer.stop()
+        self.errors = list(errors)
+        if self._process is not None:
+            self._process.join(1)
+        if self._queue is not None:
+            self._queue.close()
+        self.finished.emit(bool(ok), self.errors)
@@ -0,0 +1,38 @@
+"""
+Shared fixtures: the Dataverse client pointed at the local mock server
+(benchmarks/mock_dataverse.py), no org and no sign-in.
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.mock_dataverse import configure_client, start_mock_dataverse
+from dataverse_apis.core.services.http_session import close_session
+
+MOCK_RECORDS = 50
+
+@pytest.fixture(scope="session")
+def mock_server():
+    """
+    (server, base_uri) of a mock with MOCK_RECORDS rows per entity set, for the
+    whole session; the client settings pointing at it are undone at teardown.
+    """
+    server, base_uri = start_mock_dataverse(records=MOCK_RECORDS)
+    try:
+        with pytest.MonkeyPatch.context() as mp:
+            configure_client(base_uri, concurrency=4, client_rps=0, monkeypatch=mp)
+            yield server, base_uri
+            close_session()
+    finally:
+        server.shutdown()
+
+@pytest.fixture
+def mock_dv(mock_server):
+    """The MockDataverse behind the server, with fresh request stats."""
+    mock = mock_server[0].mock
+    mock.reset_stats()
+    return mock
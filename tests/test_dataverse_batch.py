@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataverse_apis.core.services.dataverse_batch import (
+    BatchOperation, build_batch_body, call_dataverse_batch, parse_batch_response, _units,
+)
+
+def _account_id(mock, i: int) -> str:
+    return mock.tables["accounts"][i]["accountid"]
+
+def _merge(mock, target: int, subordinate: int, changeset: str | None = None, sub_id: str | None = None):
+    return BatchOperation("POST", "Merge", changeset=changeset, data={
+        "Target": {"@odata.type": "Microsoft.Dynamics.CRM.account", "accountid": _account_id(mock, target)},
+        "Subordinate": {"@odata.type": "Microsoft.Dynamics.CRM.account",
+                        "accountid": sub_id or _account_id(mock, subordinate)},
+        "UpdateContent": {"@odata.type": "Microsoft.Dynamics.CRM.account"},
+        "PerformParentingChecks": False,
+    })
+
+def test_results_come_back_in_operation_order(mock_dv):
+    ops = [BatchOperation("GET", f"accounts?$select=accountnumber&$filter=accountnumber eq 'BUS-{i:06d}'")
+           for i in (3, 1, 2)]
+    results = call_dataverse_batch(ops)
+
+    assert [r.ok for r in results] == [True, True, True]
+    assert [r.data["value"][0]["accountnumber"] for r in results] == ["BUS-000003", "BUS-000001", "BUS-000002"]
+    assert mock_dv.requests == 1
+
+def test_split_across_requests_without_splitting_changesets(mock_dv):
+    ops = [BatchOperation("GET", "WhoAmI") for _ in range(3)]
+    ops += [BatchOperation("PATCH", f"accounts({_account_id(mock_dv, i)})", data={"name": f"Renamed {i}"},
+                           changeset="cs") for i in (40, 41, 42)]
+    results = call_dataverse_batch(ops, max_per_batch=2)
+
+    assert all(r.ok for r in results)
+    assert mock_dv.requests == 3  # [GET, GET] [GET] [changeset of 3]
+    assert mock_dv.by_id["accounts"][_account_id(mock_dv, 42)]["name"] == "Renamed 42"
+
+def test_changeset_success(mock_dv):
+    results = call_dataverse_batch([_merge(mock_dv, 10, 11, "g"), _merge(mock_dv, 10, 12, "g")])
+
+    assert [(r.ok, r.status, r.rolled_back) for r in results] == [(True, 204, False), (True, 204, False)]
+    assert results[0].data == {"status": "success", "code": 204}
+    assert mock_dv.by_id["accounts"][_account_id(mock_dv, 11)]["statecode"] == 1
+
+def test_failed_changeset_is_rolled_back_and_others_continue(mock_dv):
+    missing = "00000000-0000-0000-0000-00000000abcd"
+    ops = [_merge(mock_dv, 20, 21, "g"), _merge(mock_dv, 20, 0, "g", sub_id=missing),
+           BatchOperation("GET", "WhoAmI")]
+    results = call_dataverse_batch(ops)
+
+    assert [r.ok for r in results] == [False, False, True]
+    assert all(r.rolled_back and r.status == 404 and "Does Not Exist" in r.error for r in results[:2])
+    assert not results[2].rolled_back
+    assert mock_dv.by_id["accounts"][_account_id(mock_dv, 21)]["statecode"] == 0  # first merge undone
+
+def test_failed_single_operation_is_not_a_rollback(mock_dv):
+    results = call_dataverse_batch([_merge(mock_dv, 30, 30)])
+
+    assert results[0].status == 400 and results[0].error and not results[0].rolled_back
+
+def test_parse_maps_changeset_parts_by_content_id():
+    ops = [BatchOperation("PATCH", f"accounts({i})", data={"name": str(i)}, changeset="g") for i in range(2)]
+    units = _units(ops)
+    _, body = build_batch_body(ops, units, "https://org.example/api/data/v9.2")
+    assert "Content-ID: 1" in body and "Content-ID: 2" in body
+
+    response = (
+        "--b\r\nContent-Type: multipart/mixed; boundary=cs\r\n\r\n"
+        "--cs\r\nContent-Type: application/http\r\nContent-ID: 2\r\n\r\nHTTP/1.1 204 No Content\r\n\r\n\r\n"
+        "--cs\r\nContent-Type: application/http\r\nContent-ID: 1\r\n\r\n"
+        "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{\"name\": \"0\"}\r\n"
+        "--cs--\r\n--b--\r\n"
+    )
+    results = [None, None]
+    parse_batch_response("multipart/mixed; boundary=b", response, units, results)
+
+    assert results[0].status == 200 and results[0].data == {"name": "0"}
+    assert results[1].status == 204 and results[1].data == {"status": "success", "code": 204}
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+import requests
+
+from benchmarks.mock_dataverse import start_mock_dataverse
+from dataverse_apis.core.services.dataverse_client import call_dataverse, dataverse_request
+from dataverse_apis.core.services.http_session import DEFAULT_TIMEOUT, request_timeout
+
+@pytest.fixture
+def slow_mock(mock_server):
+    server, base_uri = start_mock_dataverse(records=5, latency_ms=600)
+    yield server.mock, f"{base_uri}/api/data/v9.2"
+    server.shutdown()
+
+@pytest.mark.parametrize("value, expected", [
+    ("", DEFAULT_TIMEOUT), ("5,60", (5.0, 60.0)), ("30", (30.0, 30.0)), ("x", DEFAULT_TIMEOUT), ("0,5", DEFAULT_TIMEOUT),
+])
+def test_request_timeout_setting(monkeypatch, value, expected):
+    monkeypatch.setenv("DATAVERSE_TIMEOUT", value)
+    assert request_timeout() == expected
+
+def test_hung_request_times_out(slow_mock, monkeypatch):
+    mock, api = slow_mock
+    monkeypatch.setenv("DATAVERSE_TIMEOUT", "2,0.2")
+    monkeypatch.setenv("DATAVERSE_MAX_RETRIES", "0")
+
+    with pytest.raises(Exception, match="timed out"):
+        call_dataverse(f"{api}/WhoAmI")
+    assert mock.requests == 1
+
+def test_caller_timeout_wins(slow_mock, monkeypatch):
+    _, api = slow_mock
+    monkeypatch.setenv("DATAVERSE_TIMEOUT", "2,0.2")
+    monkeypatch.setenv("DATAVERSE_MAX_RETRIES", "0")
+
+    response = dataverse_request("GET", f"{api}/WhoAmI", timeout=5)
+    assert response.status_code == 200
+
+    with pytest.raises(requests.Timeout):
+        dataverse_request("GET", f"{api}/WhoAmI", timeout=(2, 0.1))
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from dataverse_apis.core.services.dataverse_client import call_dataverse
+from dataverse_apis.core.services.dataverse_query import _encoded_len, chunk_keys, lookup_by_keys
+
+KEYS = [f"CAS-{i:06d}-A1B2C3" for i in range(40)]
+
+@pytest.mark.parametrize("style", ["in", "or"])
+def test_chunks_fit_the_url_budget(style):
+    chunks = list(chunk_keys("incidents", "incidentid,ticketnumber", "ticketnumber", KEYS,
+                             style=style, base_url_length=60, max_length=600))
+
+    assert len(chunks) > 1
+    assert [k for chunk, _ in chunks for k in chunk] == KEYS
+    for chunk, endpoint in chunks:
+        assert 60 + 1 + _encoded_len(endpoint) <= 600
+        assert all(k in endpoint for k in chunk)
+
+def test_chunks_are_as_full_as_the_budget_allows():
+    chunks = list(chunk_keys("incidents", "incidentid", "ticketnumber", KEYS, base_url_length=60, max_length=600))
+    for (chunk, _), (next_chunk, _) in zip(chunks, chunks[1:]):
+        longer = list(chunk_keys("incidents", "incidentid", "ticketnumber", chunk + next_chunk[:1],
+                                 base_url_length=60, max_length=600))
+        assert len(longer) == 2  # one more key would not fit
+
+def test_max_keys_caps_each_chunk():
+    chunks = list(chunk_keys("incidents", "incidentid", "ticketnumber", KEYS, max_length=100_000, max_keys=7))
+
+    assert [len(chunk) for chunk, _ in chunks] == [7] * 5 + [5]
+
+def test_extra_filter_is_anded_and_counted():
+    plain = list(chunk_keys("incidents", "incidentid", "ticketnumber", KEYS, base_url_length=60, max_length=600))
+    extra = list(chunk_keys("incidents", "incidentid", "ticketnumber", KEYS, base_url_length=60, max_length=600,
+                            extra_filter="statecode eq 0"))
+
+    assert len(extra) >= len(plain)
+    for _, endpoint in extra:
+        assert "$filter=(statecode eq 0) and (Microsoft.Dynamics.CRM.In(" in endpoint
+        assert 60 + 1 + _encoded_len(endpoint) <= 600
+
+def test_unknown_style_is_rejected():
+    with pytest.raises(ValueError):
+        list(chunk_keys("incidents", "incidentid", "ticketnumber", KEYS, style="eq"))
+
+@pytest.mark.parametrize("style", ["in", "or"])
+def test_lookup_by_keys_against_the_mock(mock_dv, style):
+    keys = [k.lower() for k in KEYS[:12]] + ["CAS-999999-A1B2C3", KEYS[0]]
+    found, errors = lookup_by_keys(call_dataverse, "incidents", "ticketnumber", "incidentid", keys,
+                                   style=style, max_keys=5)
+
+    assert errors == {}
+    assert sorted(found) == sorted(k.casefold() for k in KEYS[:12])  # unknown key missing, duplicate once
+    assert found[KEYS[3].casefold()][0]["incidentid"] == mock_dv.tables["incidents"][3]["incidentid"]
+    assert mock_dv.requests == 3
+
+def test_lookup_with_extra_filter(mock_dv):
+    ids = [r["incidentid"] for r in mock_dv.tables["incidents"][:15]]
+    found, errors = lookup_by_keys(call_dataverse, "sharepointdocumentlocations", "_regardingobjectid_value",
+                                   "sharepointdocumentlocationid", ids, extra_filter="statecode eq 0")
+
+    assert errors == {}
+    # no location for every 10th record; locations of every 7th are inactive
+    assert sorted(found) == sorted(ids[i] for i in range(15) if i % 10 and i % 7)
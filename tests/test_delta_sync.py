@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.mock_dataverse import start_mock_dataverse
+from dataverse_apis.core.services.dataverse_client import call_dataverse
+from dataverse_apis.core.services.delta_sync import DeltaSnapshot, sync_entity
+
+RECORDS = 45
+COLUMNS = ["accountnumber", "name"]
+
+@pytest.fixture
+def own_mock(mock_server):
+    """A fresh mock for each test (these tests add and delete rows) and a dv_call bound to it."""
+    server, base_uri = start_mock_dataverse(records=RECORDS)
+
+    def dv_call(endpoint, **kwargs):
+        if not endpoint.startswith("http"):
+            endpoint = f"{base_uri}/api/data/v9.2/{endpoint}"
+        return call_dataverse(endpoint, **kwargs)
+
+    yield server.mock, dv_call
+    server.shutdown()
+
+@pytest.fixture
+def snapshot(tmp_path):
+    with DeltaSnapshot(tmp_path / "accounts.sqlite", "accounts", "accountid", COLUMNS) as snap:
+        yield snap
+
+def _rows(snapshot):
+    return {r["accountid"]: r for page in snapshot.iter_pages() for r in page}
+
+def test_first_sync_is_full(own_mock, snapshot):
+    mock, dv_call = own_mock
+    result = sync_entity(dv_call, snapshot, page_size=20)
+
+    assert (result.full, result.added, result.total, result.delta_link) == (True, RECORDS, RECORDS, True)
+    assert mock.requests == 3  # 20 + 20 + 5
+    assert set(_rows(snapshot)[mock.tables["accounts"][0]["accountid"]]) == {"accountid", *COLUMNS}
+
+def test_delta_applies_updates_additions_and_deletions(own_mock, snapshot):
+    mock, dv_call = own_mock
+    sync_entity(dv_call, snapshot)
+    first, second = mock.tables["accounts"][0]["accountid"], mock.tables["accounts"][1]["accountid"]
+    mock.update("accounts", first, name="Renamed")
+    mock.delete("accounts", second)
+    new = mock.add("accounts", "BUS-999999", name="New business")
+    mock.reset_stats()
+
+    result = sync_entity(dv_call, snapshot)
+
+    assert (result.full, result.added, result.changed, result.deleted) == (False, 1, 1, 1)
+    assert result.total == RECORDS
+    assert mock.requests == 1
+    rows = _rows(snapshot)
+    assert rows[first]["name"] == "Renamed" and second not in rows and rows[new]["accountnumber"] == "BUS-999999"
+
+    again = sync_entity(dv_call, snapshot)
+    assert (again.full, again.added, again.changed, again.deleted) == (False, 0, 0, 0)
+
+def test_changed_select_resyncs_fully(own_mock, snapshot):
+    _, dv_call = own_mock
+    sync_entity(dv_call, snapshot)
+    with DeltaSnapshot(snapshot.path, "accounts", "accountid", ["accountnumber"]) as other:
+        assert other.delta_link is None
+        assert sync_entity(dv_call, other).full
+
+def test_invalid_delta_link_falls_back_to_full_sync(own_mock, snapshot):
+    _, dv_call = own_mock
+    sync_entity(dv_call, snapshot)
+    snapshot.set_delta_link(snapshot.delta_link.replace("$deltatoken=", "$deltatoken=9999"))
+    snapshot.commit()
+    messages = []
+
+    result = sync_entity(dv_call, snapshot, log=messages.append)
+
+    assert result.full and result.total == RECORDS and result.delta_link
+    assert any("running a full sync" in m for m in messages)
+
+def test_outage_on_the_delta_link_keeps_it(own_mock, snapshot, monkeypatch):
+    mock, dv_call = own_mock
+    sync_entity(dv_call, snapshot)
+    link = snapshot.delta_link
+    mock.update("accounts", mock.tables["accounts"][0]["accountid"], name="Renamed")
+    monkeypatch.setenv("DATAVERSE_MAX_RETRIES", "1")
+    mock.fail(503, times=2, match="$deltatoken=")
+    mock.reset_stats()
+
+    with pytest.raises(Exception, match="503"):
+        sync_entity(dv_call, snapshot)
+
+    assert mock.requests == 2  # the delta link and its retry, no full reload
+    assert snapshot.delta_link == link and snapshot.count() == RECORDS
+    result = sync_entity(dv_call, snapshot)
+    assert (result.full, result.changed) == (False, 1)
+
+def test_interrupted_sync_keeps_the_previous_snapshot(own_mock, snapshot):
+    mock, dv_call = own_mock
+    sync_entity(dv_call, snapshot, page_size=20)
+    link = snapshot.delta_link
+    mock.add("accounts", "BUS-888888")
+    calls = []
+
+    def failing(endpoint, **kwargs):
+        calls.append(endpoint)
+        if len(calls) > 1:
+            raise RuntimeError("connection reset")
+        return dv_call(endpoint, **kwargs)
+
+    with pytest.raises(RuntimeError):
+        sync_entity(failing, snapshot, page_size=20, full=True)
+
+    assert snapshot.count() == RECORDS and snapshot.delta_link == link
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import gc
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from logic import frame_transport
+from logic.frame_transport import FrameTransport, load_frame, load_records, open_table
+
+RECORDS = [[("Name", "Alpha"), ("Amount", "1")], [("Name", "Beta")], []]
+
+@pytest.fixture(params=["shm", "file"])
+def transport(request, tmp_path):
+    t = FrameTransport(request.param, spill_dir=tmp_path / "frames")
+    yield t
+    t.close()
+
+@pytest.fixture(params=["arrow", "pickle"])
+def codec(request, monkeypatch):
+    if request.param == "arrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(frame_transport, "pa", None)  # the fallback of installs without pyarrow
+    return request.param
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({"ticket": ["CAS-1", "CAS-2", "CAS-3"], "amount": [1.5, 2.0, None]})
+
+def _freed(handle) -> bool:
+    if handle.storage == "file":
+        return not frame_transport.Path(handle.location).exists()
+    try:
+        frame_transport._attach_shm(handle.location).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+def test_frame_round_trip_and_release(transport, codec):
+    handle = transport.put_frame(_frame())
+
+    assert (handle.kind, handle.storage, handle.codec) == ("frame", transport.storage, codec)
+    loaded = load_frame(handle)
+    pd.testing.assert_frame_equal(load_frame(handle), _frame())  # loading doesn't consume it
+    assert len(transport) == 1 and not _freed(handle)
+
+    transport.release(handle)
+    transport.release(handle)  # second release is a no-op
+    assert len(transport) == 0 and _freed(handle)
+    pd.testing.assert_frame_equal(loaded, _frame())  # owns its memory, nothing points into the segment
+
+def test_records_round_trip(transport, codec):
+    handle = transport.put_records(RECORDS)
+
+    assert handle.codec == codec
+    assert load_records(handle) == RECORDS
+    transport.release(handle)
+    assert _freed(handle)
+
+def test_unarrowable_frame_falls_back_to_pickle(transport):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"mixed": [1, "two", 3.0]})
+    handle = transport.put_frame(df)
+
+    assert handle.codec == "pickle"
+    pd.testing.assert_frame_equal(load_frame(handle), df)
+    with pytest.raises(ValueError):
+        with open_table(handle):
+            pass
+
+def test_close_frees_everything(transport, codec, tmp_path):
+    handles = [transport.put_frame(_frame()), transport.put_records(RECORDS)]
+    transport.close()
+
+    assert len(transport) == 0 and all(_freed(h) for h in handles)
+    if transport.storage == "file":
+        assert list((tmp_path / "frames").iterdir()) == []
+
+def test_garbage_collected_transport_frees_its_data(tmp_path, codec):
+    for storage in ("shm", "file"):
+        transport = FrameTransport(storage, spill_dir=tmp_path / storage)
+        handle = transport.put_frame(_frame())
+        del transport
+        gc.collect()
+        assert _freed(handle)
+
+def _load_in_worker(handle):
+    return load_frame(handle) if handle.kind == "frame" else load_records(handle)
+
+def test_worker_process_loads_the_handle(transport):
+    frame_handle, records_handle = transport.put_frame(_frame()), transport.put_records(RECORDS)
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+        frame = pool.submit(_load_in_worker, frame_handle).result()
+        records = pool.submit(_load_in_worker, records_handle).result()
+
+    pd.testing.assert_frame_equal(frame, _frame())
+    assert records == RECORDS
+    assert not _freed(frame_handle)  # a worker exiting doesn't free the owner's data
+    transport.close()
+    assert _freed(frame_handle) and _freed(records_handle)
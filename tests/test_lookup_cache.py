@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from logic.lookup_cache import KIND_OBJECT_ID, KIND_RELATIVE_URLS, LookupCache, location_key
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LookupCache(tmp_path / "cache.sqlite", "https://org.example/")
+    yield c
+    c.close()
+
+def test_round_trip_and_negative_results(cache):
+    cache.put_many(KIND_OBJECT_ID, {"case:cas-1": "id-1", "case:cas-2": None})
+    cache.put_many(KIND_RELATIVE_URLS, {"id-1": ["a", "b"]})
+
+    assert cache.get_many(KIND_OBJECT_ID, ["case:cas-1", "case:cas-2", "case:cas-3"]) == {
+        "case:cas-1": "id-1", "case:cas-2": None}
+    assert cache.get_many(KIND_RELATIVE_URLS, ["id-1"]) == {"id-1": ["a", "b"]}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_environments_do_not_mix(cache, tmp_path):
+    cache.put_many(KIND_OBJECT_ID, {"case:cas-1": "id-1"})
+    other = LookupCache(tmp_path / "cache.sqlite", "https://other.example")
+    try:
+        assert other.get_many(KIND_OBJECT_ID, ["case:cas-1"]) == {}
+    finally:
+        other.close()
+
+def test_negative_results_expire_first(tmp_path):
+    cache = LookupCache(tmp_path / "cache.sqlite", "env", negative_ttl=0.2)
+    try:
+        cache.put_many(KIND_OBJECT_ID, {"found": "id", "missing": None})
+        time.sleep(0.3)
+        assert cache.get_many(KIND_OBJECT_ID, ["found", "missing"]) == {"found": "id"}
+    finally:
+        cache.close()
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LookupCache(tmp_path / "cache.sqlite", "env", max_entries=2)
+    try:
+        cache.put_many(KIND_OBJECT_ID, {"a": "1"})
+        time.sleep(0.01)
+        cache.put_many(KIND_OBJECT_ID, {"b": "2"})
+        time.sleep(0.01)
+        cache.get_many(KIND_OBJECT_ID, ["a"])  # "b" is now the least recently used
+        time.sleep(0.01)
+        cache.put_many(KIND_OBJECT_ID, {"c": "3"})
+
+        assert cache.get_many(KIND_OBJECT_ID, ["a", "b", "c"]) == {"a": "1", "c": "3"}
+    finally:
+        cache.close()
+
+def test_bypass_misses_but_still_stores(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    bypassing = LookupCache(path, "env", bypass=True)
+    try:
+        bypassing.put_many(KIND_OBJECT_ID, {"a": "1"})
+        assert bypassing.get_many(KIND_OBJECT_ID, ["a"]) == {}
+    finally:
+        bypassing.close()
+    cache = LookupCache(path, "env")
+    try:
+        assert cache.get_many(KIND_OBJECT_ID, ["a"]) == {"a": "1"}
+    finally:
+        cache.close()
+
+def test_location_keys_depend_on_the_location_query():
+    assert location_key("ABC") == "abc"
+    assert location_key("ABC", "q1") == location_key("abc", "q1")
+    assert location_key("abc", "q1") != location_key("abc", "q2")
+
+@pytest.fixture
+def location_query(monkeypatch):
+    """Sets LOCATION_QUERY for the test (the settings are cached on first use)."""
+    from dataverse_apis.tasks.sharepoint_documents import bulk_location_query, sharepoint_settings
+
+    def set_query(query: str) -> None:
+        monkeypatch.setenv("LOCATION_QUERY", query)
+        sharepoint_settings.cache_clear()
+        bulk_location_query.cache_clear()
+
+    yield set_query
+    monkeypatch.undo()
+    sharepoint_settings.cache_clear()
+    bulk_location_query.cache_clear()
+
+def test_changed_location_query_bypasses_cached_locations(mock_dv, cache, location_query):
+    from logic.related_documents_service import RelatedDocumentsService, to_targets
+
+    def resolve():
+        targets = to_targets([{"entity": "case", "ticket_number": "CAS-000007-A1B2C3"}])  # inactive location
+        service = RelatedDocumentsService(cache=cache)
+        service.resolve_object_ids(targets)
+        service.resolve_relative_urls(targets)
+        return targets[0].relative_urls
+
+    location_query("sharepointdocumentlocations?$select=relativeurl&$filter=_regardingobjectid_value eq")
+    assert len(resolve()) == 1
+    mock_dv.reset_stats()
+    assert len(resolve()) == 1 and mock_dv.requests == 0  # ids and locations from the cache
+
+    location_query("sharepointdocumentlocations?$select=relativeurl"
+                   "&$filter=statecode eq 0 and _regardingobjectid_value eq")
+    assert resolve() == []
+    assert mock_dv.requests == 1  # the id still from the cache, the locations from Dataverse
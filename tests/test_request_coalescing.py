@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from dataverse_apis.core.services.dataverse_client import call_dataverse
+from dataverse_apis.core.services.request_coalescing import RequestCoalescer, memo_scope
+
+def _counting(result="value"):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"result": result}
+    return fetch, calls
+
+def test_concurrent_callers_share_one_request():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"value": [1]}
+
+    threads = [threading.Thread(target=lambda: results.append(coalescer.get("u", fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)  # every thread is now waiting on the first one's request
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1 and results == [{"value": [1]}] * 5
+    results[0]["value"].append(2)  # callers get their own copy
+    assert results[1] == {"value": [1]}
+
+def test_errors_are_shared_but_not_remembered():
+    coalescer = RequestCoalescer()
+
+    def failing():
+        raise RuntimeError("boom")
+
+    with coalescer.scope():
+        with pytest.raises(RuntimeError):
+            coalescer.get("u", failing)
+        fetch, calls = _counting()
+        assert coalescer.get("u", fetch) == {"result": "value"} and len(calls) == 1
+
+def test_results_are_remembered_only_inside_a_scope():
+    coalescer = RequestCoalescer()
+    fetch, calls = _counting()
+    coalescer.get("u", fetch)
+    coalescer.get("u", fetch)
+    assert len(calls) == 2
+
+    with coalescer.scope():
+        coalescer.get("u", fetch)
+        with coalescer.scope():  # nested scopes share the outer memo
+            coalescer.get("u", fetch)
+        coalescer.get("u", fetch)
+    assert len(calls) == 3
+
+    coalescer.get("u", fetch)
+    assert len(calls) == 4
+
+def test_invalidate_and_memo_size():
+    coalescer = RequestCoalescer(memo_size=1)
+    fetch, calls = _counting()
+    with coalescer.scope():
+        coalescer.get("a", fetch)
+        coalescer.invalidate()
+        coalescer.get("a", fetch)
+        coalescer.get("b", fetch)  # evicts "a"
+        coalescer.get("a", fetch)
+    assert len(calls) == 4
+
+def test_call_dataverse_memo_and_writes(mock_dv):
+    account = mock_dv.tables["accounts"][5]["accountid"]
+    with memo_scope():
+        assert call_dataverse(f"accounts({account})")["name"] == "Business 5"
+        call_dataverse(f"accounts({account})")
+        assert mock_dv.requests == 1
+
+        call_dataverse(f"accounts({account})", method="PATCH", data={"name": "Changed"})
+        assert call_dataverse(f"accounts({account})")["name"] == "Changed"
+        assert mock_dv.requests == 3
+
+    call_dataverse(f"accounts({account})")
+    assert mock_dv.requests == 4
@@ -15,10 +15,10 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QApplication, QGridLayout, QGroupBox, QHBoxLayout,
-    QLabel, QLineEdit, QMainWindow, QProgressBar,
-    QPushButton, QRadioButton, QSizePolicy, QTextEdit,
-    QVBoxLayout, QWidget)
+from PySide6.QtWidgets import (QApplication, QCheckBox, QGridLayout, QGroupBox,
+    QHBoxLayout, QLabel, QLineEdit, QMainWindow,
+    QProgressBar, QPushButton, QRadioButton, QSizePolicy,
+    QTextEdit, QVBoxLayout, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -113,11 +113,27 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addWidget(self.groupExportMode)
 
+        self.chkResume = QCheckBox(self.centralwidget)
+        self.chkResume.setObjectName(u"chkResume")
+
+        self.verticalLayout.addWidget(self.chkResume)
+
+        self.chkBypassCache = QCheckBox(self.centralwidget)
+        self.chkBypassCache.setObjectName(u"chkBypassCache")
+
+        self.verticalLayout.addWidget(self.chkBypassCache)
+
         self.btnProcess = QPushButton(self.centralwidget)
         self.btnProcess.setObjectName(u"btnProcess")
 
         self.verticalLayout.addWidget(self.btnProcess)
 
+        self.btnCancel = QPushButton(self.centralwidget)
+        self.btnCancel.setObjectName(u"btnCancel")
+        self.btnCancel.setEnabled(False)
+
+        self.verticalLayout.addWidget(self.btnCancel)
+
         self.txtOutput = QTextEdit(self.centralwidget)
         self.txtOutput.setObjectName(u"txtOutput")
         self.txtOutput.setReadOnly(True)
@@ -166,7 +182,10 @@ class Ui_MainWindow(object):
         self.radioSeparate.setText(QCoreApplication.translate("MainWindow", u"Separate PDFs (one per sheet)", None))
         self.radioCombined.setText(QCoreApplication.translate("MainWindow", u"Single Combined PDF", None))
         self.radioPerFile.setText(QCoreApplication.translate("MainWindow", u"PDF by Excel file", None))
+        self.chkResume.setText(QCoreApplication.translate("MainWindow", u"Resume last run (skip completed sheets, targets and downloads)", None))
+        self.chkBypassCache.setText(QCoreApplication.translate("MainWindow", u"Bypass lookup cache (query Dataverse for every ticket)", None))
         self.btnProcess.setText(QCoreApplication.translate("MainWindow", u"Process Files", None))
+        self.btnCancel.setText(QCoreApplication.translate("MainWindow", u"Cancel", None))
         self.lblStatus.setText("")
         self.btnOpenOutputFolder.setText(QCoreApplication.translate("MainWindow", u"Open Output Folder", None))
     # retranslateUi